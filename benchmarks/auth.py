@@ -0,0 +1,61 @@
+"""Cookie authentication cost per page view, with and without the token cache.
+
+Builds requests carrying `chat_token` cookies drawn from a pool of USERS
+tokens and times `get_username_from_cookie` (what `read_root`/`read_item`
+call on every view) with the verified-token cache and with plain
+`jwt.decode` on every call.
+
+Run with `PYTHONPATH=src python benchmarks/auth.py`.
+"""
+import os
+import random
+import time
+
+os.environ.setdefault("JWT_SECRET", "benchmark-secret-benchmark-secret")
+
+from fastapi import Request  # noqa: E402
+
+from blog_chat.features.accounts import services  # noqa: E402
+from blog_chat.features.accounts.tokens import VerifiedTokenCache  # noqa: E402
+
+USERS = 2_000
+VIEWS = 100_000
+
+
+class NoCache(VerifiedTokenCache):
+    def get(self, token, secret):
+        return None
+
+    def put(self, token, secret, claims):
+        pass
+
+
+def make_requests(tokens: list[str]) -> list[Request]:
+    # Fresh requests per run: Request caches its parsed cookies.
+    rng = random.Random(42)
+    return [
+        Request({"type": "http", "headers": [(b"cookie", f"chat_token={rng.choice(tokens)}".encode())]})
+        for _ in range(VIEWS)
+    ]
+
+
+def timed(requests: list[Request], cache: VerifiedTokenCache) -> float:
+    services.token_cache = cache
+    start = time.perf_counter()
+    for request in requests:
+        services.get_username_from_cookie(request)
+    return time.perf_counter() - start
+
+
+def main():
+    tokens = [services.create_token(f"user{i}") for i in range(USERS)]
+    uncached = timed(make_requests(tokens), NoCache())
+    cached = timed(make_requests(tokens), VerifiedTokenCache())
+    print(f"{'mode':<10}{'total s':>10}{'us/view':>10}")
+    print(f"{'jwt.decode':<10}{uncached:>10.3f}{uncached / VIEWS * 1e6:>10.2f}")
+    print(f"{'cached':<10}{cached:>10.3f}{cached / VIEWS * 1e6:>10.2f}")
+    print(f"speedup: {uncached / cached:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,92 @@
+"""Room fan-out: sequential `send_json` per socket vs the queued ConnectionManager.
+
+Simulates 1k-10k clients in one room, 1% of them slow (each send takes
+SLOW_SEND seconds), and measures how long the sender's `broadcast` call
+blocks and how long until every healthy client has the message.
+
+Run with `PYTHONPATH=src python benchmarks/chat_broadcast.py`.
+"""
+import asyncio
+import json
+import time
+
+from blog_chat.features.chat.websocket import ConnectionManager
+
+SIZES = (1_000, 5_000, 10_000)
+SLOW_EVERY = 100
+SLOW_SEND = 0.005
+MESSAGE = {"type": "message", "id": 1, "username": "alice", "html": "<div>" + "x" * 200 + "</div>"}
+
+
+class FakeWebSocket:
+    def __init__(self, slow: bool, delivered: asyncio.Event | None = None, counter: list | None = None, total: int = 0):
+        self.slow = slow
+        self.delivered = delivered
+        self.counter = counter
+        self.total = total
+
+    async def accept(self, subprotocol=None):
+        pass
+
+    async def _sent(self):
+        if self.slow:
+            await asyncio.sleep(SLOW_SEND)
+            return
+        self.counter[0] += 1
+        if self.counter[0] == self.total:
+            self.delivered.set()
+
+    async def send_json(self, data):
+        json.dumps(data)
+        await self._sent()
+
+    async def send_text(self, data):
+        await self._sent()
+
+
+def make_sockets(count: int):
+    delivered = asyncio.Event()
+    counter = [0]
+    healthy = count - count // SLOW_EVERY
+    sockets = [
+        FakeWebSocket(i % SLOW_EVERY == 0, delivered, counter, healthy)
+        for i in range(count)
+    ]
+    return sockets, delivered
+
+
+async def sequential(count: int) -> tuple[float, float]:
+    sockets, delivered = make_sockets(count)
+    start = time.perf_counter()
+    for socket in sockets:
+        await socket.send_json(MESSAGE)
+    blocked = time.perf_counter() - start
+    await delivered.wait()
+    return blocked, time.perf_counter() - start
+
+
+async def queued(count: int) -> tuple[float, float]:
+    manager = ConnectionManager()
+    sockets, delivered = make_sockets(count)
+    for socket in sockets:
+        await manager.connect(socket, "room")
+    start = time.perf_counter()
+    await manager.broadcast(MESSAGE, "room")
+    blocked = time.perf_counter() - start
+    await delivered.wait()
+    done = time.perf_counter() - start
+    for socket in sockets:
+        manager.disconnect(socket, "room")
+    return blocked, done
+
+
+async def main():
+    print(f"{'clients':>8}{'strategy':>12}{'sender ms':>12}{'delivered ms':>15}")
+    for count in SIZES:
+        for name, run in (("sequential", sequential), ("queued", queued)):
+            blocked, done = await run(count)
+            print(f"{count:>8}{name:>12}{blocked * 1000:>12.1f}{done * 1000:>15.1f}")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
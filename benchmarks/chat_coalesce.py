@@ -0,0 +1,63 @@
+"""Send calls in a hot room: per-message broadcast vs tick coalescing.
+
+Pushes RATE messages per second for one second (in TICKS arrivals per
+second) into a room of CLIENTS sockets and counts `send_text` calls with plain broadcasts and
+with the RoomCoalescer at a few batching windows.
+
+Run with `PYTHONPATH=src python benchmarks/chat_coalesce.py`.
+"""
+import asyncio
+import time
+
+from blog_chat.features.chat.coalesce import RoomCoalescer
+from blog_chat.features.chat.websocket import ConnectionManager
+
+CLIENTS = 1_000
+RATE = 500
+TICKS = 100
+WINDOWS_MS = (25, 40, 50)
+MESSAGE = {"type": "message", "id": 1, "username": "alice", "html": "<div>" + "x" * 200 + "</div>"}
+
+
+class CountingWebSocket:
+    sends = 0
+
+    async def accept(self, subprotocol=None):
+        pass
+
+    async def send_text(self, data):
+        CountingWebSocket.sends += 1
+
+
+async def run(window_ms: int | None) -> tuple[int, float]:
+    manager = ConnectionManager(queue_size=RATE)
+    sockets = [CountingWebSocket() for _ in range(CLIENTS)]
+    for socket in sockets:
+        await manager.connect(socket, "room")
+    coalescer = RoomCoalescer(manager, (window_ms or 0) / 1000, threshold=20 if window_ms else 0)
+    CountingWebSocket.sends = 0
+    start = time.perf_counter()
+    for _ in range(TICKS):
+        for _ in range(RATE // TICKS):
+            await coalescer.publish(MESSAGE, "room")
+        await asyncio.sleep(1 / TICKS)
+    await coalescer.stop()
+    while any(not c.queue.empty() for c in manager.active_connections["room"].values()):
+        await asyncio.sleep(0.01)
+    elapsed = time.perf_counter() - start
+    for socket in sockets:
+        manager.disconnect(socket, "room")
+    return CountingWebSocket.sends, elapsed
+
+
+async def main():
+    print(f"{'mode':>14}{'send calls':>12}{'per client':>12}{'seconds':>10}")
+    sends, elapsed = await run(None)
+    print(f"{'immediate':>14}{sends:>12}{sends / CLIENTS:>12.1f}{elapsed:>10.2f}")
+    for window in WINDOWS_MS:
+        sends, elapsed = await run(window)
+        print(f"{f'{window}ms window':>14}{sends:>12}{sends / CLIENTS:>12.1f}{elapsed:>10.2f}")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,69 @@
+"""Bytes per chat message and encode cost: v1 HTML frames vs v2 records.
+
+Encodes a stream of `message` frames with each wire format and reports the
+average frame size, the size after per-message deflate (zlib raw deflate
+with a shared window, as uvicorn negotiates it), and encode time.
+
+Run with `PYTHONPATH=src python benchmarks/chat_protocol.py`.
+"""
+import os
+import time
+import zlib
+from datetime import datetime, timedelta
+
+os.environ.setdefault("JWT_SECRET", "benchmark-secret")
+
+from blog_chat.features.accounts.models import User  # noqa: E402,F401
+from blog_chat.features.chat.history import ChatRecord  # noqa: E402
+from blog_chat.features.chat.protocol import PROTOCOL_V2, PROTOCOL_V2_MSGPACK, encode, msgpack  # noqa: E402
+from blog_chat.features.chat.services import message_fragments, message_payload, message_record, render_message  # noqa: E402
+
+COUNT = 5_000
+START = datetime(2024, 1, 1)
+
+
+def messages():
+    return [
+        ChatRecord(i, "offtopic", f"user{i % 50}", f"message number {i} with **some** markdown",
+                   START + timedelta(seconds=i))
+        for i in range(1, COUNT + 1)
+    ]
+
+
+def v1(message):
+    return encode(message_payload(message, render_message(message, False)))
+
+
+def v2(protocol):
+    def frame(message):
+        return encode({"type": "message", "message": message_record(message)}, protocol)
+    return frame
+
+
+def measure(name: str, build) -> None:
+    records = messages()
+    message_fragments.clear()
+    start = time.perf_counter()
+    frames = [build(message) for message in records]
+    elapsed = time.perf_counter() - start
+    raw = sum(len(frame.encode() if isinstance(frame, str) else frame) for frame in frames)
+    deflate = zlib.compressobj(wbits=-15)
+    deflated = 0
+    for frame in frames:
+        data = frame.encode() if isinstance(frame, str) else frame
+        deflated += len(deflate.compress(data) + deflate.flush(zlib.Z_SYNC_FLUSH)) - 4
+    print(f"{name:<14} {raw / COUNT:>8.1f} B {deflated / COUNT:>10.1f} B {elapsed / COUNT * 1e6:>10.2f} us")
+
+
+def main():
+    print(f"{'protocol':<14} {'raw/msg':>10} {'deflate/msg':>12} {'encode/msg':>13}")
+    measure("v1 html", v1)
+    measure("v2 json", v2(PROTOCOL_V2))
+    if msgpack is not None:
+        measure("v2 msgpack", v2(PROTOCOL_V2_MSGPACK))
+    else:
+        print("v2 msgpack     (pip install msgpack)")
+
+
+if __name__ == "__main__":
+    main()
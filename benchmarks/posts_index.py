@@ -0,0 +1,61 @@
+"""Post lookup latency: full directory rescan vs the in-memory PostIndex.
+
+Run with `PYTHONPATH=src python benchmarks/posts_index.py`.
+"""
+import random
+import tempfile
+import time
+from pathlib import Path
+
+import powerwalk
+
+from blog_chat.features.posts.index import PostIndex
+from blog_chat.features.posts.parser import parse_markdown_file
+
+SIZES = (10, 1_000, 10_000)
+BODY = "Lorem ipsum dolor sit amet, consectetur adipiscing elit.\n\n" * 40
+
+
+def make_corpus(directory: Path, count: int):
+    for i in range(count):
+        (directory / f"post-{i}.md").write_text(
+            f"---\ntitle: Post {i}\nslug: post-{i}\ntags: [bench]\n"
+            f"created: 2024-01-{i % 28 + 1:02d}\n---\n\n{BODY}",
+            encoding="utf-8",
+        )
+
+
+def scan_get_post(directory: Path, slug: str) -> dict | None:
+    for entry in powerwalk.walk(directory, filter="**/*.md"):
+        post = parse_markdown_file(entry.path)
+        if post and post.get("slug") == slug:
+            return post
+    return None
+
+
+def timed(func, repeat: int) -> float:
+    start = time.perf_counter()
+    for _ in range(repeat):
+        func()
+    return (time.perf_counter() - start) / repeat * 1000
+
+
+def main():
+    print(f"{'posts':>8} {'scan get_post':>16} {'index get_post':>16} {'index get_posts':>16}")
+    for count in SIZES:
+        with tempfile.TemporaryDirectory() as tmpdir:
+            directory = Path(tmpdir)
+            make_corpus(directory, count)
+            slugs = [f"post-{random.randrange(count)}" for _ in range(1000)]
+            index = PostIndex(directory)
+            index.refresh()
+
+            scan_repeat = max(1, 1000 // count)
+            scan_ms = timed(lambda: scan_get_post(directory, random.choice(slugs)), scan_repeat)
+            index_ms = timed(lambda: index.get_post(random.choice(slugs)), 10_000)
+            listing_ms = timed(index.get_posts, 1000)
+            print(f"{count:>8} {scan_ms:>13.3f} ms {index_ms:>13.4f} ms {listing_ms:>13.4f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,60 @@
+"""BM25 search latency over a synthetic corpus.
+
+Run with `PYTHONPATH=src python benchmarks/search.py [posts]`.
+"""
+import itertools
+import random
+import statistics
+import sys
+import time
+
+from blog_chat.features.posts.search import SearchIndex
+
+VOCABULARY = [f"word{i}" for i in range(20_000)]
+CUM_WEIGHTS = list(itertools.accumulate(1 / (rank + 1) for rank in range(len(VOCABULARY))))
+
+
+def words(rng: random.Random, count: int) -> str:
+    return " ".join(rng.choices(VOCABULARY, cum_weights=CUM_WEIGHTS, k=count))
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 30_000
+    rng = random.Random(42)
+
+    index = SearchIndex()
+    start = time.perf_counter()
+    for i in range(count):
+        index.add(f"post-{i}", {
+            "title": words(rng, 6),
+            "tags": words(rng, 3).split(),
+            "description": words(rng, 20),
+            "content": words(rng, 400),
+        }, digest=str(i))
+    build_s = time.perf_counter() - start
+
+    start = time.perf_counter()
+    raw = index.dumps()
+    dump_s = time.perf_counter() - start
+    start = time.perf_counter()
+    SearchIndex().loads(raw)
+    load_s = time.perf_counter() - start
+
+    print(f"posts: {count}  build: {build_s:.2f}s  serialized: {len(raw) / 1e6:.1f} MB "
+          f"(dump {dump_s:.2f}s, load {load_s:.2f}s)")
+
+    for label, pool in (("rare terms", VOCABULARY[5000:]), ("mid terms", VOCABULARY[200:2000]),
+                        ("common terms", VOCABULARY[:50])):
+        timings = []
+        for _ in range(200):
+            query = " ".join(rng.sample(pool, 2))
+            start = time.perf_counter()
+            index.search(query, limit=20)
+            timings.append((time.perf_counter() - start) * 1000)
+        timings.sort()
+        print(f"{label:>13}: p50 {statistics.median(timings):7.3f} ms  "
+              f"p95 {timings[int(len(timings) * 0.95)]:7.3f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,62 @@
+"""Per-fragment cost of the chat `message.html` template.
+
+Compares minifying every rendered fragment (the old `MinifiedTemplate`
+behaviour), minifying through the bounded output cache, and rendering a
+template whose source was minified once at load time.
+
+Run with `PYTHONPATH=src python benchmarks/templates.py`.
+"""
+import time
+
+from blog_chat.core.filters import add_filter
+from blog_chat.core.html import MinifyCache, minify_html
+from blog_chat.core.responses import create_templates
+
+TEMPLATES_DIR = "src/blog_chat/features/chat/templates"
+REPEAT = 20_000
+
+
+def context(i: int) -> dict:
+    return dict(
+        username=f"user{i % 50}",
+        content=f"<p>message number {i} with <strong>some</strong> markdown</p>",
+        timestamp="3 minutes ago",
+        isOwnMessage=i % 2 == 0,
+        show_header=True,
+        userColor="hsl(120, 70%, 45%)",
+    )
+
+
+def timed(render, contexts) -> float:
+    start = time.perf_counter()
+    for ctx in contexts:
+        render(ctx)
+    return (time.perf_counter() - start) / len(contexts) * 1_000_000
+
+
+def main():
+    templates = create_templates(TEMPLATES_DIR)
+    # Markdown conversion is the same in every strategy; keep it out of the numbers.
+    add_filter(templates, "markdown", str)
+    template = templates.get_template("message.html")
+    unique = [context(i) for i in range(REPEAT)]
+    repeated = [context(i % 100) for i in range(REPEAT)]
+    output_cache = MinifyCache()
+
+    def per_render(ctx):
+        return minify_html(template.render(ctx))
+
+    def cached(ctx):
+        return output_cache.minify(template.render(ctx))
+
+    print(f"{'strategy':<28}{'unique us':>12}{'repeated us':>14}")
+    for name, render in [
+        ("minify every render", per_render),
+        ("minify via output cache", cached),
+        ("minified source only", template.render),
+    ]:
+        print(f"{name:<28}{timed(render, unique):>12.1f}{timed(render, repeated):>14.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -2,18 +2,40 @@ from blog_chat.features.chat.routes import router as chat_router
 from blog_chat.features.posts.routes import router as posts_router
 from blog_chat.features.accounts.routes import router as accounts_router
 from contextlib import asynccontextmanager
+import asyncio
 from fastapi.staticfiles import StaticFiles
 from starlette.middleware.cors import CORSMiddleware
 from starlette.middleware.gzip import GZipMiddleware
 from fastapi import FastAPI
-from blog_chat.core.database import init_db
-from blog_chat.core.responses import create_templates
+from blog_chat.core.database import dispose_engines, init_db
+from blog_chat.core.metrics import router as metrics_router
+from blog_chat.core.templates import precompile
+from blog_chat.features.chat.services import backplane, message_writer, room_coalescer
+from blog_chat.features.posts.services import (
+    create_content_watcher,
+    save_search_index,
+    sync_search_index,
+)
 
 
 @asynccontextmanager
 async def lifespan(_: FastAPI):
     await init_db()
+    await asyncio.to_thread(precompile)
+    await message_writer.start()
+    await backplane.start()
+    content_watcher = create_content_watcher()
+    if content_watcher:
+        await content_watcher.start()
+    await asyncio.to_thread(sync_search_index)
     yield
+    await backplane.stop()
+    await room_coalescer.stop()
+    await message_writer.stop()
+    if content_watcher:
+        await content_watcher.stop()
+    await asyncio.to_thread(save_search_index)
+    await dispose_engines()
 
 app = FastAPI(lifespan=lifespan)
 app.add_middleware(
@@ -24,5 +46,7 @@ app.add_middleware(
 app.add_middleware(GZipMiddleware, minimum_size=500)
 app.mount("/static", StaticFiles(directory="static"), name="static")
 app.include_router(accounts_router)
-app.include_router(posts_router)
 app.include_router(chat_router)
+app.include_router(metrics_router)
+# Last: its /{slug:path} catch-all would shadow the other routers' GET routes.
+app.include_router(posts_router)
@@ -0,0 +1,112 @@
+import hashlib
+from datetime import date, datetime, time, timezone
+from email.utils import format_datetime, parsedate_to_datetime
+from pathlib import Path
+
+from fastapi import Request, Response
+
+
+def make_etag(*parts) -> str:
+    digest = hashlib.sha256()
+    for part in parts:
+        digest.update(str(part).encode())
+        digest.update(b"\0")
+    return f'"{digest.hexdigest()[:32]}"'
+
+
+ENCODING_SUFFIXES = {"gzip": "-gz", "br": "-br"}
+
+
+def encoded_etag(etag: str, encoding: str | None) -> str:
+    """Distinct strong ETag for a content-encoded variant of a representation."""
+    if not encoding:
+        return etag
+    return etag[:-1] + ENCODING_SUFFIXES[encoding] + '"'
+
+
+def _base_etag(tag: str) -> str:
+    for suffix in ENCODING_SUFFIXES.values():
+        if tag.endswith(suffix + '"'):
+            return tag[:-len(suffix) - 1] + '"'
+    return tag
+
+
+def directory_fingerprint(directories) -> str:
+    """Hash of every file below the given directories, used as a template version."""
+    digest = hashlib.sha256()
+    for directory in directories:
+        for path in sorted(Path(directory).rglob("*")):
+            if path.is_file():
+                digest.update(str(path.relative_to(directory)).encode())
+                digest.update(path.read_bytes())
+    return digest.hexdigest()
+
+
+def to_datetime(value) -> datetime | None:
+    """Best-effort conversion of a frontmatter date to an aware UTC datetime."""
+    if isinstance(value, datetime):
+        result = value
+    elif isinstance(value, date):
+        result = datetime.combine(value, time.min)
+    elif isinstance(value, str) and value:
+        for parse in (datetime.fromisoformat, lambda v: datetime.strptime(v, "%d-%m-%Y")):
+            try:
+                result = parse(value)
+                break
+            except ValueError:
+                continue
+        else:
+            return None
+    else:
+        return None
+    if result.tzinfo is None:
+        result = result.replace(tzinfo=timezone.utc)
+    return result.astimezone(timezone.utc)
+
+
+def http_date(value: datetime) -> str:
+    return format_datetime(value.astimezone(timezone.utc), usegmt=True)
+
+
+def _strip_weak(tag: str) -> str:
+    tag = tag.strip()
+    return tag[2:] if tag.startswith("W/") else tag
+
+
+def is_not_modified(request: Request, etag: str, last_modified: datetime | None = None) -> bool:
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match is not None:
+        tags = {_base_etag(_strip_weak(tag)) for tag in if_none_match.split(",")}
+        return "*" in tags or _base_etag(etag) in tags
+
+    if_modified_since = request.headers.get("if-modified-since")
+    if if_modified_since and last_modified:
+        try:
+            since = parsedate_to_datetime(if_modified_since)
+        except (TypeError, ValueError):
+            return False
+        if since.tzinfo is None:
+            since = since.replace(tzinfo=timezone.utc)
+        return last_modified.replace(microsecond=0) <= since
+    return False
+
+
+def validator_headers(etag: str, last_modified: datetime | None = None, vary: str | None = None) -> dict[str, str]:
+    headers = {"ETag": etag, "Cache-Control": "no-cache"}
+    if last_modified:
+        headers["Last-Modified"] = http_date(last_modified)
+    if vary:
+        headers["Vary"] = vary
+    return headers
+
+
+def not_modified(headers: dict[str, str], request: Request | None = None) -> Response:
+    """304 response; echoes the encoded ETag variant the client revalidated."""
+    if request is not None and "ETag" in headers:
+        base = _base_etag(headers["ETag"])
+        for tag in request.headers.get("if-none-match", "").split(","):
+            tag = _strip_weak(tag)
+            if tag != "*" and _base_etag(tag) == base:
+                headers = {**headers, "ETag": tag}
+                break
+    return Response(status_code=304, headers=headers)
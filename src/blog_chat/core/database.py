@@ -1,20 +1,82 @@
-
 from typing import AsyncGenerator
 
-from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine, async_sessionmaker
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession, create_async_engine, async_sessionmaker
 
 from blog_chat.core.base import Base
-from blog_chat.core.config import DATABASE_URL
-
-engine = create_async_engine(
+from blog_chat.core.config import (
+    DATABASE_READ_URL,
     DATABASE_URL,
-    echo=False
+    DB_MAX_OVERFLOW,
+    DB_POOL_RECYCLE,
+    DB_POOL_SIZE,
+    DB_POOL_TIMEOUT,
+    SQLITE_BUSY_TIMEOUT_MS,
+    SQLITE_SYNCHRONOUS,
 )
+
+
+def is_sqlite(url: str) -> bool:
+    return url.startswith("sqlite")
+
+
+def engine_options(url: str) -> dict:
+    if is_sqlite(url):
+        return {}
+    return {
+        "pool_size": DB_POOL_SIZE,
+        "max_overflow": DB_MAX_OVERFLOW,
+        "pool_timeout": DB_POOL_TIMEOUT,
+        "pool_recycle": DB_POOL_RECYCLE,
+        "pool_pre_ping": True,
+    }
+
+
+def tune_sqlite(engine: AsyncEngine, read_only: bool = False) -> AsyncEngine:
+    """WAL lets readers run alongside the writer; `busy_timeout` makes a
+    writer wait for the lock instead of failing with "database is locked"."""
+    in_memory = ":memory:" in str(engine.url) or engine.url.database in (None, "")
+
+    @event.listens_for(engine.sync_engine, "connect")
+    def set_pragmas(dbapi_connection, _):
+        cursor = dbapi_connection.cursor()
+        if not in_memory:
+            cursor.execute("PRAGMA journal_mode=WAL")
+        cursor.execute(f"PRAGMA synchronous={SQLITE_SYNCHRONOUS}")
+        cursor.execute(f"PRAGMA busy_timeout={SQLITE_BUSY_TIMEOUT_MS}")
+        if read_only:
+            cursor.execute("PRAGMA query_only=ON")
+        cursor.close()
+
+    return engine
+
+
+def create_engine(url: str, read_only: bool = False) -> AsyncEngine:
+    engine = create_async_engine(url, echo=False, **engine_options(url))
+    if is_sqlite(url):
+        tune_sqlite(engine, read_only)
+    return engine
+
+
+engine = create_engine(DATABASE_URL)
+# SQLite always gets its own read engine so readers never queue behind the
+# writer's connections; other databases share the primary unless a replica
+# is configured.
+if DATABASE_READ_URL or is_sqlite(DATABASE_URL):
+    read_engine = create_engine(DATABASE_READ_URL or DATABASE_URL, read_only=True)
+else:
+    read_engine = engine
+
 async_session_maker = async_sessionmaker(
     engine,
     class_=AsyncSession,
     expire_on_commit=False
 )
+read_session_maker = async_sessionmaker(
+    read_engine,
+    class_=AsyncSession,
+    expire_on_commit=False
+)
 
 
 async def get_db() -> AsyncGenerator[AsyncSession, None]:
@@ -22,6 +84,28 @@ async def get_db() -> AsyncGenerator[AsyncSession, None]:
         yield session
 
 
+def pool_status(engine: AsyncEngine) -> dict:
+    pool = engine.pool
+    status = {"pool": type(pool).__name__}
+    for name in ("size", "checkedin", "checkedout", "overflow"):
+        if hasattr(pool, name):
+            status[name] = getattr(pool, name)()
+    return status
+
+
+def pool_metrics() -> dict:
+    metrics = {"primary": pool_status(engine)}
+    if read_engine is not engine:
+        metrics["read"] = pool_status(read_engine)
+    return metrics
+
+
+async def dispose_engines():
+    await engine.dispose()
+    if read_engine is not engine:
+        await read_engine.dispose()
+
+
 async def init_db():
     async with engine.begin() as conn:
         await conn.run_sync(Base.metadata.create_all)
@@ -1,8 +1,40 @@
+import json
+
 import markdown
 
+from blog_chat.core.html import minify_html
+from blog_chat.core.render_cache import RenderCache
+
+MARKDOWN_EXTENSIONS: list[str] = []
+MARKDOWN_EXTENSION_CONFIGS: dict[str, dict] = {}
+
 
 def parse_to_markdown(text: str) -> str:
-    return markdown.markdown(text or "")
+    return markdown.markdown(
+        text or "",
+        extensions=MARKDOWN_EXTENSIONS,
+        extension_configs=MARKDOWN_EXTENSION_CONFIGS,
+    )
+
+
+def markdown_config_key() -> str:
+    return json.dumps(
+        [MARKDOWN_EXTENSIONS, MARKDOWN_EXTENSION_CONFIGS],
+        sort_keys=True,
+        default=str,
+    )
+
+
+def create_markdown_cache(max_entries: int = 512, directory=None) -> RenderCache:
+    return RenderCache(
+        max_entries=max_entries,
+        directory=directory,
+        namespace=f"markdown:{markdown.__version__}:{markdown_config_key()}",
+    )
+
+
+def render_minified_markdown(text: str) -> str:
+    return minify_html(parse_to_markdown(text))
 
 
 def add_filter(templates, name: str, func):
@@ -11,3 +43,11 @@ def add_filter(templates, name: str, func):
 
 def add_markdown_filter(templates):
     add_filter(templates, "markdown", parse_to_markdown)
+
+
+def add_cached_markdown_filter(templates, cache: RenderCache, name: str = "markdown"):
+    add_filter(
+        templates,
+        name,
+        lambda text: cache.get_or_render(text or "", render_minified_markdown),
+    )
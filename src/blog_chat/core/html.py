@@ -1,15 +1,52 @@
+import hashlib
+import threading
+from collections import OrderedDict
+
 from minify_html import minify
 
+MINIFY_OPTIONS = dict(
+    keep_comments=False,
+    keep_html_and_head_opening_tags=True,
+    minify_css=False,
+    minify_js=False,
+    remove_processing_instructions=True,
+)
+
 
 def minify_html_func(html: str) -> str:
-    return minify(
-        html,
-        keep_comments=False,
-        keep_html_and_head_opening_tags=True,
-        minify_css=False,
-        minify_js=False,
-        remove_processing_instructions=True
-    )
+    return minify(html, **MINIFY_OPTIONS)
+
+
+def minify_template_source(source: str) -> str:
+    """Minify Jinja template source, leaving `{{ }}`/`{% %}`/`{# #}` untouched."""
+    return minify(source, preserve_brace_template_syntax=True, **MINIFY_OPTIONS)
+
+
+class MinifyCache:
+    """Bounded LRU of minified output keyed by a hash of the rendered HTML."""
+
+    def __init__(self, max_entries: int = 1024):
+        self.max_entries = max_entries
+        self._entries: OrderedDict[bytes, str] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def minify(self, html: str) -> str:
+        key = hashlib.blake2b(html.encode("utf-8"), digest_size=16).digest()
+        with self._lock:
+            minified = self._entries.get(key)
+            if minified is not None:
+                self._entries.move_to_end(key)
+                return minified
+        minified = minify_html_func(html)
+        with self._lock:
+            self._entries[key] = minified
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        return minified
 
 
 minify_html = minify_html_func
+minify_cache = MinifyCache()
@@ -0,0 +1,15 @@
+from fastapi import APIRouter
+from fastapi.responses import Response
+
+from blog_chat.core.config import DB_METRICS
+from blog_chat.core.database import pool_metrics
+
+router = APIRouter()
+
+
+@router.get("/api/metrics/db")
+async def db_metrics():
+    """Connection pool usage for the primary and read engines, if `DB_METRICS` is on."""
+    if not DB_METRICS:
+        return Response(status_code=404)
+    return pool_metrics()
@@ -0,0 +1,74 @@
+import hashlib
+import os
+import threading
+from collections import OrderedDict
+from collections.abc import Callable
+from pathlib import Path
+
+
+class RenderCache:
+    """Bounded cache of rendered HTML keyed by a hash of its source.
+
+    Entries live in an in-memory LRU and, when `directory` is given, are also
+    written to disk so a cold process can reuse them.
+    """
+
+    def __init__(self, max_entries: int = 512, directory: Path | str | None = None, namespace: str = ""):
+        self.max_entries = max_entries
+        self.directory = Path(directory) if directory else None
+        self.namespace = namespace
+        self._entries: OrderedDict[str, str] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def key(self, source: str) -> str:
+        digest = hashlib.sha256(self.namespace.encode())
+        digest.update(b"\0")
+        digest.update(source.encode())
+        return digest.hexdigest()
+
+    def get_or_render(self, source: str, render: Callable[[str], str]) -> str:
+        key = self.key(source)
+        with self._lock:
+            html = self._entries.get(key)
+            if html is not None:
+                self._entries.move_to_end(key)
+                return html
+
+        html = self._read(key)
+        if html is None:
+            html = render(source)
+            self._write(key, html)
+
+        with self._lock:
+            self._entries[key] = html
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        return html
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def _path(self, key: str) -> Path:
+        return self.directory / key[:2] / f"{key}.html"
+
+    def _read(self, key: str) -> str | None:
+        if not self.directory:
+            return None
+        try:
+            return self._path(key).read_text(encoding="utf-8")
+        except OSError:
+            return None
+
+    def _write(self, key: str, html: str):
+        if not self.directory:
+            return
+        path = self._path(key)
+        tmp_path = path.with_suffix(f".{os.getpid()}.tmp")
+        try:
+            path.parent.mkdir(parents=True, exist_ok=True)
+            tmp_path.write_text(html, encoding="utf-8")
+            os.replace(tmp_path, path)
+        except OSError:
+            tmp_path.unlink(missing_ok=True)
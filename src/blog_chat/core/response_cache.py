@@ -0,0 +1,96 @@
+import gzip
+import threading
+from collections import OrderedDict
+from collections.abc import Callable, Hashable
+from dataclasses import dataclass, field
+
+from fastapi import Request, Response
+
+from blog_chat.core.conditional import encoded_etag
+from blog_chat.core.responses import accepts_encoding
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+MIN_COMPRESS_SIZE = 500
+
+
+@dataclass(slots=True, frozen=True)
+class CachedResponse:
+    body: bytes
+    encoded: dict[str, bytes] = field(default_factory=dict)
+    media_type: str = "text/html"
+    headers: dict[str, str] = field(default_factory=dict)
+
+    @property
+    def size(self) -> int:
+        return len(self.body) + sum(len(data) for data in self.encoded.values())
+
+
+def compress_variants(body: bytes, min_size: int = MIN_COMPRESS_SIZE) -> dict[str, bytes]:
+    if len(body) < min_size:
+        return {}
+    variants = {"gzip": gzip.compress(body, compresslevel=6, mtime=0)}
+    if brotli is not None:
+        variants["br"] = brotli.compress(body, quality=5)
+    return variants
+
+
+class ResponseCache:
+    """LRU of final response bodies with their compressed variants.
+
+    Bounded by the total size of stored bytes. A hit is served as-is in the
+    best encoding the client accepts, so it skips rendering, minification and
+    compression.
+    """
+
+    def __init__(self, max_bytes: int = 32 * 1024 * 1024):
+        self.max_bytes = max_bytes
+        self.size = 0
+        self._entries: OrderedDict[Hashable, CachedResponse] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, key: Hashable) -> CachedResponse | None:
+        with self._lock:
+            cached = self._entries.get(key)
+            if cached is not None:
+                self._entries.move_to_end(key)
+            return cached
+
+    def put(self, key: Hashable, body: bytes, media_type: str = "text/html",
+            headers: dict[str, str] | None = None) -> CachedResponse:
+        cached = CachedResponse(body, compress_variants(body), media_type, dict(headers or {}))
+        if cached.size > self.max_bytes:
+            return cached
+        with self._lock:
+            previous = self._entries.pop(key, None)
+            if previous is not None:
+                self.size -= previous.size
+            self._entries[key] = cached
+            self.size += cached.size
+            while self.size > self.max_bytes:
+                _, evicted = self._entries.popitem(last=False)
+                self.size -= evicted.size
+        return cached
+
+    def invalidate(self, predicate: Callable[[Hashable], bool] | None = None):
+        with self._lock:
+            for key in [key for key in self._entries if predicate is None or predicate(key)]:
+                self.size -= self._entries.pop(key).size
+
+    @staticmethod
+    def respond(request: Request, cached: CachedResponse, status_code: int = 200) -> Response:
+        headers = dict(cached.headers)
+        headers["Vary"] = ", ".join(filter(None, [headers.get("Vary"), "Accept-Encoding"]))
+        for encoding in ("br", "gzip"):
+            if encoding in cached.encoded and accepts_encoding(request, encoding):
+                headers["Content-Encoding"] = encoding
+                if "ETag" in headers:
+                    headers["ETag"] = encoded_etag(headers["ETag"], encoding)
+                return Response(cached.encoded[encoding], status_code, headers, cached.media_type)
+        return Response(cached.body, status_code, headers, cached.media_type)
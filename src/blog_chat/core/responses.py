@@ -1,17 +1,97 @@
 import jinja2
+from fastapi.responses import StreamingResponse
 from fastapi.templating import Jinja2Templates
 
-from blog_chat.core.html import minify_html
+from blog_chat.core.html import minify_cache, minify_html, minify_template_source
+
+STREAM_CHUNK_SIZE = 8192
+
+
+class MinifyingLoader(jinja2.BaseLoader):
+    """Wrap a loader so template sources are minified once, at load time."""
+
+    def __init__(self, loader: jinja2.BaseLoader):
+        self.loader = loader
+
+    def get_source(self, environment, template):
+        source, filename, uptodate = self.loader.get_source(environment, template)
+        return minify_template_source(source), filename, uptodate
+
+    def list_templates(self):
+        return self.loader.list_templates()
 
 
 class MinifiedTemplate(jinja2.Template):
     def render(self, *args, **kwargs):
         rendered = super().render(*args, **kwargs)
-        return minify_html(rendered)
+        if not getattr(self.environment, "minify_output", True):
+            return rendered
+        return minify_cache.minify(rendered)
 
 
-def create_templates(directory):
+def create_templates(directory, minify_output: bool = False, bytecode_cache: jinja2.BytecodeCache | None = None):
+    """Templates whose sources are minified on load.
+
+    Set `minify_output` to also minify every rendered page (through the
+    bounded `minify_cache`), e.g. when filters emit unminified HTML.
+    """
     templates = Jinja2Templates(directory=directory)
+    templates.env.bytecode_cache = bytecode_cache
+    templates.env.loader = MinifyingLoader(templates.env.loader)
     templates.env.template_class = MinifiedTemplate
+    templates.env.minify_output = minify_output
     templates.env.filters["minify"] = minify_html
     return templates
+
+
+def precompile_templates(templates) -> int:
+    """Compile every template up front so first requests don't pay for it."""
+    names = templates.env.list_templates()
+    for name in names:
+        templates.get_template(name)
+    return len(names)
+
+
+def accepts_encoding(request, encoding: str) -> bool:
+    """Whether the client's Accept-Encoding allows `encoding` (q > 0)."""
+    for item in request.headers.get("accept-encoding", "").split(","):
+        name, _, params = item.strip().partition(";")
+        if name.strip().lower() not in (encoding, "*"):
+            continue
+        quality = params.strip()
+        if quality.startswith("q="):
+            try:
+                return float(quality[2:]) > 0
+            except ValueError:
+                return False
+        return True
+    return False
+
+
+def _buffered(chunks, size: int = STREAM_CHUNK_SIZE):
+    buffer = []
+    buffered = 0
+    for chunk in chunks:
+        buffer.append(chunk)
+        buffered += len(chunk)
+        if buffered >= size:
+            yield "".join(buffer)
+            buffer.clear()
+            buffered = 0
+    if buffer:
+        yield "".join(buffer)
+
+
+def stream_template(templates, name: str, context: dict, status_code: int = 200, headers=None) -> StreamingResponse:
+    """Stream a template with `generate()` so the first bytes go out early.
+
+    Streamed output is never minified as a whole; it relies on the
+    template sources having been minified by `MinifyingLoader`.
+    """
+    template = templates.get_template(name)
+    return StreamingResponse(
+        _buffered(template.generate(context)),
+        status_code=status_code,
+        media_type="text/html",
+        headers=headers,
+    )
@@ -0,0 +1,25 @@
+from pathlib import Path
+
+import jinja2
+
+from blog_chat.core.config import RENDER_CACHE_DIR, RENDER_CACHE_SIZE, TEMPLATE_CACHE_DIR
+from blog_chat.core.filters import add_cached_markdown_filter, add_markdown_filter, create_markdown_cache
+from blog_chat.core.responses import create_templates, precompile_templates
+
+TEMPLATE_DIRS = sorted(Path("src/blog_chat/features").glob("*/templates"))
+
+bytecode_cache = (
+    jinja2.FileSystemBytecodeCache(TEMPLATE_CACHE_DIR)
+    if TEMPLATE_CACHE_DIR
+    else jinja2.FileSystemBytecodeCache()
+)
+templates = create_templates(TEMPLATE_DIRS, bytecode_cache=bytecode_cache)
+
+markdown_cache = create_markdown_cache(RENDER_CACHE_SIZE, RENDER_CACHE_DIR)
+# Chat messages are short and unique; only post bodies go through the render cache.
+add_markdown_filter(templates)
+add_cached_markdown_filter(templates, markdown_cache, "cached_markdown")
+
+
+def precompile() -> int:
+    return precompile_templates(templates)
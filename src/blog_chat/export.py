@@ -0,0 +1,97 @@
+"""Prerender the blog side of the app to static files.
+
+    python -m blog_chat.export --output prerendered
+
+Writes the index, every post page, sitemap.xml and robots.txt together with
+precompressed `.gz` variants. Point PRERENDERED_DIR at the output directory to
+serve them to anonymous visitors.
+"""
+import argparse
+import gzip
+import shutil
+from pathlib import Path
+from urllib.parse import urlsplit
+
+from fastapi import Request
+
+from blog_chat.core.config import POSTS_PAGE_SIZE, SITE_URL
+from blog_chat.features.posts.prerender import (
+    INDEX_ARTIFACT,
+    ROBOTS_ARTIFACT,
+    post_artifact,
+)
+from blog_chat.features.posts.routes import (
+    index_context,
+    post_context,
+    render_robots,
+    templates,
+)
+from blog_chat.features.posts.services import get_post, get_posts, get_posts_page, sitemap_cache
+
+
+def make_request(path: str) -> Request:
+    url = urlsplit(SITE_URL)
+    default_port = 443 if url.scheme == "https" else 80
+    return Request({
+        "type": "http",
+        "method": "GET",
+        "scheme": url.scheme,
+        "server": (url.hostname, url.port or default_port),
+        "root_path": "",
+        "path": path,
+        "query_string": b"",
+        "headers": [(b"host", url.netloc.encode())],
+    })
+
+
+def write_artifact(output: Path, name: str, content: str) -> list[Path]:
+    path = output / name
+    path.parent.mkdir(parents=True, exist_ok=True)
+    data = content.encode("utf-8")
+    path.write_bytes(data)
+    gzipped = path.with_name(path.name + ".gz")
+    gzipped.write_bytes(gzip.compress(data, compresslevel=9, mtime=0))
+    return [path, gzipped]
+
+
+def export_site(output: Path) -> list[Path]:
+    """Render every public page into `output`, replacing its previous contents."""
+    output = Path(output)
+    staging = output.with_name(output.name + ".tmp")
+    shutil.rmtree(staging, ignore_errors=True)
+    staging.mkdir(parents=True)
+
+    written = []
+    first_page, next_cursor = get_posts_page(limit=POSTS_PAGE_SIZE)
+    index_html = templates.get_template("index.html").render(
+        index_context(make_request("/"), first_page, username=None, next_cursor=next_cursor))
+    written += write_artifact(staging, INDEX_ARTIFACT, index_html)
+
+    for meta in get_posts():
+        post = get_post(meta.slug)
+        if post is None:
+            continue
+        post_html = templates.get_template("post.html").render(
+            post_context(make_request(f"/{meta.slug}"), post, username=None))
+        written += write_artifact(staging, post_artifact(meta.slug), post_html)
+
+    for name, sitemap_file in sitemap_cache.files().items():
+        written += write_artifact(staging, name, sitemap_file.body.decode("utf-8"))
+    written += write_artifact(staging, ROBOTS_ARTIFACT, render_robots())
+
+    shutil.rmtree(output, ignore_errors=True)
+    staging.rename(output)
+    return [output / path.relative_to(staging) for path in written]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--output", "-o", type=Path, default=Path("prerendered"),
+                        help="directory to write the prerendered site to")
+    args = parser.parse_args(argv)
+    written = export_site(args.output)
+    print(f"Wrote {len(written)} files to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -4,14 +4,12 @@ from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select
 
 from blog_chat.core.database import get_db
-from blog_chat.core.responses import create_templates
+from blog_chat.core.templates import templates
 from blog_chat.features.accounts.models import User
 from blog_chat.features.accounts.services import create_token
 
 router = APIRouter()
 
-templates = create_templates("src/blog_chat/features/accounts/templates")
-
 
 @router.post("/api/set-username")
 async def set_username(request: Request, db: AsyncSession = Depends(get_db)):
@@ -4,8 +4,12 @@ from datetime import timedelta
 import jwt
 from fastapi import Request
 
-from blog_chat.core.config import JWT_ALGORITHM, JWT_SECRET
+from blog_chat.core.config import JWT_ALGORITHM, JWT_SECRET, TOKEN_CACHE_SIZE
 from blog_chat.core.base import Base
+from blog_chat.features.accounts.tokens import VerifiedTokenCache
+
+# Page views and chat connects re-verify the same few thousand cookies.
+token_cache = VerifiedTokenCache(TOKEN_CACHE_SIZE)
 
 
 def create_token(username: str) -> str:
@@ -17,11 +21,15 @@ def create_token(username: str) -> str:
 
 
 def decode_token(token: str) -> dict | None:
+    payload = token_cache.get(token, JWT_SECRET)
+    if payload is not None:
+        return payload
     try:
         payload = jwt.decode(token, JWT_SECRET, algorithms=[JWT_ALGORITHM])
-        return payload
     except (jwt.ExpiredSignatureError, jwt.InvalidTokenError):
         return None
+    token_cache.put(token, JWT_SECRET, payload)
+    return payload
 
 
 def get_username_from_token(token: str) -> str:
@@ -0,0 +1,57 @@
+import threading
+import time
+from collections import OrderedDict
+
+
+class VerifiedTokenCache:
+    """LRU of token -> claims for tokens whose signature already verified.
+
+    Entries expire at the token's own `exp`, so a cached token is never
+    accepted after `jwt.decode` would reject it. The cache remembers the
+    secret it was filled under and empties itself when a different one is
+    passed in. Tokens without `exp` and failed verifications are never
+    cached.
+    """
+
+    def __init__(self, max_entries: int = 4096, clock=time.time):
+        self.max_entries = max_entries
+        self.clock = clock
+        self._entries: OrderedDict[str, tuple[dict, float]] = OrderedDict()
+        self._secret: str | None = None
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, token: str, secret: str) -> dict | None:
+        with self._lock:
+            if secret != self._secret:
+                self._entries.clear()
+                self._secret = secret
+                return None
+            entry = self._entries.get(token)
+            if entry is None:
+                return None
+            claims, expires = entry
+            if self.clock() >= expires:
+                del self._entries[token]
+                return None
+            self._entries.move_to_end(token)
+            return claims
+
+    def put(self, token: str, secret: str, claims: dict):
+        expires = claims.get("exp")
+        if not isinstance(expires, (int, float)):
+            return
+        with self._lock:
+            if secret != self._secret:
+                self._entries.clear()
+                self._secret = secret
+            self._entries[token] = (claims, expires)
+            self._entries.move_to_end(token)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
@@ -0,0 +1,258 @@
+"""Cross-process fan-out for chat rooms.
+
+Every worker publishes new-message events to the backplane and delivers
+whatever the backplane hands back to its own sockets, so users in the same
+room see each other regardless of which worker (or host) they landed on.
+
+    python -m blog_chat.features.chat.backplane --socket /tmp/blog-chat.sock
+
+runs the local unix-socket broker used by the `unix` backplane.
+"""
+import abc
+import argparse
+import asyncio
+import json
+import logging
+from collections.abc import Awaitable, Callable
+from pathlib import Path
+
+logger = logging.getLogger(__name__)
+
+Handler = Callable[[dict], Awaitable[None]]
+
+POSTGRES_CHANNEL = "blog_chat"
+# NOTIFY payloads must be shorter than 8000 bytes.
+MAX_NOTIFY_BYTES = 7999
+# Backoff between attempts to re-establish a lost broker/Postgres connection.
+RECONNECT_MIN_DELAY = 0.5
+RECONNECT_MAX_DELAY = 30.0
+
+
+def encode_event(event: dict) -> str:
+    return json.dumps(event, separators=(",", ":"))
+
+
+class Backplane(abc.ABC):
+    """Publishes events to every worker, including the publishing one."""
+
+    def __init__(self, handler: Handler):
+        self.handler = handler
+
+    async def start(self):
+        pass
+
+    async def stop(self):
+        pass
+
+    @abc.abstractmethod
+    async def publish(self, event: dict):
+        """Raises when the event could not be handed to the backplane."""
+
+    async def _deliver(self, payload: str):
+        try:
+            await self.handler(json.loads(payload))
+        except Exception:
+            logger.exception("Failed to deliver backplane event")
+
+
+class InProcessBackplane(Backplane):
+    """Single-process fallback: events go straight to the local handler."""
+
+    async def publish(self, event: dict):
+        await self.handler(event)
+
+
+class ReconnectingBackplane(Backplane):
+    """A backplane over one connection that is re-established, with
+    exponential backoff, whenever it drops."""
+
+    def __init__(self, handler: Handler):
+        super().__init__(handler)
+        self._maintainer: asyncio.Task | None = None
+
+    async def start(self):
+        await self._connect()
+        self._maintainer = asyncio.create_task(self._maintain())
+
+    async def stop(self):
+        if self._maintainer is not None:
+            self._maintainer.cancel()
+            await asyncio.gather(self._maintainer, return_exceptions=True)
+            self._maintainer = None
+        await self._close()
+
+    @abc.abstractmethod
+    async def _connect(self):
+        """Open the connection and subscribe."""
+
+    @abc.abstractmethod
+    async def _wait_closed(self):
+        """Return once the connection is lost."""
+
+    @abc.abstractmethod
+    async def _close(self):
+        """Release the connection; publishing fails until the next `_connect`."""
+
+    async def _maintain(self):
+        while True:
+            await self._wait_closed()
+            await self._close()
+            logger.warning("%s lost its connection; reconnecting", type(self).__name__)
+            delay = RECONNECT_MIN_DELAY
+            while True:
+                await asyncio.sleep(delay)
+                try:
+                    await self._connect()
+                    break
+                except Exception as exc:
+                    logger.warning("%s reconnect failed: %s", type(self).__name__, exc)
+                    await self._close()
+                    delay = min(delay * 2, RECONNECT_MAX_DELAY)
+            logger.info("%s reconnected", type(self).__name__)
+
+
+class PostgresBackplane(ReconnectingBackplane):
+    """PostgreSQL `LISTEN/NOTIFY` over a dedicated asyncpg connection."""
+
+    def __init__(self, handler: Handler, dsn: str, channel: str = POSTGRES_CHANNEL):
+        super().__init__(handler)
+        self.dsn = dsn.replace("postgresql+asyncpg://", "postgresql://", 1)
+        self.channel = channel
+        self._connection = None
+        self._lost = asyncio.Event()
+        self._lock = asyncio.Lock()
+        self._deliveries: set[asyncio.Task] = set()
+
+    async def _connect(self):
+        import asyncpg
+
+        self._lost.clear()
+        connection = await asyncpg.connect(self.dsn)
+        connection.add_termination_listener(lambda _: self._lost.set())
+        await connection.add_listener(self.channel, self._on_notify)
+        self._connection = connection
+
+    async def _wait_closed(self):
+        await self._lost.wait()
+
+    async def _close(self):
+        connection, self._connection = self._connection, None
+        if connection is not None and not connection.is_closed():
+            try:
+                await connection.close()
+            except Exception:
+                connection.terminate()
+
+    def _on_notify(self, connection, pid, channel, payload):
+        task = asyncio.create_task(self._deliver(payload))
+        self._deliveries.add(task)
+        task.add_done_callback(self._deliveries.discard)
+
+    async def publish(self, event: dict):
+        if self._connection is None:
+            raise ConnectionError("PostgresBackplane is not connected")
+        payload = encode_event(event)
+        if len(payload.encode("utf-8")) > MAX_NOTIFY_BYTES:
+            raise ValueError("Event too large for NOTIFY")
+        async with self._lock:
+            await self._connection.execute("SELECT pg_notify($1, $2)", self.channel, payload)
+
+
+class UnixSocketBroker:
+    """Relays newline-delimited events to every connected worker."""
+
+    def __init__(self, path: str | Path):
+        self.path = Path(path)
+        self._server: asyncio.AbstractServer | None = None
+        self._writers: set[asyncio.StreamWriter] = set()
+
+    async def start(self):
+        self.path.unlink(missing_ok=True)
+        self._server = await asyncio.start_unix_server(self._serve, path=self.path)
+
+    async def stop(self):
+        if self._server is not None:
+            self._server.close()
+            for writer in list(self._writers):
+                writer.close()
+            await self._server.wait_closed()
+            self._server = None
+        self.path.unlink(missing_ok=True)
+
+    async def serve_forever(self):
+        await self.start()
+        async with self._server:
+            await self._server.serve_forever()
+
+    async def _serve(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        self._writers.add(writer)
+        try:
+            while line := await reader.readline():
+                for peer in list(self._writers):
+                    try:
+                        peer.write(line)
+                    except Exception:
+                        self._writers.discard(peer)
+        finally:
+            self._writers.discard(writer)
+            writer.close()
+
+
+class UnixSocketBackplane(ReconnectingBackplane):
+    """Client of a `UnixSocketBroker`."""
+
+    def __init__(self, handler: Handler, path: str | Path):
+        super().__init__(handler)
+        self.path = Path(path)
+        self._reader: asyncio.StreamReader | None = None
+        self._writer: asyncio.StreamWriter | None = None
+
+    async def _connect(self):
+        self._reader, self._writer = await asyncio.open_unix_connection(self.path)
+
+    async def _wait_closed(self):
+        try:
+            while line := await self._reader.readline():
+                await self._deliver(line.decode("utf-8"))
+        except (ConnectionError, OSError):
+            pass
+        logger.warning("Chat broker at %s closed the connection", self.path)
+
+    async def _close(self):
+        writer, self._writer, self._reader = self._writer, None, None
+        if writer is not None:
+            writer.close()
+
+    async def publish(self, event: dict):
+        if self._writer is None:
+            raise ConnectionError("UnixSocketBackplane is not connected")
+        self._writer.write(encode_event(event).encode("utf-8") + b"\n")
+        await self._writer.drain()
+
+
+def create_backplane(kind: str, handler: Handler, dsn: str | None = None,
+                     socket_path: str | Path | None = None) -> Backplane:
+    if kind == "memory":
+        return InProcessBackplane(handler)
+    if kind == "postgres":
+        if not dsn or not dsn.startswith("postgresql"):
+            raise ValueError("The postgres chat backplane needs a PostgreSQL DATABASE_URL")
+        return PostgresBackplane(handler, dsn)
+    if kind == "unix":
+        if not socket_path:
+            raise ValueError("The unix chat backplane needs CHAT_BROKER_SOCKET")
+        return UnixSocketBackplane(handler, socket_path)
+    raise ValueError(f"Unknown chat backplane: {kind}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Run the local chat backplane broker.")
+    parser.add_argument("--socket", "-s", type=Path, required=True,
+                        help="path of the unix socket to listen on")
+    args = parser.parse_args(argv)
+    print(f"Chat broker listening on {args.socket}")
+    asyncio.run(UnixSocketBroker(args.socket).serve_forever())
+
+
+if __name__ == "__main__":
+    main()
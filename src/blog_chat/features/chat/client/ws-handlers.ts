@@ -3,6 +3,24 @@ export { ws };
 const MAX_CHARS = 280;
 let isSending = false;
 let timezoneSent = false;
+// Keyset cursor: id of the oldest message shown, or null when there is nothing older.
+let olderCursor: number | null = null;
+let loadingOlder = false;
+// Newest message received, sent as `last_id` on reconnect to get only the gap.
+let lastSeenId: number | null = null;
+let reconnectAttempt = 0;
+let reconnectPolicy = { base_ms: 1000, max_ms: 30000 };
+// Protocol v2 sends data-only records; bubbles are built here.
+const PROTOCOL = "blog-chat.v2";
+let currentUsername: string | null = null;
+
+interface ChatRecord {
+  id: number;
+  u: string; // username
+  h: number; // username colour hue
+  t: number; // UTC epoch milliseconds
+  c: string; // rendered content HTML
+}
 
 function getTimezone(): string {
   return Intl.DateTimeFormat().resolvedOptions().timeZone;
@@ -71,6 +89,25 @@ function showEmptyState(show: boolean) {
   }
 }
 
+function escapeHtml(text: string): string {
+  const span = document.createElement("span");
+  span.textContent = text;
+  return span.innerHTML;
+}
+
+function renderRecord(record: ChatRecord): HTMLElement {
+  const isOwn = record.u === currentUsername;
+  const iso = new Date(record.t).toISOString();
+  const el = document.createElement("div");
+  el.className = `chat ${isOwn ? "chat-start" : "chat-end"}`;
+  el.dataset.id = String(record.id);
+  el.innerHTML =
+    `<div class="chat-header"><span style="color: hsl(${record.h}, 70%, 45%);">${escapeHtml(record.u)}</span>` +
+    `<time class="text-xs opacity-50" datetime="${iso}">${formatRelativeTime(iso)}</time></div>` +
+    `<div class="chat-bubble ${isOwn ? "chat-bubble-primary" : "chat-bubble-secondary"}">${record.c}</div>`;
+  return el;
+}
+
 function isAtBottom(): boolean {
   const container = document.getElementById("chat-messages");
   if (!container) return true;
@@ -104,19 +141,25 @@ function createScrollButton(): HTMLElement {
   return btn;
 }
 
-export function initChat() {
-  const room = document.body.getAttribute("data-room") || "offtopic";
-  const protocol = window.location.protocol === "https:" ? "wss:" : "ws:";
-  const wsUrl = `${protocol}//${window.location.host}/ws/chat?room=${room}`;
+const handlers = {
+  hello: handleHello,
+  history: loadChatHistory,
+  reset: loadChatHistory,
+  delta: applyDelta,
+  older: loadOlderMessages,
+  message: addMessage,
+  batch: handleBatch,
+  error: handleError,
+};
 
-  ws = new WebSocket(wsUrl);
-  const handlers = {
-    history: loadChatHistory,
-    message: addMessage,
-    error: handleError,
-  };
+type HandlerType = keyof typeof handlers;
+
+function connect(room: string) {
+  const protocol = window.location.protocol === "https:" ? "wss:" : "ws:";
+  const params = new URLSearchParams({ room });
+  if (lastSeenId !== null) params.set("last_id", String(lastSeenId));
 
-  type HandlerType = keyof typeof handlers;
+  ws = new WebSocket(`${protocol}//${window.location.host}/ws/chat?${params}`, [PROTOCOL]);
 
   ws.onmessage = (event) => {
     const data = JSON.parse(event.data);
@@ -130,6 +173,46 @@ export function initChat() {
     if (handler) handler(data);
   };
 
+  ws.onclose = () => {
+    isSending = false;
+    setLoadingState(false);
+    scheduleReconnect(room);
+  };
+}
+
+function scheduleReconnect(room: string) {
+  // Full jitter spreads a redeploy's reconnects over the whole window.
+  const ceiling = Math.min(
+    reconnectPolicy.max_ms,
+    reconnectPolicy.base_ms * 2 ** reconnectAttempt,
+  );
+  reconnectAttempt += 1;
+  setTimeout(() => connect(room), Math.random() * ceiling);
+}
+
+function handleHello(data: any) {
+  reconnectAttempt = 0;
+  if (data.reconnect) reconnectPolicy = data.reconnect;
+  if (data.username) currentUsername = data.username;
+}
+
+// Hot rooms coalesce broadcasts: one frame holds several, oldest first.
+function handleBatch(data: any) {
+  data.messages.forEach((frame: any) => {
+    const handler = handlers[frame.type as HandlerType];
+    if (handler && handler !== handleBatch) handler(frame);
+  });
+}
+
+function applyDelta(data: any) {
+  data.messages.forEach((record: ChatRecord) => addMessage({ message: record }));
+  updateTimestamps();
+}
+
+export function initChat() {
+  const room = document.body.getAttribute("data-room") || "offtopic";
+  connect(room);
+
   const input = document.getElementById("chat-input") as HTMLInputElement;
   const sendBtn = document.getElementById("send-btn");
 
@@ -145,10 +228,47 @@ export function initChat() {
     updateCharCount();
   }
 
+  const container = document.getElementById("chat-messages");
+  if (container) {
+    container.addEventListener("scroll", () => {
+      if (isNearOldest(container)) requestOlderMessages();
+    });
+  }
+
   setInterval(updateTimestamps, 30000);
 }
 
+function isNearOldest(container: HTMLElement): boolean {
+  return (
+    container.scrollHeight - container.scrollTop - container.clientHeight <= 50
+  );
+}
+
+function requestOlderMessages() {
+  if (olderCursor === null || loadingOlder) return;
+  if (!ws || ws.readyState !== WebSocket.OPEN) return;
+  loadingOlder = true;
+  ws.send(JSON.stringify({ type: "history", before: olderCursor }));
+}
+
+function loadOlderMessages(data: any) {
+  loadingOlder = false;
+  olderCursor = data.before;
+  const container = document.getElementById("chat-messages");
+  if (!container) return;
+  // Pages arrive oldest first; the list shows newest first.
+  [...data.messages].reverse().forEach((record: ChatRecord) => {
+    container.append(renderRecord(record));
+  });
+  updateTimestamps();
+}
+
 function loadChatHistory(data: any) {
+  olderCursor = data.before;
+  if (data.messages.length > 0) {
+    lastSeenId = data.messages[data.messages.length - 1].id;
+  }
+  loadingOlder = false;
   const container = document.getElementById("chat-messages");
   if (container) {
     container.innerHTML = "";
@@ -156,7 +276,9 @@ function loadChatHistory(data: any) {
       showEmptyState(true);
     } else {
       showEmptyState(false);
-      data.messages.forEach((msg: any) => addHistoryMessage(msg));
+      data.messages.forEach((record: ChatRecord) => addHistoryMessage(record));
+      // History comes from a shared server snapshot; refresh its relative times.
+      updateTimestamps();
       if (isAtBottom()) {
         scrollToTop();
       }
@@ -164,17 +286,13 @@ function loadChatHistory(data: any) {
   }
 }
 
-function addHistoryMessage(msg: any) {
+function addHistoryMessage(record: ChatRecord) {
   const container = document.getElementById("chat-messages");
   if (!container) return;
 
   showEmptyState(false);
-  container.insertAdjacentHTML("beforeend", msg.html);
-
-  const timeEl = container.lastElementChild?.querySelector("time");
-  if (timeEl && msg.timestamp) {
-    timeEl.setAttribute("datetime", msg.timestamp);
-  }
+  // History arrives oldest first; newest messages sit at the top.
+  container.prepend(renderRecord(record));
 }
 
 function sendMessage(input: HTMLInputElement) {
@@ -226,7 +344,11 @@ function handleError(data: any) {
   }
 }
 
-function addMessage(data: any) {
+function addMessage(data: { message: ChatRecord }) {
+  const record = data.message;
+  // A message can reach us in both a history frame and a later batch.
+  if (document.querySelector(`#chat-messages [data-id="${record.id}"]`)) return;
+  lastSeenId = record.id;
   if (isSending) {
     isSending = false;
     setLoadingState(false);
@@ -240,16 +362,7 @@ function addMessage(data: any) {
   showEmptyState(false);
   const wasAtBottom = isAtBottom();
 
-  const temp = document.createElement("div");
-  temp.innerHTML = data.html;
-  const msgEl = temp.firstElementChild;
-
-  const timeEl = msgEl?.querySelector("time");
-  if (timeEl && data.timestamp) {
-    timeEl.setAttribute("datetime", data.timestamp);
-  }
-
-  container.prepend(msgEl!);
+  container.prepend(renderRecord(record));
 
   if (wasAtBottom) {
     scrollToTop();
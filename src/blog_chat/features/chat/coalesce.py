@@ -0,0 +1,110 @@
+import asyncio
+import time
+from collections.abc import Callable, Mapping
+
+from blog_chat.features.chat.protocol import Protocol
+from blog_chat.features.chat.websocket import Broadcast, Connection, ConnectionManager, Frame
+
+
+class RoomRate:
+    """Messages per second in a room, measured over one-second buckets."""
+
+    __slots__ = ("started", "count", "hot")
+
+    def __init__(self, now: float):
+        self.started = now
+        self.count = 0
+        self.hot = False
+
+
+class RoomCoalescer:
+    """Broadcasts immediately in quiet rooms; in rooms above `threshold`
+    messages per second, holds broadcasts for `window` seconds and sends
+    them to each socket as one `batch` frame.
+
+    Senders' own echoes go through `send` so they keep their place among
+    the held broadcasts, and `on_send` hooks (recording into the history
+    buffer) run only when their message actually goes out.
+    """
+
+    def __init__(self, manager: ConnectionManager, window: float = 0.04, threshold: int = 20,
+                 clock=time.monotonic):
+        self.manager = manager
+        self.window = window
+        self.threshold = threshold
+        self.clock = clock
+        self.rates: dict[str, RoomRate] = {}
+        self.pending: dict[str, list[Broadcast]] = {}
+        self.hooks: dict[str, list[Callable[[], None]]] = {}
+        self.flushers: dict[str, asyncio.Task] = {}
+
+    def is_hot(self, room: str) -> bool:
+        rate = self.rates.get(room)
+        return rate is not None and rate.hot
+
+    def _tick(self, room: str) -> bool:
+        now = self.clock()
+        rate = self.rates.get(room)
+        if rate is None:
+            rate = self.rates[room] = RoomRate(now)
+        elapsed = now - rate.started
+        if elapsed >= 1.0:
+            # The bucket that just ended decides; an idle gap cools the room down.
+            rate.hot = rate.count / elapsed >= self.threshold
+            rate.started = now
+            rate.count = 0
+        rate.count += 1
+        if rate.count >= self.threshold:
+            rate.hot = True
+        return rate.hot
+
+    async def publish(self, message: Frame, room: str, exclude: str | None = None,
+                      variants: Mapping[Protocol, Frame] | None = None,
+                      on_send: Callable[[], None] | None = None):
+        hot = self.threshold > 0 and self._tick(room)
+        if not hot and room not in self.pending:
+            if on_send is not None:
+                on_send()
+            await self.manager.broadcast(message, room, exclude, variants)
+            return
+        if on_send is not None:
+            self.hooks.setdefault(room, []).append(on_send)
+        self._hold(room, (message, exclude, variants, None))
+
+    async def send(self, connection: Connection, message: Frame,
+                   variants: Mapping[Protocol, Frame] | None = None):
+        """Send to one connection, queued behind the room's held broadcasts."""
+        if connection.room not in self.pending and not self.is_hot(connection.room):
+            await self.manager.send(connection.websocket, connection.room, message, variants)
+            return
+        self._hold(connection.room, (message, None, variants, connection.id))
+
+    def _hold(self, room: str, entry: Broadcast):
+        self.pending.setdefault(room, []).append(entry)
+        if room not in self.flushers:
+            self.flushers[room] = asyncio.create_task(self._flush_later(room))
+
+    async def _flush_later(self, room: str):
+        try:
+            await asyncio.sleep(self.window)
+        finally:
+            self.flushers.pop(room, None)
+        await self.flush(room)
+
+    async def flush(self, room: str):
+        for hook in self.hooks.pop(room, ()):
+            hook()
+        entries = self.pending.pop(room, None)
+        if not entries:
+            return
+        if room not in self.manager.active_connections:
+            self.rates.pop(room, None)
+            return
+        await self.manager.broadcast_batch(entries, room)
+
+    async def stop(self):
+        for task in list(self.flushers.values()):
+            task.cancel()
+        self.flushers.clear()
+        for room in list(self.pending):
+            await self.flush(room)
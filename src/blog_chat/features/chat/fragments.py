@@ -0,0 +1,45 @@
+import threading
+from collections import OrderedDict
+from collections.abc import Callable, Hashable
+
+
+class MessageFragmentCache:
+    """LRU of rendered `message.html` fragments.
+
+    Keys are `(message_id, is_own, time_label)`: the bubble variant and the
+    humanized timestamp are the only parts of a fragment that differ between
+    viewers, so every reader of a room shares the same rendered HTML.
+    """
+
+    def __init__(self, max_entries: int = 4096):
+        self.max_entries = max_entries
+        self._entries: OrderedDict[Hashable, str] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, key: Hashable) -> str | None:
+        with self._lock:
+            html = self._entries.get(key)
+            if html is not None:
+                self._entries.move_to_end(key)
+            return html
+
+    def put(self, key: Hashable, html: str):
+        with self._lock:
+            self._entries[key] = html
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def get_or_render(self, key: Hashable, render: Callable[[], str]) -> str:
+        html = self.get(key)
+        if html is None:
+            html = render()
+            self.put(key, html)
+        return html
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
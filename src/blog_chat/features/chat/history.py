@@ -0,0 +1,220 @@
+import asyncio
+import json
+from collections import OrderedDict, deque
+from collections.abc import Awaitable, Callable, Iterable
+from datetime import datetime
+
+from blog_chat.features.chat.models import Message
+from blog_chat.features.chat.protocol import PROTOCOL_V2_MSGPACK, Protocol, encode, is_v2
+
+# Rough per-entry cost of the record, item and deque slot on top of the strings.
+ITEM_OVERHEAD = 200
+
+
+class ChatRecord:
+    """Compact, ORM-free copy of a message."""
+
+    __slots__ = ("id", "room_slug", "username", "content", "timestamp")
+
+    def __init__(self, id: int, room_slug: str, username: str, content: str, timestamp: datetime):
+        self.id = id
+        self.room_slug = room_slug
+        self.username = username
+        self.content = content
+        self.timestamp = timestamp
+
+    @classmethod
+    def from_message(cls, message: Message) -> "ChatRecord":
+        return cls(message.id, message.room_slug, message.username, message.content, message.timestamp)
+
+
+class HistoryItem:
+    """A buffered message plus its encodings: v1 JSON once per bubble
+    variant, and the v2 record (`data`) with its JSON (`compact`)."""
+
+    __slots__ = ("record", "own", "other", "data", "compact", "size")
+
+    def __init__(self, record: ChatRecord, own: str, other: str, data: dict):
+        self.record = record
+        self.own = own
+        self.other = other
+        self.data = data
+        self.compact = json.dumps(data, separators=(",", ":"))
+        self.size = len(own) + len(other) + len(self.compact) + len(record.content) + ITEM_OVERHEAD
+
+    @property
+    def id(self) -> int:
+        return self.record.id
+
+    @property
+    def username(self) -> str:
+        return self.record.username
+
+
+def encode_message(message: Message | ChatRecord, html: str) -> str:
+    return json.dumps({
+        "id": message.id,
+        "username": message.username,
+        "timestamp": message.timestamp.isoformat(),
+        "html": html,
+    }, separators=(",", ":"))
+
+
+Render = Callable[[ChatRecord, bool], str]
+Describe = Callable[[ChatRecord], dict]
+
+
+def encode_item(message: Message | ChatRecord, render: Render, describe: Describe) -> HistoryItem:
+    record = message if isinstance(message, ChatRecord) else ChatRecord.from_message(message)
+    return HistoryItem(
+        record,
+        own=encode_message(record, render(record, True)),
+        other=encode_message(record, render(record, False)),
+        data=describe(record),
+    )
+
+
+def encode_frame(kind: str, messages: Iterable[str], before: int | None) -> str:
+    """A `history`/`older` frame: encoded messages oldest first, plus the cursor for the page before them."""
+    return f'{{"type":"{kind}","messages":[{",".join(messages)}],"before":{json.dumps(before)}}}'
+
+
+def encode_items(kind: str, items: Iterable[HistoryItem], before: int | None,
+                 username: str | None, protocol: Protocol = None) -> str | bytes:
+    if protocol == PROTOCOL_V2_MSGPACK:
+        return encode({"type": kind, "messages": [item.data for item in items], "before": before}, protocol)
+    if is_v2(protocol):
+        return encode_frame(kind, (item.compact for item in items), before)
+    return encode_frame(kind, (item.own if item.username == username else item.other for item in items), before)
+
+
+class RoomHistory:
+    """Ring buffer of a room's most recent messages."""
+
+    def __init__(self, limit: int):
+        self.items: deque[HistoryItem] = deque(maxlen=limit)
+        self.size = 0
+        self.loaded = False
+        self.lock = asyncio.Lock()
+        # Broadcasts that arrive while the first load is in flight.
+        self.pending: list[HistoryItem] = []
+        # v2 frames are the same for every viewer; keep them until the next append.
+        self._shared: dict[tuple[str, Protocol], str | bytes] = {}
+
+    def append(self, item: HistoryItem) -> int:
+        """Add `item`, returning the change in buffered bytes."""
+        evicted = self.items[0].size if len(self.items) == self.items.maxlen else 0
+        self.items.append(item)
+        self._shared.clear()
+        self.size += item.size - evicted
+        return item.size - evicted
+
+    def frame(self, username: str | None, kind: str = "history", protocol: Protocol = None) -> str | bytes:
+        before = self.items[0].id if len(self.items) == self.items.maxlen else None
+        if not is_v2(protocol):
+            return encode_items(kind, self.items, before, username, protocol)
+        frame = self._shared.get((kind, protocol))
+        if frame is None:
+            frame = self._shared[kind, protocol] = encode_items(kind, self.items, before, username, protocol)
+        return frame
+
+    def delta(self, username: str | None, last_id: int, protocol: Protocol = None) -> str | bytes | None:
+        """A `delta` frame of the messages after `last_id`, or None if it fell out of the buffer.
+
+        Position in the buffer (broadcast order) decides what was missed, so
+        this does not rely on ids being increasing.
+        """
+        missed = []
+        for item in reversed(self.items):
+            if item.id == last_id:
+                return encode_items("delta", reversed(missed), None, username, protocol)
+            missed.append(item)
+        return None
+
+
+class HistorySnapshots:
+    """Per-room ring buffers of the last `limit` messages, kept encoded.
+
+    A room is warmed from the database by its first joiner; after that joins
+    are served from memory and broadcasts are appended. When the buffers
+    exceed `max_bytes`, the least recently used rooms nobody is connected to
+    (per `is_active`) are dropped.
+    """
+
+    def __init__(self, render: Render, describe: Describe, limit: int = 50,
+                 max_bytes: int = 64 * 1024 * 1024, is_active: Callable[[str], bool] = lambda room: False):
+        self.render = render
+        self.describe = describe
+        self.limit = limit
+        self.max_bytes = max_bytes
+        self.is_active = is_active
+        self.size = 0
+        self._rooms: OrderedDict[str, RoomHistory] = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self._rooms)
+
+    def __contains__(self, room: str) -> bool:
+        return room in self._rooms
+
+    def _room(self, room: str) -> RoomHistory:
+        history = self._rooms.get(room)
+        if history is None:
+            history = self._rooms[room] = RoomHistory(self.limit)
+        self._rooms.move_to_end(room)
+        return history
+
+    def _evict(self, keep: str):
+        if self.size <= self.max_bytes:
+            return
+        for room in list(self._rooms):
+            if room != keep and not self.is_active(room):
+                self.size -= self._rooms.pop(room).size
+                if self.size <= self.max_bytes:
+                    return
+
+    async def frame(self, room: str, username: str | None,
+                    load: Callable[[], Awaitable[Iterable[Message]]], last_id: int | None = None,
+                    protocol: Protocol = None) -> str | bytes:
+        """The room's history frame; for a reconnecting client that saw `last_id`,
+        only the missed messages, or a `reset` when the gap is too large."""
+        history = self._room(room)
+        if not history.loaded:
+            async with history.lock:
+                if not history.loaded:
+                    loaded = await load()
+                    for message in loaded:
+                        self.size += history.append(encode_item(message, self.render, self.describe))
+                    # The writer may not have inserted these yet; merge by id.
+                    seen = {message.id for message in loaded}
+                    for item in history.pending:
+                        if item.id not in seen:
+                            self.size += history.append(item)
+                    history.pending.clear()
+                    history.loaded = True
+                    self._rooms[room] = history
+                    self._evict(keep=room)
+        if last_id is None:
+            return history.frame(username, protocol=protocol)
+        delta = history.delta(username, last_id, protocol)
+        return delta if delta is not None else history.frame(username, "reset", protocol)
+
+    def append(self, room: str, message: Message | ChatRecord):
+        history = self._rooms.get(room)
+        if history is None:
+            return
+        item = encode_item(message, self.render, self.describe)
+        if not history.loaded:
+            history.pending.append(item)
+            return
+        self.size += history.append(item)
+        self._evict(keep=room)
+
+    def invalidate(self, room: str | None = None):
+        if room is None:
+            self._rooms.clear()
+            self.size = 0
+        else:
+            history = self._rooms.pop(room, None)
+            if history is not None:
+                self.size -= history.size
@@ -3,7 +3,7 @@ from __future__ import annotations
 from datetime import datetime
 from typing import TYPE_CHECKING
 
-from sqlalchemy import String, DateTime, Text, ForeignKey
+from sqlalchemy import String, DateTime, Text, ForeignKey, Index
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 
 from blog_chat.core.base import Base
@@ -14,6 +14,10 @@ if TYPE_CHECKING:
 
 class Message(Base):
     __tablename__ = "messages"
+    __table_args__ = (
+        # Serves "newest N in a room" and keyset pages older than (timestamp, id).
+        Index("ix_messages_room_slug_timestamp_id", "room_slug", "timestamp", "id"),
+    )
 
     id: Mapped[int] = mapped_column(primary_key=True)
     room_slug: Mapped[str] = mapped_column(String(100), index=True)
@@ -26,3 +30,12 @@ class Message(Base):
     ip_address: Mapped[str | None] = mapped_column(String(45), nullable=True)
 
     user: Mapped["User"] = relationship(back_populates="messages")
+
+
+class MessageIdBlock(Base):
+    """Hi/lo allocator row: the next message id not yet handed to a writer."""
+
+    __tablename__ = "message_id_blocks"
+
+    id: Mapped[int] = mapped_column(primary_key=True)
+    next_id: Mapped[int] = mapped_column()
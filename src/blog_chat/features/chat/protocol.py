@@ -0,0 +1,53 @@
+"""Chat wire protocol versions, negotiated with the WebSocket subprotocol.
+
+* no subprotocol (v1): JSON frames carrying server-rendered HTML bubbles.
+* `blog-chat.v2`: JSON frames carrying compact records that the client
+  renders itself: `{"id", "u": username, "h": colour hue, "t": UTC epoch
+  milliseconds, "c": rendered message content}`.
+* `blog-chat.v2.msgpack`: the same v2 frames as MessagePack binary frames,
+  offered only when the optional `msgpack` package is installed.
+"""
+import json
+
+try:
+    import msgpack
+except ImportError:
+    msgpack = None
+
+PROTOCOL_V2 = "blog-chat.v2"
+PROTOCOL_V2_MSGPACK = "blog-chat.v2.msgpack"
+
+Protocol = str | None
+
+
+def supported_protocols() -> tuple[str, ...]:
+    if msgpack is None:
+        return (PROTOCOL_V2,)
+    return (PROTOCOL_V2_MSGPACK, PROTOCOL_V2)
+
+
+def choose_protocol(offered: list[str]) -> Protocol:
+    """The server's preferred protocol among those the client offered; None means v1."""
+    for protocol in supported_protocols():
+        if protocol in offered:
+            return protocol
+    return None
+
+
+def is_v2(protocol: Protocol) -> bool:
+    return protocol in (PROTOCOL_V2, PROTOCOL_V2_MSGPACK)
+
+
+def encode(message: dict | str | bytes, protocol: Protocol = None) -> str | bytes:
+    if not isinstance(message, dict):
+        return message
+    if protocol == PROTOCOL_V2_MSGPACK:
+        return msgpack.packb(message)
+    return json.dumps(message, separators=(",", ":"))
+
+
+def encode_batch(messages: list[dict | str], protocol: Protocol = None) -> str | bytes:
+    """One `batch` frame carrying several frames, oldest first."""
+    if protocol == PROTOCOL_V2_MSGPACK:
+        return msgpack.packb({"type": "batch", "messages": messages})
+    return f'{{"type":"batch","messages":[{",".join(encode(m, protocol) for m in messages)}]}}'
@@ -1,100 +1,74 @@
-from fastapi import APIRouter, WebSocket, WebSocketDisconnect, Depends
-from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select
-from datetime import datetime, timezone
-from zoneinfo import ZoneInfo
-import hashlib
-import humanize
-
-from blog_chat.core.database import get_db
-from blog_chat.core.filters import add_markdown_filter
-from blog_chat.core.responses import create_templates
-from blog_chat.features.chat.models import Message
-from blog_chat.features.chat.websocket import ConnectionManager
-from blog_chat.features.accounts.services import get_username_from_token
+from fastapi import APIRouter, WebSocket, WebSocketDisconnect, Query, Request
+from fastapi.responses import Response
+
+from blog_chat.features.chat.services import (
+    HISTORY_LIMIT,
+    MAX_HISTORY_LIMIT,
+    hello_frame,
+    history_frame,
+    manager,
+    message_writer,
+    parse_control,
+    publish_message,
+)
+from blog_chat.features.chat.protocol import choose_protocol
+from blog_chat.features.chat.sharding import owns_room, proxy_websocket, shard_for, shard_socket
+from blog_chat.features.accounts.services import get_username_from_cookie, get_username_from_token
 
 router = APIRouter()
 
-manager = ConnectionManager()
-user_timezones: dict[str, str] = {}
-
-templates = create_templates("src/blog_chat/features/chat/templates")
-add_markdown_filter(templates)
-
 MAX_MESSAGE_LENGTH = 280
 
 
-def get_username_color(username: str) -> str:
-    hash_value = int(hashlib.md5(username.encode()).hexdigest(), 16)
-    hue = hash_value % 360
-    return f"hsl({hue}, 70%, 45%)"
-
-
-def format_timestamp(timestamp: str, timezone_name: str | None = None) -> str:
-    if not timestamp:
-        return ""
-    
-    ts = timestamp.replace("Z", "+00:00")
-    dt_utc = datetime.fromisoformat(ts).replace(tzinfo=timezone.utc)
-    
-    if timezone_name:
-        try:
-            dt_local = dt_utc.astimezone(ZoneInfo(timezone_name))
-            return humanize.naturaltime(dt_local)
-        except Exception:
-            pass
-    
-    return humanize.naturaltime(dt_utc)
-
-
-def render_message_template(username: str, content: str, timestamp: str, is_own: bool, show_header: bool = True, timezone_name: str | None = None) -> str:
-    formatted_time = format_timestamp(timestamp, timezone_name)
-
-    return templates.get_template("message.html").render(
-        username=username,
-        content=content,
-        timestamp=formatted_time,
-        isOwnMessage=is_own,
-        show_header=show_header,
-        userColor=get_username_color(username)
-    )
+@router.get("/api/chat/history")
+async def chat_history(
+    request: Request,
+    room: str = "offtopic",
+    before: int | None = None,
+    limit: int = Query(HISTORY_LIMIT, ge=1, le=MAX_HISTORY_LIMIT),
+):
+    username = get_username_from_cookie(request) or "Guest"
+    frame = await history_frame(room, username, before, limit)
+    return Response(frame, media_type="application/json")
 
 
 @router.websocket("/ws/chat")
-async def websocket_endpoint(websocket: WebSocket, db: AsyncSession = Depends(get_db)):
+async def websocket_endpoint(websocket: WebSocket):
+    # No request-scoped session: a socket can stay open for hours, so the
+    # history reads and the writer each take a session per operation.
     room = websocket.query_params.get("room", "offtopic")
-    await manager.connect(websocket, room)
+    if not owns_room(room):
+        await proxy_websocket(websocket, shard_socket(shard_for(room)))
+        return
+    protocol = choose_protocol(websocket.scope.get("subprotocols", []))
+    connection = await manager.connect(websocket, room, protocol)
 
     token = websocket.cookies.get("chat_token", "")
     username = get_username_from_token(token)
 
-    result = await db.execute(
-        select(Message)
-        .where(Message.room_slug == room)
-        .order_by(Message.timestamp.asc())
-        .limit(50)
-    )
-    messages = result.scalars().all()
-    messages_list = []
+    last_id = websocket.query_params.get("last_id", "")
+    await manager.send(websocket, room, hello_frame(protocol, username))
+    await manager.send(websocket, room, await history_frame(
+        room, username, last_id=int(last_id) if last_id.isdigit() else None, protocol=protocol))
     timezone_name = websocket.cookies.get("chat_timezone")
-    for m in messages:
-        html = render_message_template(
-            m.username, m.content, m.timestamp.isoformat(), m.username == username, 
-            show_header=True, timezone_name=timezone_name)
-        messages_list.append({
-            "id": m.id,
-            "html": html,
-            "username": m.username,
-            "timestamp": m.timestamp.isoformat(),
-        })
-
-    await websocket.send_json({"type": "history", "messages": messages_list})
 
     try:
         while True:
             data = await websocket.receive_text()
-            
-            timezone_name = user_timezones.get(room) or websocket.cookies.get("chat_timezone")
+            control = parse_control(data)
+            if control is not None:
+                before = control.get("before")
+                # bool is an int subclass; `true` is not a message id.
+                if control.get("type") == "history" and type(before) is int:
+                    await manager.send(websocket, room, await history_frame(
+                        room, username, before, protocol=protocol))
+                else:
+                    await manager.send(websocket, room, {
+                        "type": "error",
+                        "message": "Unrecognised control frame; message not sent."
+                    })
+                continue
+
             message_text = data.strip()
             
             if message_text.startswith("tz:"):
@@ -102,13 +76,12 @@ async def websocket_endpoint(websocket: WebSocket, db: AsyncSession = Depends(ge
                 if len(parts) == 2 and parts[0].startswith("tz:"):
                     timezone_name = parts[0][3:]
                     message_text = parts[1].strip()
-                    user_timezones[room] = timezone_name
 
             if not message_text:
                 continue
 
             if len(message_text) > MAX_MESSAGE_LENGTH:
-                await websocket.send_json({
+                await manager.send(websocket, room, {
                     "type": "error",
                     "message": f"Message too long. Maximum {MAX_MESSAGE_LENGTH} characters allowed."
                 })
@@ -116,32 +89,10 @@ async def websocket_endpoint(websocket: WebSocket, db: AsyncSession = Depends(ge
 
             client_ip = websocket.client.host if websocket.client else None
 
-            new_message = Message(
-                room_slug=room,
-                username=username,
-                content=message_text,
-                ip_address=client_ip,
-            )
-            db.add(new_message)
-            await db.commit()
-            await db.refresh(new_message)
-
-            html = render_message_template(
-                new_message.username,
-                new_message.content,
-                new_message.timestamp.isoformat(),
-                True,
-                show_header=True,
-                timezone_name=timezone_name
-            )
-            message_payload = {
-                "type": "message",
-                "id": new_message.id,
-                "html": html,
-                "username": new_message.username,
-                "timestamp": new_message.timestamp.isoformat(),
-            }
-            await manager.broadcast(message_payload, room)
+            new_message = await message_writer.create(room, username, message_text, client_ip)
+            await publish_message(new_message, connection, timezone_name)
 
     except WebSocketDisconnect:
+        pass
+    finally:
         manager.disconnect(websocket, room)
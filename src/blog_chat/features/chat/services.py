@@ -0,0 +1,299 @@
+from datetime import datetime, timezone
+from functools import lru_cache
+import json
+from zoneinfo import ZoneInfo
+import hashlib
+import logging
+
+import humanize
+from sqlalchemy import select, tuple_
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from blog_chat.core.config import (
+    CHAT_BACKPLANE,
+    CHAT_BROKER_SOCKET,
+    CHAT_COALESCE_THRESHOLD,
+    CHAT_COALESCE_WINDOW_MS,
+    CHAT_FRAGMENT_CACHE_SIZE,
+    CHAT_HISTORY_MAX_BYTES,
+    CHAT_RECONNECT_BASE_MS,
+    CHAT_RECONNECT_MAX_MS,
+    CHAT_ID_BLOCK_SIZE,
+    CHAT_SEND_QUEUE_SIZE,
+    CHAT_SLOW_CONSUMER_POLICY,
+    CHAT_WRITE_BATCH,
+    CHAT_WRITE_DELAY,
+    DATABASE_URL,
+)
+from blog_chat.core.database import async_session_maker, read_session_maker
+from blog_chat.core.filters import parse_to_markdown
+from blog_chat.core.templates import templates
+from blog_chat.features.chat.backplane import create_backplane
+from blog_chat.features.chat.coalesce import RoomCoalescer
+from blog_chat.features.chat.fragments import MessageFragmentCache
+from blog_chat.features.chat.history import ChatRecord, HistorySnapshots, encode_item, encode_items
+from blog_chat.features.chat.models import Message
+from blog_chat.features.chat.sharding import owns_room
+from blog_chat.features.chat.protocol import PROTOCOL_V2, PROTOCOL_V2_MSGPACK, Protocol, is_v2
+from blog_chat.features.chat.websocket import Connection, ConnectionManager
+from blog_chat.features.chat.writer import MessageWriter
+
+logger = logging.getLogger(__name__)
+
+HISTORY_LIMIT = 50
+MAX_HISTORY_LIMIT = 100
+
+# Reconnect guidance sent in the first (`hello`) frame. Clients reconnect
+# after a random delay in [0, min(max_ms, base_ms * 2 ** attempt)] ("full
+# jitter") and pass the id of the last message they saw as `?last_id=` to
+# receive only what they missed.
+RECONNECT_POLICY = {"base_ms": CHAT_RECONNECT_BASE_MS, "max_ms": CHAT_RECONNECT_MAX_MS, "jitter": "full"}
+
+message_fragments = MessageFragmentCache(CHAT_FRAGMENT_CACHE_SIZE)
+manager = ConnectionManager(CHAT_SEND_QUEUE_SIZE, CHAT_SLOW_CONSUMER_POLICY)
+room_coalescer = RoomCoalescer(manager, CHAT_COALESCE_WINDOW_MS / 1000, CHAT_COALESCE_THRESHOLD)
+message_writer = MessageWriter(
+    async_session_maker,
+    max_batch=CHAT_WRITE_BATCH,
+    max_delay=CHAT_WRITE_DELAY,
+    id_block_size=CHAT_ID_BLOCK_SIZE,
+)
+
+
+@lru_cache(maxsize=4096)
+def get_username_hue(username: str) -> int:
+    hash_value = int(hashlib.md5(username.encode()).hexdigest(), 16)
+    return hash_value % 360
+
+
+def get_username_color(username: str) -> str:
+    return f"hsl({get_username_hue(username)}, 70%, 45%)"
+
+
+def hello_frame(protocol: Protocol = None, username: str | None = None) -> dict:
+    if not is_v2(protocol):
+        return {"type": "hello", "protocol": 1, "reconnect": RECONNECT_POLICY}
+    # v2 clients pick the own/other bubble themselves.
+    return {"type": "hello", "protocol": 2, "reconnect": RECONNECT_POLICY, "username": username}
+
+
+def to_epoch_ms(timestamp: datetime) -> int:
+    if timestamp.tzinfo is None:
+        timestamp = timestamp.replace(tzinfo=timezone.utc)
+    return int(timestamp.timestamp() * 1000)
+
+
+def format_timestamp(timestamp: str, timezone_name: str | None = None) -> str:
+    if not timestamp:
+        return ""
+
+    ts = timestamp.replace("Z", "+00:00")
+    dt_utc = datetime.fromisoformat(ts).replace(tzinfo=timezone.utc)
+
+    if timezone_name:
+        try:
+            dt_local = dt_utc.astimezone(ZoneInfo(timezone_name))
+            return humanize.naturaltime(dt_local)
+        except Exception:
+            pass
+
+    return humanize.naturaltime(dt_utc)
+
+
+def render_fragment(username: str, content: str, time_label: str, is_own: bool, show_header: bool = True) -> str:
+    return templates.get_template("message.html").render(
+        username=username,
+        content=content,
+        timestamp=time_label,
+        isOwnMessage=is_own,
+        show_header=show_header,
+        userColor=get_username_color(username)
+    )
+
+
+def render_message(message: Message | ChatRecord, is_own: bool, timezone_name: str | None = None) -> str:
+    """Rendered fragment for a stored message, shared through `message_fragments`."""
+    time_label = format_timestamp(message.timestamp.isoformat(), timezone_name)
+    return message_fragments.get_or_render(
+        (message.id, is_own, time_label),
+        lambda: render_fragment(message.username, message.content, time_label, is_own),
+    )
+
+
+def render_content(message: Message | ChatRecord) -> str:
+    return message_fragments.get_or_render(
+        (message.id, "content"),
+        lambda: parse_to_markdown(message.content),
+    )
+
+
+def message_record(message: Message | ChatRecord) -> dict:
+    """The v2 wire record; clients build the bubble from it."""
+    return {
+        "id": message.id,
+        "u": message.username,
+        "h": get_username_hue(message.username),
+        "t": to_epoch_ms(message.timestamp),
+        "c": render_content(message),
+    }
+
+
+def prime_message(message: Message | ChatRecord, timezone_name: str | None = None):
+    """Render both bubble variants of a freshly created message."""
+    for is_own in (True, False):
+        render_message(message, is_own, timezone_name)
+
+
+history_snapshots = HistorySnapshots(
+    render_message,
+    message_record,
+    limit=HISTORY_LIMIT,
+    max_bytes=CHAT_HISTORY_MAX_BYTES,
+    is_active=lambda room: room in manager.active_connections,
+)
+
+
+async def load_recent_messages(db: AsyncSession, room: str, limit: int = HISTORY_LIMIT,
+                               before: int | None = None) -> list[Message]:
+    """The newest `limit` messages of `room` (older than message `before`), oldest first.
+
+    A keyset page over the (room_slug, timestamp, id) index, so its cost does
+    not depend on how much history the room has.
+    """
+    query = select(Message).where(Message.room_slug == room)
+    if before is not None:
+        anchor = await db.scalar(
+            select(Message.timestamp).where(Message.id == before, Message.room_slug == room)
+        )
+        if anchor is None:
+            return []
+        query = query.where(tuple_(Message.timestamp, Message.id) < tuple_(anchor, before))
+    result = await db.execute(
+        query.order_by(Message.timestamp.desc(), Message.id.desc()).limit(limit)
+    )
+    return list(reversed(result.scalars().all()))
+
+
+async def read_recent_messages(room: str, limit: int = HISTORY_LIMIT,
+                               before: int | None = None) -> list[Message]:
+    """`load_recent_messages` on a read session held only for the query."""
+    async with read_session_maker() as db:
+        return await load_recent_messages(db, room, limit, before)
+
+
+async def history_frame(room: str, username: str | None,
+                        before: int | None = None, limit: int = HISTORY_LIMIT,
+                        last_id: int | None = None, protocol: Protocol = None) -> str | bytes:
+    """Newest messages from the room buffer (or the delta since `last_id`),
+    or an `older` page before message `before`.
+
+    Opens a database session only when the buffer cannot answer, so open
+    chat sockets do not pin pooled connections. Rooms owned by another shard
+    always read the database: this process never sees their broadcasts.
+    """
+    if before is None and limit == HISTORY_LIMIT and owns_room(room):
+        return await history_snapshots.frame(
+            room, username, lambda: read_recent_messages(room), last_id, protocol)
+    limit = max(1, min(limit, MAX_HISTORY_LIMIT))
+    messages = await read_recent_messages(room, limit, before)
+    return encode_items(
+        "history" if before is None else "older",
+        [encode_item(m, render_message, message_record) for m in messages],
+        messages[0].id if len(messages) == limit else None,
+        username,
+        protocol,
+    )
+
+
+def parse_control(text: str) -> dict | None:
+    """A JSON control frame sent over the chat socket, e.g. `{"type":"history","before":42}`."""
+    if not text.startswith('{"type"'):
+        return None
+    try:
+        control = json.loads(text)
+    except ValueError:
+        return None
+    return control if isinstance(control, dict) else None
+
+
+def record_message(message: Message | ChatRecord):
+    """Add a new message to its room's snapshot."""
+    history_snapshots.append(message.room_slug, message)
+
+
+def message_payload(message: Message | ChatRecord, html: str) -> dict:
+    return {
+        "type": "message",
+        "id": message.id,
+        "html": html,
+        "username": message.username,
+        "timestamp": message.timestamp.isoformat(),
+    }
+
+
+def message_variants(message: Message | ChatRecord) -> dict[Protocol, dict]:
+    frame = {"type": "message", "message": message_record(message)}
+    return {PROTOCOL_V2: frame, PROTOCOL_V2_MSGPACK: frame}
+
+
+def message_event(message: Message, sender: str | None = None) -> dict:
+    return {
+        "type": "message",
+        "sender": sender,
+        "message": {
+            "id": message.id,
+            "room_slug": message.room_slug,
+            "username": message.username,
+            "content": message.content,
+            "timestamp": message.timestamp.isoformat(),
+        },
+    }
+
+
+def message_from_event(event: dict) -> ChatRecord:
+    data = event["message"]
+    return ChatRecord(
+        id=data["id"],
+        room_slug=data["room_slug"],
+        username=data["username"],
+        content=data["content"],
+        timestamp=datetime.fromisoformat(data["timestamp"]),
+    )
+
+
+async def deliver_event(event: dict):
+    """Backplane handler: hand a message from any worker to this worker's sockets."""
+    if event.get("type") != "message":
+        return
+    message = message_from_event(event)
+    prime_message(message)
+    # Recorded when the broadcast goes out, so a client joining while it is
+    # held for a batch does not get it in both its history and the batch.
+    await room_coalescer.publish(
+        message_payload(message, render_message(message, False)),
+        message.room_slug,
+        exclude=event.get("sender"),
+        variants=message_variants(message),
+        on_send=lambda: record_message(message),
+    )
+
+
+backplane = create_backplane(CHAT_BACKPLANE, deliver_event, DATABASE_URL, CHAT_BROKER_SOCKET)
+
+
+async def publish_message(message: Message, sender: Connection, timezone_name: str | None = None):
+    """Echo the own-bubble variant to the sender and fan out to the room via the backplane.
+
+    The echo goes through the coalescer so that, in a hot room, it stays in
+    order with the other messages held for the same batch.
+    """
+    await room_coalescer.send(sender,
+                              message_payload(message, render_message(message, True, timezone_name)),
+                              variants=message_variants(message))
+    event = message_event(message, sender.id)
+    try:
+        await backplane.publish(event)
+    except Exception:
+        # The backplane reconnects on its own; meanwhile keep this worker's room working.
+        logger.warning("Backplane publish failed; delivering locally", exc_info=True)
+        await deliver_event(event)
@@ -0,0 +1,99 @@
+"""Room-sharded chat: every room is owned by one shard process.
+
+Rooms are independent, so a room's sockets, ring buffer and fan-out all
+live in the shard that owns it and no backplane is needed. Front workers
+proxy `/ws/chat` connections to the owner over its unix socket.
+"""
+import asyncio
+import logging
+import tempfile
+import zlib
+from pathlib import Path
+
+from fastapi import WebSocket
+from websockets.asyncio.client import unix_connect
+from websockets.exceptions import ConnectionClosed, InvalidHandshake
+
+from blog_chat.core.config import CHAT_SHARD_INDEX, CHAT_SHARD_SOCKET_DIR, CHAT_SHARDS
+
+logger = logging.getLogger(__name__)
+
+# Upstream unreachable: "try again later", like a slow-consumer close.
+SHARD_UNAVAILABLE_CLOSE_CODE = 1013
+FORWARDED_HEADERS = ("cookie", "user-agent", "origin")
+
+
+def shard_for(room: str, shards: int | None = None) -> int:
+    """Stable across processes and restarts (unlike `hash()`)."""
+    return zlib.crc32(room.encode()) % (shards or CHAT_SHARDS)
+
+
+def socket_dir() -> Path:
+    return Path(CHAT_SHARD_SOCKET_DIR or Path(tempfile.gettempdir()) / "blog-chat-shards")
+
+
+def shard_socket(index: int, directory: Path | None = None) -> Path:
+    return (directory or socket_dir()) / f"chat-{index}.sock"
+
+
+def owns_room(room: str) -> bool:
+    """True when this process should serve `room` itself."""
+    return CHAT_SHARDS <= 0 or CHAT_SHARD_INDEX == shard_for(room)
+
+
+def forwarded_headers(websocket: WebSocket) -> list[tuple[str, str]]:
+    headers = [(name, value) for name, value in websocket.headers.items() if name in FORWARDED_HEADERS]
+    if websocket.client:
+        forwarded = websocket.headers.get("x-forwarded-for")
+        host = websocket.client.host
+        headers.append(("x-forwarded-for", f"{forwarded}, {host}" if forwarded else host))
+    return headers
+
+
+async def proxy_websocket(websocket: WebSocket, socket_path: Path):
+    """Relay a client socket to a shard, keeping the negotiated subprotocol."""
+    path = websocket.url.path + (f"?{websocket.url.query}" if websocket.url.query else "")
+    offered = websocket.scope.get("subprotocols") or None
+    try:
+        upstream = await unix_connect(
+            str(socket_path), f"ws://chat-shard{path}",
+            additional_headers=forwarded_headers(websocket),
+            subprotocols=offered,
+            compression=None,
+        )
+    except (OSError, InvalidHandshake):
+        logger.warning("Chat shard at %s is unavailable", socket_path)
+        await websocket.close(code=SHARD_UNAVAILABLE_CLOSE_CODE)
+        return
+
+    async with upstream:
+        await websocket.accept(subprotocol=upstream.subprotocol)
+
+        async def client_to_shard():
+            while True:
+                message = await websocket.receive()
+                if message["type"] == "websocket.disconnect":
+                    return
+                data = message.get("text")
+                await upstream.send(data if data is not None else message["bytes"])
+
+        async def shard_to_client():
+            try:
+                async for data in upstream:
+                    if isinstance(data, bytes):
+                        await websocket.send_bytes(data)
+                    else:
+                        await websocket.send_text(data)
+            except ConnectionClosed:
+                pass
+            code = upstream.close_code
+            # 1005/1006 are reserved for "no status" and may not be sent.
+            await websocket.close(code=code if code and code not in (1005, 1006) else 1000)
+
+        tasks = [asyncio.create_task(client_to_shard()), asyncio.create_task(shard_to_client())]
+        try:
+            await asyncio.wait(tasks, return_when=asyncio.FIRST_COMPLETED)
+        finally:
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
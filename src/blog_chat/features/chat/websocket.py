@@ -1,24 +1,166 @@
-
-from collections.abc import Set
+import asyncio
+import logging
+import secrets
+from collections.abc import Mapping
 
 from fastapi import WebSocket
 
+from blog_chat.features.chat.protocol import Protocol, encode, encode_batch
+
+logger = logging.getLogger(__name__)
+
+SLOW_CONSUMER_POLICIES = ("drop_oldest", "disconnect")
+# "Try again later": the client fell too far behind and should reconnect.
+SLOW_CONSUMER_CLOSE_CODE = 1013
+
+
+Frame = dict | str | bytes
+# (message, exclude, variants, only): a broadcast to the room but connection
+# `exclude`, or, when `only` is set, a send to that one connection.
+Broadcast = tuple[Frame, str | None, Mapping[Protocol, Frame] | None, str | None]
+
+
+class Connection:
+    """One socket with a bounded outbound queue drained by its own writer task."""
+
+    __slots__ = ("id", "websocket", "room", "protocol", "queue", "writer", "dropped", "closing")
+
+    def __init__(self, websocket: WebSocket, room: str, queue_size: int, protocol: Protocol = None):
+        # Unique across workers, so backplane events can name their sender.
+        self.id = secrets.token_hex(8)
+        self.websocket = websocket
+        self.room = room
+        self.protocol = protocol
+        self.queue: asyncio.Queue[str | bytes] = asyncio.Queue(maxsize=queue_size)
+        self.writer: asyncio.Task | None = None
+        self.dropped = 0
+        self.closing = False
+
 
 class ConnectionManager:
-    def __init__(self):
-        self.active_connections: dict[str, Set[WebSocket]] = {}
+    def __init__(self, queue_size: int = 256, slow_consumer_policy: str = "drop_oldest"):
+        if slow_consumer_policy not in SLOW_CONSUMER_POLICIES:
+            raise ValueError(f"slow_consumer_policy must be one of: {', '.join(SLOW_CONSUMER_POLICIES)}")
+        self.queue_size = queue_size
+        self.slow_consumer_policy = slow_consumer_policy
+        self.active_connections: dict[str, dict[WebSocket, Connection]] = {}
+        self._closing: set[asyncio.Task] = set()
+
+    async def connect(self, websocket: WebSocket, room: str, protocol: Protocol = None) -> Connection:
+        await websocket.accept(subprotocol=protocol)
+        return self.register(websocket, room, protocol)
 
-    async def connect(self, websocket: WebSocket, room: str):
-        await websocket.accept()
-        if room not in self.active_connections:
-            self.active_connections[room] = set()
-        self.active_connections[room].add(websocket)
+    def register(self, websocket: WebSocket, room: str, protocol: Protocol = None) -> Connection:
+        connection = Connection(websocket, room, self.queue_size, protocol)
+        connection.writer = asyncio.create_task(self._write(connection))
+        self.active_connections.setdefault(room, {})[websocket] = connection
+        return connection
 
     def disconnect(self, websocket: WebSocket, room: str):
-        if room in self.active_connections:
-            self.active_connections[room].discard(websocket)
+        connections = self.active_connections.get(room)
+        if connections is None:
+            return
+        connection = connections.pop(websocket, None)
+        if not connections:
+            del self.active_connections[room]
+        if connection and connection.writer and connection.writer is not asyncio.current_task():
+            connection.writer.cancel()
+
+    async def _write(self, connection: Connection):
+        try:
+            while True:
+                frame = await connection.queue.get()
+                if isinstance(frame, bytes):
+                    await connection.websocket.send_bytes(frame)
+                else:
+                    await connection.websocket.send_text(frame)
+        except asyncio.CancelledError:
+            raise
+        except Exception:
+            logger.debug("Dropping failed socket in room %s", connection.room, exc_info=True)
+            self.disconnect(connection.websocket, connection.room)
+
+    async def _close_slow(self, connection: Connection):
+        self.disconnect(connection.websocket, connection.room)
+        try:
+            await connection.websocket.close(code=SLOW_CONSUMER_CLOSE_CODE)
+        except Exception:
+            pass
+
+    def _offer(self, connection: Connection, frame: str | bytes):
+        if connection.closing:
+            return
+        try:
+            connection.queue.put_nowait(frame)
+            return
+        except asyncio.QueueFull:
+            pass
+        if self.slow_consumer_policy == "disconnect":
+            connection.closing = True
+            task = asyncio.create_task(self._close_slow(connection))
+            self._closing.add(task)
+            task.add_done_callback(self._closing.discard)
+            return
+        connection.queue.get_nowait()
+        connection.dropped += 1
+        connection.queue.put_nowait(frame)
+
+    async def send(self, websocket: WebSocket, room: str, message: Frame,
+                   variants: Mapping[Protocol, Frame] | None = None):
+        """Queue `message` (or its variant for the socket's protocol) for one socket."""
+        connection = self.active_connections.get(room, {}).get(websocket)
+        if connection:
+            frame = variants.get(connection.protocol, message) if variants else message
+            self._offer(connection, encode(frame, connection.protocol))
+
+    async def broadcast(self, message: Frame, room: str, exclude: str | None = None,
+                        variants: Mapping[Protocol, Frame] | None = None):
+        """Queue `message` for everyone in `room` but connection `exclude`.
+
+        `variants` overrides the message per protocol version; each version is
+        encoded only once.
+        """
+        connections = self.active_connections.get(room)
+        if not connections:
+            return
+        frames: dict[Protocol, str | bytes] = {}
+        for connection in list(connections.values()):
+            if connection.id == exclude:
+                continue
+            frame = frames.get(connection.protocol)
+            if frame is None:
+                selected = variants.get(connection.protocol, message) if variants else message
+                frame = frames[connection.protocol] = encode(selected, connection.protocol)
+            self._offer(connection, frame)
+
+    async def broadcast_batch(self, entries: list[Broadcast], room: str):
+        """Queue several broadcasts to `room` as one `batch` frame per socket.
 
-    async def broadcast(self, message: dict, room: str):
-        if room in self.active_connections:
-            for connection in self.active_connections[room]:
-                await connection.send_json(message)
+        Sockets are grouped by protocol and by which entries they skip
+        (normally only the senders' own echoes and exclusions), so each
+        distinct batch is encoded once.
+        """
+        connections = self.active_connections.get(room)
+        if not connections:
+            return
+        frames: dict[tuple[Protocol, tuple[int, ...]], str | bytes | None] = {}
+        for connection in list(connections.values()):
+            skipped = tuple(
+                i for i, (_, exclude, _, only) in enumerate(entries)
+                if exclude == connection.id or (only is not None and only != connection.id)
+            )
+            key = (connection.protocol, skipped)
+            if key not in frames:
+                selected = [
+                    variants.get(connection.protocol, message) if variants else message
+                    for i, (message, _, variants, _) in enumerate(entries)
+                    if i not in skipped
+                ]
+                if not selected:
+                    frames[key] = None
+                elif len(selected) == 1:
+                    frames[key] = encode(selected[0], connection.protocol)
+                else:
+                    frames[key] = encode_batch(selected, connection.protocol)
+            if frames[key] is not None:
+                self._offer(connection, frames[key])
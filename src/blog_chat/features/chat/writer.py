@@ -0,0 +1,228 @@
+import asyncio
+import logging
+
+from sqlalchemy import func, insert, select, update
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from blog_chat.core.base import Base
+from blog_chat.features.chat.models import Message, MessageIdBlock
+
+logger = logging.getLogger(__name__)
+
+ID_BLOCK_ROW = 1
+FLUSH_RETRY_DELAY = 1.0
+FLUSH_RETRY_MAX_DELAY = 30.0
+
+
+async def reserve_id_block(session_maker: async_sessionmaker[AsyncSession], size: int) -> range:
+    """Atomically claim `size` message ids, shared safely across workers and hosts."""
+    while True:
+        async with session_maker() as session, session.begin():
+            end = await session.scalar(
+                update(MessageIdBlock)
+                .where(MessageIdBlock.id == ID_BLOCK_ROW)
+                .values(next_id=MessageIdBlock.next_id + size)
+                .returning(MessageIdBlock.next_id)
+            )
+            if end is not None:
+                return range(end - size, end)
+        try:
+            async with session_maker() as session, session.begin():
+                start = (await session.scalar(select(func.max(Message.id))) or 0) + 1
+                session.add(MessageIdBlock(id=ID_BLOCK_ROW, next_id=start + size))
+            return range(start, start + size)
+        except IntegrityError:
+            # Another worker seeded the row first; claim from it instead.
+            continue
+
+
+class MessageWriter:
+    """Write-behind persistence for chat messages.
+
+    `create` assigns the id and timestamp in the app and returns at once so
+    the message can be broadcast; a background task flushes queued rows in
+    multi-row INSERTs of up to `max_batch` rows, waiting at most `max_delay`
+    seconds to fill a batch. `stop` drains everything still queued.
+
+    Rows whose INSERT fails were already broadcast, so they are kept and
+    retried ahead of later rows with exponential backoff; only past
+    `max_retained` unwritten rows are the oldest given up.
+    """
+
+    def __init__(self, session_maker: async_sessionmaker[AsyncSession], max_batch: int = 500,
+                 max_delay: float = 0.05, id_block_size: int = 1000, max_retained: int = 10_000):
+        self.session_maker = session_maker
+        self.max_batch = max_batch
+        self.max_delay = max_delay
+        self.id_block_size = id_block_size
+        self.max_retained = max_retained
+        self._ids = iter(())
+        self._id_lock = asyncio.Lock()
+        self._queue: asyncio.Queue[dict | None] = asyncio.Queue()
+        self._task: asyncio.Task | None = None
+        self._failed: list[dict] = []
+        self._retry_delay = FLUSH_RETRY_DELAY
+        self._retry_at = 0.0
+
+    @property
+    def pending(self) -> int:
+        return self._queue.qsize() + len(self._failed)
+
+    async def start(self):
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self._task is None:
+            return
+        self._queue.put_nowait(None)
+        await self._task
+        self._task = None
+
+    async def _next_id(self) -> int:
+        async with self._id_lock:
+            next_id = next(self._ids, None)
+            if next_id is None:
+                self._ids = iter(await reserve_id_block(self.session_maker, self.id_block_size))
+                next_id = next(self._ids)
+            return next_id
+
+    async def create(self, room_slug: str, username: str, content: str,
+                     ip_address: str | None = None) -> Message:
+        row = {
+            "id": await self._next_id(),
+            "room_slug": room_slug,
+            "username": username,
+            "content": content,
+            "timestamp": Base.now(),
+            "ip_address": ip_address,
+        }
+        if self._task is None:
+            await self._flush([row])
+        else:
+            self._queue.put_nowait(row)
+        return Message(**row)
+
+    async def _run(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            # With failed rows waiting, wake up to retry them even if no new message arrives.
+            timeout = max(self._retry_at - loop.time(), 0) if self._failed else None
+            try:
+                row = await asyncio.wait_for(self._queue.get(), timeout)
+            except TimeoutError:
+                await self._write([])
+                continue
+            if row is None:
+                await self._write([], force=True)
+                self._report_lost()
+                return
+            batch = [row]
+            deadline = loop.time() + self.max_delay
+            stopping = False
+            while len(batch) < self.max_batch:
+                try:
+                    row = self._queue.get_nowait()
+                except asyncio.QueueEmpty:
+                    timeout = deadline - loop.time()
+                    if timeout <= 0:
+                        break
+                    try:
+                        row = await asyncio.wait_for(self._queue.get(), timeout)
+                    except TimeoutError:
+                        break
+                if row is None:
+                    stopping = True
+                    break
+                batch.append(row)
+            await self._write(batch)
+            if stopping:
+                await self._drain()
+                return
+
+    async def _drain(self):
+        rows = []
+        while not self._queue.empty():
+            row = self._queue.get_nowait()
+            if row is not None:
+                rows.append(row)
+        await self._write(rows, force=True)
+        if self._failed:
+            # One last attempt after a pause before giving up on shutdown.
+            await asyncio.sleep(FLUSH_RETRY_DELAY)
+            await self._write([], force=True)
+        self._report_lost()
+
+    def _report_lost(self):
+        if self._failed:
+            logger.error("Shutting down with %d chat messages unwritten", len(self._failed))
+
+    async def _write(self, batch: list[dict], force: bool = False):
+        """Write previously failed rows, then `batch`, in order.
+
+        While backing off after a failure, new rows only join the retry queue.
+        """
+        loop = asyncio.get_running_loop()
+        rows = self._failed + batch
+        if not rows:
+            return
+        if self._failed and not force and loop.time() < self._retry_at:
+            self._retain(rows)
+            return
+        rejected = []
+        for start in range(0, len(rows), self.max_batch):
+            try:
+                rejected += await self._flush(rows[start:start + self.max_batch])
+            except Exception:
+                logger.exception("Failed to write %d chat messages; retrying in %.1fs",
+                                 len(rows) - start, self._retry_delay)
+                self._retain(rejected + rows[start:])
+                self._back_off()
+                return
+        self._failed = []
+        if rejected:
+            # Constraint violations may be transient (e.g. a row they reference
+            # not yet committed); keep them without holding up later rows.
+            self._retain(rejected)
+            self._back_off()
+        else:
+            self._retry_delay = FLUSH_RETRY_DELAY
+
+    def _back_off(self):
+        self._retry_at = asyncio.get_running_loop().time() + self._retry_delay
+        self._retry_delay = min(self._retry_delay * 2, FLUSH_RETRY_MAX_DELAY)
+
+    def _retain(self, rows: list[dict]):
+        overflow = len(rows) - self.max_retained
+        if overflow > 0:
+            logger.error("Dropped %d unwritten chat messages over the retry limit", overflow)
+            rows = rows[overflow:]
+        self._failed = rows
+
+    async def _flush(self, batch: list[dict]) -> list[dict]:
+        """Insert `batch`, returning the rows a constraint rejected.
+
+        A row whose id is already stored counts as written. A single row that
+        is rejected for any other reason raises.
+        """
+        try:
+            async with self.session_maker() as session, session.begin():
+                await session.execute(insert(Message), batch)
+        except IntegrityError as error:
+            if len(batch) > 1:
+                # Isolate the offending rows so the rest are not blocked forever.
+                rejected = []
+                for row in batch:
+                    try:
+                        await self._flush([row])
+                    except IntegrityError:
+                        rejected.append(row)
+                return rejected
+            async with self.session_maker() as session:
+                exists = await session.scalar(select(Message.id).where(Message.id == batch[0]["id"]))
+            if exists is None:
+                logger.warning("Chat message %s rejected by the database: %s", batch[0]["id"], error.orig)
+                raise
+            # Already written by an attempt whose commit we never saw acknowledged.
+        return []
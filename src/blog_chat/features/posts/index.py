@@ -0,0 +1,280 @@
+
+import hashlib
+import logging
+import threading
+import time
+from collections import OrderedDict
+from collections.abc import Callable
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from pathlib import Path
+
+import powerwalk
+import yaml
+
+from blog_chat.core.conditional import to_datetime
+from blog_chat.features.posts.parser import PostMeta, parse_markdown_file, parse_markdown_meta
+
+logger = logging.getLogger(__name__)
+
+# What a malformed post can raise while being parsed; one bad file is skipped
+# rather than failing the whole scan.
+LOAD_ERRORS = (OSError, UnicodeDecodeError, yaml.YAMLError, TypeError, ValueError)
+
+
+@dataclass(slots=True)
+class PostEntry:
+    path: Path
+    mtime_ns: int
+    size: int
+    meta: PostMeta
+    digest: str
+    last_modified: datetime
+
+    @property
+    def slug(self) -> str:
+        return self.meta.slug
+
+    @property
+    def file_modified(self) -> datetime:
+        """When the file itself last changed; frontmatter dates miss body edits."""
+        return datetime.fromtimestamp(self.mtime_ns / 1e9, timezone.utc)
+
+    def load(self) -> dict | None:
+        """Parse the full post, body included."""
+        return parse_markdown_file(self.path)
+
+
+@dataclass(slots=True, frozen=True)
+class _Snapshot:
+    by_slug: dict[str, PostEntry]
+    listing: list[PostMeta]
+    positions: dict[str, int]
+    digest: str = ""
+    last_modified: datetime | None = None
+
+
+def _stat(path: Path) -> tuple[int, int] | None:
+    try:
+        stat = path.stat()
+    except OSError:
+        return None
+    return stat.st_mtime_ns, stat.st_size
+
+
+def _file_digest(path: Path) -> str:
+    with path.open("rb") as handle:
+        return hashlib.file_digest(handle, "sha256").hexdigest()
+
+
+def _sort_key(meta: PostMeta) -> str:
+    return str(meta.created or "")
+
+
+class PostIndex:
+    """Process-wide slug -> post index over the markdown files in a directory.
+
+    Only each file's frontmatter is kept (as a PostMeta) so listings never
+    hold post bodies; full posts are parsed on demand into a small LRU. The
+    directory is re-walked at most once every `rescan_interval` seconds and
+    only files whose mtime or size changed are read again. When `watched` is
+    set, a ContentWatcher keeps the index current and lookups skip the
+    filesystem entirely.
+    """
+
+    def __init__(self, content_dir: Path, rescan_interval: float = 1.0, max_loaded_posts: int = 256):
+        self.content_dir = Path(content_dir).resolve()
+        self.rescan_interval = rescan_interval
+        self.max_loaded_posts = max_loaded_posts
+        self.watched = False
+        self.version = 0
+        self._entries: dict[Path, PostEntry] = {}
+        # (mtime_ns, size) of files that failed to parse, retried once they change.
+        self._failed: dict[Path, tuple[int, int]] = {}
+        self._snapshot = _Snapshot({}, [], {})
+        self._loaded: OrderedDict[Path, tuple[PostEntry, dict]] = OrderedDict()
+        self._scanned_at: float | None = None
+        self._listeners: list[Callable[[list[PostEntry], list[PostEntry]], None]] = []
+        self._lock = threading.RLock()
+
+    def subscribe(self, listener: Callable[[list[PostEntry], list[PostEntry]], None]):
+        """Call `listener(added, removed)` whenever the index changes.
+
+        A modified post is reported as removed (old entry) and added (new
+        entry). Entries already in the index are replayed as added.
+        """
+        with self._lock:
+            self._listeners.append(listener)
+            if self._snapshot.by_slug:
+                listener(list(self._snapshot.by_slug.values()), [])
+
+    def get_posts(self) -> list[PostMeta]:
+        self._maybe_rescan()
+        return list(self._snapshot.listing)
+
+    def get_page(self, after: str | None = None, limit: int = 20) -> tuple[list[PostMeta], str | None]:
+        """Return up to `limit` posts following the `after` slug and the next cursor.
+
+        An unknown cursor yields an empty page rather than restarting the listing.
+        """
+        self._maybe_rescan()
+        snapshot = self._snapshot
+        if after is None:
+            start = 0
+        elif after in snapshot.positions:
+            start = snapshot.positions[after] + 1
+        else:
+            return [], None
+        page = snapshot.listing[start:start + limit]
+        has_more = start + limit < len(snapshot.listing)
+        return page, page[-1].slug if page and has_more else None
+
+    def get_entries(self) -> list[PostEntry]:
+        """All entries in listing order, without revalidating each file."""
+        self._maybe_rescan()
+        snapshot = self._snapshot
+        return [snapshot.by_slug[meta.slug] for meta in snapshot.listing]
+
+    def get_entry(self, slug: str) -> PostEntry | None:
+        self._maybe_rescan()
+        entry = self._snapshot.by_slug.get(slug)
+        if entry is None:
+            return None
+        if not self.watched and _stat(entry.path) != (entry.mtime_ns, entry.size):
+            self.reload([entry.path])
+            entry = self._snapshot.by_slug.get(slug)
+        return entry
+
+    def get_post(self, slug: str) -> dict | None:
+        entry = self.get_entry(slug)
+        if entry is None:
+            return None
+        with self._lock:
+            cached = self._loaded.get(entry.path)
+            if cached is not None and cached[0] is entry:
+                self._loaded.move_to_end(entry.path)
+                return cached[1]
+        try:
+            post = entry.load()
+        except LOAD_ERRORS:
+            logger.warning("Could not load post %s", entry.path, exc_info=True)
+            return None
+        with self._lock:
+            self._loaded[entry.path] = (entry, post)
+            while len(self._loaded) > self.max_loaded_posts:
+                self._loaded.popitem(last=False)
+        return post
+
+    @property
+    def digest(self) -> str:
+        """Content hash of the whole listing, stable across processes."""
+        self._maybe_rescan()
+        return self._snapshot.digest
+
+    @property
+    def last_modified(self) -> datetime | None:
+        self._maybe_rescan()
+        return self._snapshot.last_modified
+
+    def refresh(self) -> bool:
+        """Re-walk the content directory, reading only new or changed files."""
+        paths = [Path(entry.path) for entry in powerwalk.walk(
+            self.content_dir, filter="**/*.md")]
+        with self._lock:
+            self._scanned_at = time.monotonic()
+            entries: dict[Path, PostEntry] = {}
+            changed = False
+            for path in paths:
+                entry = self._load(path, self._entries.get(path))
+                if entry is None:
+                    continue
+                changed = changed or entry is not self._entries.get(path)
+                entries[path] = entry
+            # A file that keeps failing to load is not a change; only indexed
+            # entries that were dropped are.
+            changed = changed or entries.keys() != self._entries.keys()
+            seen = set(paths)
+            for path in [path for path in self._failed if path not in seen]:
+                del self._failed[path]
+            if changed:
+                self._swap(entries)
+            return changed
+
+    def reload(self, paths) -> bool:
+        """Re-read the given files only, dropping the ones that disappeared."""
+        with self._lock:
+            entries = dict(self._entries)
+            changed = False
+            for path in map(Path, paths):
+                previous = entries.pop(path, None)
+                entry = self._load(path, previous)
+                if entry is not None:
+                    entries[path] = entry
+                changed = changed or entry is not previous
+            if changed:
+                self._swap(entries)
+            return changed
+
+    def ensure_fresh(self):
+        """Rescan the directory if the rescan interval has elapsed."""
+        self._maybe_rescan()
+
+    def _maybe_rescan(self):
+        scanned_at = self._scanned_at
+        if scanned_at is None:
+            self.refresh()
+        elif not self.watched and time.monotonic() - scanned_at >= self.rescan_interval:
+            self.refresh()
+
+    def _load(self, path: Path, previous: PostEntry | None) -> PostEntry | None:
+        stat = _stat(path)
+        if stat is None:
+            self._failed.pop(path, None)
+            return None
+        if previous is not None and (previous.mtime_ns, previous.size) == stat:
+            return previous
+        if self._failed.get(path) == stat:
+            return None
+        try:
+            meta = parse_markdown_meta(path)
+            digest = _file_digest(path)
+        except LOAD_ERRORS:
+            logger.warning("Skipping unreadable post %s", path, exc_info=True)
+            self._failed[path] = stat
+            return None
+        self._failed.pop(path, None)
+        last_modified = (
+            to_datetime(meta.updated)
+            or to_datetime(meta.created)
+            or datetime.fromtimestamp(stat[0] / 1e9, timezone.utc)
+        )
+        return PostEntry(path=path, mtime_ns=stat[0], size=stat[1], meta=meta,
+                         digest=digest, last_modified=last_modified)
+
+    def _swap(self, entries: dict[Path, PostEntry]):
+        by_slug: dict[str, PostEntry] = {}
+        for path in sorted(entries):
+            by_slug.setdefault(entries[path].slug, entries[path])
+        listing = sorted((entry.meta for entry in by_slug.values()),
+                         key=_sort_key, reverse=True)
+        digest = hashlib.sha256()
+        for slug in sorted(by_slug):
+            digest.update(by_slug[slug].digest.encode())
+        last_modified = max((entry.last_modified for entry in by_slug.values()), default=None)
+        previous = self._snapshot.by_slug
+        self._entries = entries
+        positions = {meta.slug: position for position, meta in enumerate(listing)}
+        self._snapshot = _Snapshot(by_slug, listing, positions, digest.hexdigest(), last_modified)
+        self.version += 1
+
+        for path in [path for path in self._loaded if path not in entries]:
+            del self._loaded[path]
+
+        if self._listeners:
+            current_ids = {id(entry) for entry in by_slug.values()}
+            previous_ids = {id(entry) for entry in previous.values()}
+            added = [entry for entry in by_slug.values() if id(entry) not in previous_ids]
+            removed = [entry for entry in previous.values() if id(entry) not in current_ids]
+            if added or removed:
+                for listener in self._listeners:
+                    listener(added, removed)
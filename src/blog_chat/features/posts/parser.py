@@ -1,8 +1,34 @@
 
 import re
 import yaml
+from dataclasses import dataclass
 from pathlib import Path
 
+FRONTMATTER_DELIMITER = "---\n"
+
+
+@dataclass(slots=True, frozen=True)
+class PostMeta:
+    title: str
+    slug: str
+    tags: tuple
+    created: object = ""
+    updated: object = ""
+    description: str | None = None
+
+
+def _post_fields(frontmatter: dict, file_path: Path) -> dict:
+    if not isinstance(frontmatter, dict):
+        raise ValueError(f"{file_path}: frontmatter is not a mapping")
+    return {
+        "title": frontmatter.get("title", file_path.stem),
+        "slug": frontmatter.get("slug", file_path.stem),
+        "tags": frontmatter.get("tags", []),
+        "created": frontmatter.get("created", ""),
+        "updated": frontmatter.get("updated", ""),
+        "description": frontmatter.get("description", None),
+    }
+
 
 def parse_markdown_file(file_path: Path) -> dict | None:
     content = file_path.read_text(encoding="utf-8")
@@ -17,11 +43,30 @@ def parse_markdown_file(file_path: Path) -> dict | None:
         body = content
 
     return {
-        "title": frontmatter.get("title", file_path.stem),
-        "slug": frontmatter.get("slug", file_path.stem),
-        "tags": frontmatter.get("tags", []),
-        "created": frontmatter.get("created", ""),
-        "updated": frontmatter.get("updated", ""),
-        "description": frontmatter.get("description", None),
+        **_post_fields(frontmatter or {}, file_path),
         "content": body.strip(),
     }
+
+
+def read_frontmatter(file_path: Path) -> str | None:
+    """Read only the leading `---` block, stopping at its closing delimiter."""
+    # Universal newlines, like `read_text` in the full parser, so CRLF files
+    # yield the same frontmatter in both.
+    with file_path.open(encoding="utf-8") as handle:
+        if handle.readline() != FRONTMATTER_DELIMITER:
+            return None
+        lines = []
+        for line in handle:
+            if line == FRONTMATTER_DELIMITER:
+                return "".join(lines)
+            lines.append(line)
+    return None
+
+
+def parse_markdown_meta(file_path: Path) -> PostMeta:
+    raw = read_frontmatter(file_path)
+    frontmatter = (yaml.safe_load(raw) if raw else None) or {}
+    fields = _post_fields(frontmatter, file_path)
+    tags = fields["tags"] or ()
+    fields["tags"] = (tags,) if isinstance(tags, str) else tuple(tags)
+    return PostMeta(**fields)
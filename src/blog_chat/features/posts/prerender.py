@@ -0,0 +1,50 @@
+
+from datetime import datetime, timezone
+from pathlib import Path
+
+from fastapi import Request, Response
+from fastapi.responses import FileResponse
+
+from blog_chat.core.conditional import is_not_modified, make_etag, not_modified, validator_headers
+from blog_chat.core.responses import accepts_encoding
+
+INDEX_ARTIFACT = "index.html"
+SITEMAP_ARTIFACT = "sitemap.xml"
+ROBOTS_ARTIFACT = "robots.txt"
+
+
+def post_artifact(slug: str) -> str:
+    # Own folder, so a slug like `index` can't collide with a site artifact.
+    return f"posts/{slug}.html"
+
+
+class PrerenderedSite:
+    """Serves artifacts written by `python -m blog_chat.export`."""
+
+    def __init__(self, directory: Path | str):
+        self.directory = Path(directory).resolve()
+
+    def response(self, request: Request, name: str, media_type: str) -> Response | None:
+        path = (self.directory / name).resolve()
+        if not path.is_relative_to(self.directory):
+            return None
+
+        headers = {}
+        gzipped = path.with_name(path.name + ".gz")
+        if accepts_encoding(request, "gzip") and gzipped.is_file():
+            path = gzipped
+            headers["Content-Encoding"] = "gzip"
+        elif not path.is_file():
+            return None
+
+        stat = path.stat()
+        last_modified = datetime.fromtimestamp(stat.st_mtime, timezone.utc)
+        headers.update(validator_headers(
+            make_etag(path.name, stat.st_mtime_ns, stat.st_size),
+            last_modified,
+            vary="Accept-Encoding, Cookie",
+        ))
+        if is_not_modified(request, headers["ETag"], last_modified):
+            headers.pop("Content-Encoding", None)
+            return not_modified(headers, request)
+        return FileResponse(path, media_type=media_type, headers=headers, stat_result=stat)
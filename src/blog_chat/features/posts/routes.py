@@ -1,27 +1,66 @@
-from pathlib import Path
-from datetime import datetime
+from datetime import datetime, timezone
 
 from fastapi import APIRouter, Request
 from fastapi.responses import PlainTextResponse, Response
 
-from blog_chat.core.filters import add_markdown_filter
-from blog_chat.core.responses import create_templates
-from blog_chat.core.config import SITE_URL
+from blog_chat.core.conditional import (
+    directory_fingerprint,
+    is_not_modified,
+    make_etag,
+    not_modified,
+    validator_headers,
+)
+from blog_chat.core.response_cache import ResponseCache
+from blog_chat.core.filters import markdown_config_key
+from blog_chat.core.responses import accepts_encoding, stream_template
+from blog_chat.core.templates import TEMPLATE_DIRS, templates
+from blog_chat.core.config import (
+    POSTS_PAGE_SIZE,
+    PRERENDERED_DIR,
+    RESPONSE_CACHE_BYTES,
+    SITE_URL,
+    STREAM_PAGES,
+)
 from blog_chat.features.accounts.services import get_username_from_cookie
-from blog_chat.features.posts.services import get_post, get_posts
+from blog_chat.features.posts.parser import PostMeta
+from blog_chat.features.posts.prerender import (
+    INDEX_ARTIFACT,
+    ROBOTS_ARTIFACT,
+    SITEMAP_ARTIFACT,
+    PrerenderedSite,
+    post_artifact,
+)
+from blog_chat.features.posts.services import (
+    get_posts_page,
+    post_index,
+    search_posts,
+    sitemap_cache,
+)
+from blog_chat.features.posts.sitemap import part_name
 
 router = APIRouter()
 
-posts_template_dirs = [
-    Path("src/blog_chat/features/posts/templates"),
-    Path("src/blog_chat/features/chat/templates"),
-]
-templates = create_templates(posts_template_dirs)
-add_markdown_filter(templates)
+MAX_QUERY_LENGTH = 200
 
+prerendered = PrerenderedSite(PRERENDERED_DIR) if PRERENDERED_DIR else None
 
-@router.get("/robots.txt", response_class=PlainTextResponse)
-def robots():
+template_version = make_etag(directory_fingerprint(TEMPLATE_DIRS), markdown_config_key())
+# Templates, markdown settings and code only change across restarts, so no
+# page rendered by this process is older than this.
+rendered_since = datetime.now(timezone.utc)
+
+response_cache = ResponseCache(RESPONSE_CACHE_BYTES)
+
+
+def invalidate_pages(added, removed):
+    changed = {entry.slug for entry in [*added, *removed]}
+    response_cache.invalidate(lambda key: key[0] != "post" or key[1] in changed)
+
+
+post_index.subscribe(invalidate_pages)
+
+
+def render_robots() -> str:
     return f"""User-agent: *
 Allow: /
 
@@ -29,54 +68,173 @@ Sitemap: {SITE_URL}/sitemap.xml
 """
 
 
+def index_context(request: Request, posts: list[PostMeta], username: str | None,
+                  next_cursor: str | None = None) -> dict:
+    return {"request": request, "posts": posts, "next_cursor": next_cursor,
+            "room": "offtopic", "username": username}
+
+
+def post_context(request: Request, post: dict, username: str | None) -> dict:
+    # From SITE_URL, not the request: cached pages are shared across hosts.
+    return {"request": request, "post": post, "room": post["slug"], "username": username,
+            "canonical_url": f"{SITE_URL.rstrip('/')}/{post['slug']}"}
+
+
+def page_headers(username: str | None, last_modified, *parts) -> dict[str, str]:
+    etag = make_etag(template_version, username or "", *parts)
+    return validator_headers(etag, last_modified, vary="Cookie")
+
+
+def cached_page(request: Request, key: tuple, headers: dict[str, str]) -> Response | None:
+    """Serve a page from the response cache if its ETag is still current.
+
+    `key` is (route, slug, username) so anonymous and per-user pages never mix.
+    """
+    cached = response_cache.get(key)
+    if cached is None or cached.headers.get("ETag") != headers["ETag"]:
+        return None
+    return response_cache.respond(request, cached)
+
+
+def render_page(request: Request, key: tuple, headers: dict[str, str], name: str, context: dict) -> Response:
+    html = templates.get_template(name).render(context)
+    cached = response_cache.put(key, html.encode("utf-8"), headers=headers)
+    return response_cache.respond(request, cached)
+
+
+def serve_prerendered(request: Request, name: str, media_type: str = "text/html"):
+    if prerendered is None:
+        return None
+    return prerendered.response(request, name, media_type)
+
+
+@router.get("/robots.txt", response_class=PlainTextResponse)
+def robots(request: Request):
+    cached = serve_prerendered(request, ROBOTS_ARTIFACT, "text/plain")
+    if cached:
+        return cached
+    headers = validator_headers(make_etag("robots", SITE_URL))
+    if is_not_modified(request, headers["ETag"]):
+        return not_modified(headers, request)
+    return PlainTextResponse(render_robots(), headers=headers)
+
+
+def sitemap_response(request: Request, name: str) -> Response:
+    cached = serve_prerendered(request, name, "application/xml")
+    if cached:
+        return cached
+    sitemap_file = sitemap_cache.get(name)
+    if sitemap_file is None:
+        return Response(status_code=404)
+
+    # Like listings, the newest post date misses deletions and back-dated
+    # posts, so the sitemap revalidates by ETag only.
+    if accepts_encoding(request, "gzip"):
+        headers = validator_headers(sitemap_file.gzipped_etag, vary="Accept-Encoding")
+        body = sitemap_file.gzipped
+    else:
+        headers = validator_headers(sitemap_file.etag, vary="Accept-Encoding")
+        body = sitemap_file.body
+    if is_not_modified(request, headers["ETag"]):
+        return not_modified(headers, request)
+    if body is sitemap_file.gzipped:
+        headers["Content-Encoding"] = "gzip"
+    return Response(content=body, media_type="application/xml", headers=headers)
+
+
 @router.get("/sitemap.xml", response_class=Response)
 def sitemap(request: Request):
-    posts = get_posts()
-    urls = []
-    for post in posts:
-        date = post.get("updated") or post.get(
-            "created") or datetime.now().isoformat()
-        urls.append(f"""  <url>
-    <loc>{SITE_URL}/{post['slug']}</loc>
-    <lastmod>{date}</lastmod>
-    <changefreq>weekly</changefreq>
-    <priority>0.8</priority>
-  </url>""")
-
-    sitemap_xml = f"""<?xml version="1.0" encoding="UTF-8"?>
-<urlset xmlns="http://www.sitemaps.org/schemas/sitemap/0.9">
-  <url>
-    <loc>{SITE_URL}/</loc>
-    <changefreq>daily</changefreq>
-    <priority>1.0</priority>
-  </url>
-{chr(10).join(urls)}
-</urlset>"""
-    return Response(content=sitemap_xml, media_type="application/xml")
+    return sitemap_response(request, SITEMAP_ARTIFACT)
+
+
+@router.get("/sitemap-{number:int}.xml", response_class=Response)
+def sitemap_part(request: Request, number: int):
+    return sitemap_response(request, part_name(number))
+
+
+@router.get("/search")
+def search(request: Request, q: str = ""):
+    username = get_username_from_cookie(request)
+    query = q.strip()[:MAX_QUERY_LENGTH]
+    context = {"request": request, "query": query,
+               "results": search_posts(query) if query else [],
+               "room": "offtopic", "username": username}
+    if request.headers.get("HX-Request"):
+        return templates.TemplateResponse("search_results.html", context)
+    return templates.TemplateResponse("search.html", context)
+
+
+@router.get("/posts/more")
+def read_more(request: Request, after: str):
+    if post_index.get_entry(after) is None:
+        return Response(status_code=404)
+    # Listings have no trustworthy modification date (deletions, back-dated
+    # posts), so they revalidate by ETag only.
+    headers = page_headers(None, None, "more", after, post_index.digest)
+    if is_not_modified(request, headers["ETag"]):
+        return not_modified(headers, request)
+    key = ("more", after, None)
+    cached = cached_page(request, key, headers)
+    if cached:
+        return cached
+    posts, next_cursor = get_posts_page(after, POSTS_PAGE_SIZE)
+    return render_page(request, key, headers, "post_list_items.html",
+                       {"request": request, "posts": posts, "next_cursor": next_cursor})
 
 
 @router.get("/")
-def read_root(request: Request):
-    posts = get_posts()
+def read_root(request: Request, after: str | None = None):
     username = get_username_from_cookie(request)
-    return templates.TemplateResponse(
-        "index.html", {"request": request, "posts": posts,
-                       "room": "offtopic", "username": username}
-    )
+    if not username and after is None:
+        cached = serve_prerendered(request, INDEX_ARTIFACT)
+        if cached:
+            return cached
+    if after is not None and post_index.get_entry(after) is None:
+        return not_found_page(request, username, "Page not found")
+    headers = page_headers(username, None, "index", after or "", post_index.digest)
+    if is_not_modified(request, headers["ETag"]):
+        return not_modified(headers, request)
+    key = ("index", after, username)
+    cached = None if STREAM_PAGES else cached_page(request, key, headers)
+    if cached:
+        return cached
+    posts, next_cursor = get_posts_page(after, POSTS_PAGE_SIZE)
+    context = index_context(request, posts, username, next_cursor)
+    if STREAM_PAGES:
+        return stream_template(templates, "index.html", context, headers=headers)
+    return render_page(request, key, headers, "index.html", context)
 
 
 @router.get("/{slug:path}")
 def read_item(request: Request, slug: str):
-    post = get_post(slug)
     username = get_username_from_cookie(request)
+    if not username:
+        cached = serve_prerendered(request, post_artifact(slug))
+        if cached:
+            return cached
+    entry = post_index.get_entry(slug)
+    post = None
+    if entry:
+        last_modified = max(entry.file_modified, rendered_since)
+        headers = page_headers(username, last_modified, "post", slug, entry.digest)
+        if is_not_modified(request, headers["ETag"], last_modified):
+            return not_modified(headers, request)
+        key = ("post", slug, username)
+        cached = cached_page(request, key, headers)
+        if cached:
+            return cached
+        post = post_index.get_post(slug)
     if not post:
-        return templates.TemplateResponse(
-            "index.html",
-            {"request": request, "posts": get_posts(), "error": "Post not found",
-             "username": username},
-            status_code=404,
-        )
+        return not_found_page(request, username, "Post not found")
+    return render_page(request, key, headers, "post.html",
+                       post_context(request, post, username))
+
+
+def not_found_page(request: Request, username: str | None, error: str) -> Response:
+    """The first index page with `error`, served as a 404."""
+    posts, next_cursor = get_posts_page(limit=POSTS_PAGE_SIZE)
     return templates.TemplateResponse(
-        "post.html", {"request": request, "post": post,
-                      "room": slug, "username": username}
+        "index.html",
+        {**index_context(request, posts, username, next_cursor), "error": error},
+        status_code=404,
     )
@@ -0,0 +1,207 @@
+
+import heapq
+import json
+import math
+import os
+import re
+import threading
+import zlib
+from collections import Counter
+from dataclasses import dataclass
+from pathlib import Path
+
+TOKEN_RE = re.compile(r"\w+", re.UNICODE)
+
+FIELD_WEIGHTS = {
+    "title": 3.0,
+    "tags": 2.0,
+    "description": 1.5,
+    "content": 1.0,
+}
+
+FORMAT_VERSION = 1
+
+
+def tokenize(text: str) -> list[str]:
+    return TOKEN_RE.findall(text.lower())
+
+
+def _field_text(post: dict, field: str) -> str:
+    value = post.get(field) or ""
+    if isinstance(value, (list, tuple)):
+        return " ".join(map(str, value))
+    return str(value)
+
+
+@dataclass(slots=True)
+class _Document:
+    slug: str
+    title: str
+    description: str | None
+    digest: str
+    length: float
+    terms: list[str]
+
+
+@dataclass(slots=True)
+class SearchHit:
+    slug: str
+    title: str
+    description: str | None
+    score: float
+
+
+class SearchIndex:
+    """Inverted index over posts ranked with BM25 (field-weighted term counts).
+
+    Documents are keyed by slug and carry the content digest they were built
+    from, so reloading a saved index only re-tokenizes posts that changed.
+    """
+
+    def __init__(self, k1: float = 1.2, b: float = 0.75):
+        self.k1 = k1
+        self.b = b
+        self._postings: dict[str, dict[int, float]] = {}
+        self._doc_ids: dict[str, int] = {}
+        self._docs: dict[int, _Document] = {}
+        self._total_length = 0.0
+        self._next_id = 0
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._docs)
+
+    def add(self, slug: str, post: dict, digest: str = ""):
+        weighted: Counter[str] = Counter()
+        for field, weight in FIELD_WEIGHTS.items():
+            for token in tokenize(_field_text(post, field)):
+                weighted[token] += weight
+        length = sum(weighted.values())
+
+        with self._lock:
+            self._remove(slug)
+            doc_id = self._next_id
+            self._next_id += 1
+            self._doc_ids[slug] = doc_id
+            self._docs[doc_id] = _Document(
+                slug=slug,
+                title=str(post.get("title") or slug),
+                description=post.get("description"),
+                digest=digest,
+                length=length,
+                terms=list(weighted),
+            )
+            self._total_length += length
+            for term, frequency in weighted.items():
+                self._postings.setdefault(term, {})[doc_id] = frequency
+
+    def remove(self, slug: str):
+        with self._lock:
+            self._remove(slug)
+
+    def digest(self, slug: str) -> str | None:
+        doc_id = self._doc_ids.get(slug)
+        return None if doc_id is None else self._docs[doc_id].digest
+
+    def apply(self, added, removed):
+        """PostIndex listener: keep the search index in step with content."""
+        added_slugs = {entry.slug for entry in added}
+        for entry in removed:
+            if entry.slug not in added_slugs:
+                self.remove(entry.slug)
+        for entry in added:
+            if self.digest(entry.slug) != entry.digest:
+                try:
+                    post = entry.load()
+                except (OSError, UnicodeDecodeError):
+                    continue
+                self.add(entry.slug, post, entry.digest)
+
+    def retain(self, slugs):
+        """Drop every document whose slug is not in `slugs`."""
+        keep = set(slugs)
+        for slug in [slug for slug in self._doc_ids if slug not in keep]:
+            self.remove(slug)
+
+    def search(self, query: str, limit: int = 10) -> list[SearchHit]:
+        terms = set(tokenize(query))
+        if not terms:
+            return []
+
+        with self._lock:
+            count = len(self._docs)
+            if not count:
+                return []
+            average_length = self._total_length / count or 1.0
+            scores: dict[int, float] = {}
+            for term in terms:
+                postings = self._postings.get(term)
+                if not postings:
+                    continue
+                idf = math.log(1 + (count - len(postings) + 0.5) / (len(postings) + 0.5))
+                for doc_id, frequency in postings.items():
+                    norm = self.k1 * (1 - self.b + self.b * self._docs[doc_id].length / average_length)
+                    scores[doc_id] = scores.get(doc_id, 0.0) + idf * frequency * (self.k1 + 1) / (frequency + norm)
+
+            best = heapq.nlargest(limit, scores.items(), key=lambda item: item[1])
+            hits = []
+            for doc_id, score in best:
+                doc = self._docs[doc_id]
+                hits.append(SearchHit(doc.slug, doc.title, doc.description, score))
+            return hits
+
+    def dumps(self) -> bytes:
+        with self._lock:
+            data = {
+                "version": FORMAT_VERSION,
+                "docs": [[doc_id, doc.slug, doc.title, doc.description, doc.digest, doc.length]
+                         for doc_id, doc in self._docs.items()],
+                "postings": {term: [list(postings), list(postings.values())]
+                             for term, postings in self._postings.items()},
+            }
+        return zlib.compress(json.dumps(data, separators=(",", ":"), default=str).encode(), 1)
+
+    def loads(self, raw: bytes):
+        data = json.loads(zlib.decompress(raw))
+        if data.get("version") != FORMAT_VERSION:
+            raise ValueError("Unsupported search index format")
+        docs = {doc_id: _Document(slug, title, description, digest, length, [])
+                for doc_id, slug, title, description, digest, length in data["docs"]}
+        postings: dict[str, dict[int, float]] = {}
+        for term, (doc_ids, frequencies) in data["postings"].items():
+            postings[term] = dict(zip(doc_ids, frequencies))
+            for doc_id in doc_ids:
+                docs[doc_id].terms.append(term)
+        with self._lock:
+            self._docs = docs
+            self._postings = postings
+            self._doc_ids = {doc.slug: doc_id for doc_id, doc in docs.items()}
+            self._total_length = sum(doc.length for doc in docs.values())
+            self._next_id = max(docs, default=-1) + 1
+
+    def save(self, path: Path | str):
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = path.with_suffix(path.suffix + ".tmp")
+        tmp_path.write_bytes(self.dumps())
+        os.replace(tmp_path, path)
+
+    def load(self, path: Path | str) -> bool:
+        try:
+            self.loads(Path(path).read_bytes())
+        except (OSError, ValueError, zlib.error):
+            return False
+        return True
+
+    def _remove(self, slug: str):
+        doc_id = self._doc_ids.pop(slug, None)
+        if doc_id is None:
+            return
+        doc = self._docs.pop(doc_id)
+        self._total_length -= doc.length
+        for term in doc.terms:
+            postings = self._postings.get(term)
+            if postings is not None:
+                postings.pop(doc_id, None)
+                if not postings:
+                    del self._postings[term]
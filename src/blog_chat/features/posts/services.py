@@ -1,22 +1,59 @@
 
-import powerwalk
+from blog_chat.core.config import (
+    CONTENT_DIR,
+    CONTENT_WATCH,
+    POSTS_RESCAN_INTERVAL,
+    SEARCH_INDEX_PATH,
+    SITE_URL,
+)
+from blog_chat.features.posts.index import PostIndex
+from blog_chat.features.posts.parser import PostMeta
+from blog_chat.features.posts.search import SearchHit, SearchIndex
+from blog_chat.features.posts.sitemap import SitemapCache
+from blog_chat.features.posts.watcher import ContentWatcher
 
-from blog_chat.core.config import CONTENT_DIR
-from blog_chat.features.posts.parser import parse_markdown_file
+post_index = PostIndex(CONTENT_DIR, rescan_interval=POSTS_RESCAN_INTERVAL)
 
+search_index = SearchIndex()
+if SEARCH_INDEX_PATH:
+    search_index.load(SEARCH_INDEX_PATH)
+post_index.subscribe(search_index.apply)
 
-def get_posts() -> list[dict]:
-    posts = []
-    for entry in powerwalk.walk(CONTENT_DIR, filter="**/*.md"):
-        post = parse_markdown_file(entry.path)
-        if post:
-            posts.append(post)
-    return sorted(posts, key=lambda p: p.get("created", ""), reverse=True)
+sitemap_cache = SitemapCache(post_index, SITE_URL)
+
+
+def get_posts() -> list[PostMeta]:
+    return post_index.get_posts()
+
+
+def get_posts_page(after: str | None = None, limit: int = 20) -> tuple[list[PostMeta], str | None]:
+    return post_index.get_page(after, limit)
 
 
 def get_post(slug: str) -> dict | None:
-    for entry in powerwalk.walk(CONTENT_DIR, filter="**/*.md"):
-        post = parse_markdown_file(entry.path)
-        if post and post.get("slug") == slug:
-            return post
-    return None
+    return post_index.get_post(slug)
+
+
+def create_content_watcher() -> ContentWatcher | None:
+    if CONTENT_WATCH == "off":
+        return None
+    return ContentWatcher(
+        post_index,
+        poll_interval=POSTS_RESCAN_INTERVAL,
+        force_polling=CONTENT_WATCH == "poll",
+    )
+
+
+def search_posts(query: str, limit: int = 20) -> list[SearchHit]:
+    post_index.get_posts()
+    return search_index.search(query, limit)
+
+
+def sync_search_index():
+    """Drop posts deleted while the saved search index was on disk."""
+    search_index.retain(meta.slug for meta in get_posts())
+
+
+def save_search_index():
+    if SEARCH_INDEX_PATH:
+        search_index.save(SEARCH_INDEX_PATH)
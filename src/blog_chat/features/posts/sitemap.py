@@ -0,0 +1,112 @@
+
+import gzip
+import threading
+from dataclasses import dataclass
+from datetime import datetime
+from xml.sax.saxutils import escape
+
+from blog_chat.core.conditional import encoded_etag, make_etag
+from blog_chat.features.posts.index import PostIndex
+
+SITEMAP_NAME = "sitemap.xml"
+MAX_URLS = 50_000
+MAX_BYTES = 50 * 1024 * 1024
+
+URLSET_HEAD = b'<?xml version="1.0" encoding="UTF-8"?>\n<urlset xmlns="http://www.sitemaps.org/schemas/sitemap/0.9">\n'
+URLSET_TAIL = b"</urlset>"
+INDEX_HEAD = b'<?xml version="1.0" encoding="UTF-8"?>\n<sitemapindex xmlns="http://www.sitemaps.org/schemas/sitemap/0.9">\n'
+INDEX_TAIL = b"</sitemapindex>"
+
+
+def part_name(number: int) -> str:
+    return f"sitemap-{number}.xml"
+
+
+@dataclass(slots=True, frozen=True)
+class SitemapFile:
+    body: bytes
+    gzipped: bytes
+    etag: str
+    gzipped_etag: str
+    last_modified: datetime | None
+
+    @classmethod
+    def build(cls, body: bytes, last_modified: datetime | None) -> "SitemapFile":
+        etag = make_etag(body)
+        return cls(
+            body=body,
+            gzipped=gzip.compress(body, compresslevel=9, mtime=0),
+            etag=etag,
+            gzipped_etag=encoded_etag(etag, "gzip"),
+            last_modified=last_modified,
+        )
+
+
+def _url(loc: str, changefreq: str, priority: str, lastmod: str | None = None) -> bytes:
+    lastmod_line = f"    <lastmod>{lastmod}</lastmod>\n" if lastmod else ""
+    return (f"  <url>\n    <loc>{escape(loc)}</loc>\n{lastmod_line}"
+            f"    <changefreq>{changefreq}</changefreq>\n"
+            f"    <priority>{priority}</priority>\n  </url>\n").encode()
+
+
+class SitemapCache:
+    """Sitemap XML built once per content change and kept precompressed.
+
+    Past `max_urls` URLs (or `max_bytes` per file) the output is split into
+    `sitemap-N.xml` files referenced from a sitemap index at `sitemap.xml`.
+    """
+
+    def __init__(self, index: PostIndex, site_url: str, max_urls: int = MAX_URLS, max_bytes: int = MAX_BYTES):
+        self.index = index
+        self.site_url = site_url.rstrip("/")
+        self.max_urls = max_urls
+        self.max_bytes = max_bytes
+        self._files: dict[str, SitemapFile] = {}
+        self._version: int | None = None
+        self._lock = threading.Lock()
+
+    def get(self, name: str) -> SitemapFile | None:
+        return self.files().get(name)
+
+    def files(self) -> dict[str, SitemapFile]:
+        self.index.ensure_fresh()
+        if self._version != self.index.version:
+            with self._lock:
+                version = self.index.version
+                if self._version != version:
+                    self._files = self._build(self.index.get_entries())
+                    self._version = version
+        return self._files
+
+    def _build(self, entries) -> dict[str, SitemapFile]:
+        last_modified = self.index.last_modified
+        urls = [_url(f"{self.site_url}/", "daily", "1.0")]
+        for entry in entries:
+            urls.append(_url(f"{self.site_url}/{entry.slug}", "weekly", "0.8",
+                             entry.last_modified.date().isoformat()))
+
+        budget = self.max_bytes - len(URLSET_HEAD) - len(URLSET_TAIL)
+        parts: list[list[bytes]] = [[]]
+        size = 0
+        for url in urls:
+            if parts[-1] and (len(parts[-1]) >= self.max_urls or size + len(url) > budget):
+                parts.append([])
+                size = 0
+            parts[-1].append(url)
+            size += len(url)
+
+        if len(parts) == 1:
+            body = URLSET_HEAD + b"".join(parts[0]) + URLSET_TAIL
+            return {SITEMAP_NAME: SitemapFile.build(body, last_modified)}
+
+        files = {}
+        lastmod = last_modified.date().isoformat() if last_modified else None
+        references = []
+        for number, part in enumerate(parts, start=1):
+            name = part_name(number)
+            files[name] = SitemapFile.build(URLSET_HEAD + b"".join(part) + URLSET_TAIL, last_modified)
+            lastmod_line = f"    <lastmod>{lastmod}</lastmod>\n" if lastmod else ""
+            references.append(
+                f"  <sitemap>\n    <loc>{escape(f'{self.site_url}/{name}')}</loc>\n{lastmod_line}  </sitemap>\n".encode())
+        files[SITEMAP_NAME] = SitemapFile.build(INDEX_HEAD + b"".join(references) + INDEX_TAIL, last_modified)
+        return files
@@ -0,0 +1,77 @@
+
+import asyncio
+import logging
+from pathlib import Path
+
+from blog_chat.features.posts.index import PostIndex
+
+try:
+    import watchfiles
+except ImportError:  # pragma: no cover - watchfiles ships with uvicorn[standard]
+    watchfiles = None
+
+logger = logging.getLogger(__name__)
+
+
+def _is_markdown(_change, path: str) -> bool:
+    return path.endswith(".md")
+
+
+class ContentWatcher:
+    """Keeps a PostIndex current by reacting to filesystem changes.
+
+    Uses watchfiles (inotify on Linux) when available and falls back to
+    periodically re-walking the directory, which still only re-parses files
+    whose mtime or size changed.
+    """
+
+    def __init__(self, index: PostIndex, poll_interval: float = 1.0, force_polling: bool = False):
+        self.index = index
+        self.poll_interval = poll_interval
+        self.force_polling = force_polling or watchfiles is None
+        self._stop = asyncio.Event()
+        self._task: asyncio.Task | None = None
+
+    async def start(self):
+        # Arm the watcher before the initial scan so edits made while the
+        # scan runs are not lost.
+        self._stop.clear()
+        self._task = asyncio.create_task(self._run())
+        await asyncio.to_thread(self.index.refresh)
+        # If the watcher already died, keep the index's periodic rescans on.
+        if not self._task.done():
+            self.index.watched = True
+
+    async def stop(self):
+        self._stop.set()
+        if self._task:
+            await self._task
+            self._task = None
+        self.index.watched = False
+
+    async def _run(self):
+        try:
+            if self.force_polling:
+                await self._poll()
+            else:
+                await self._watch()
+        except Exception:
+            logger.exception("Content watcher stopped, falling back to rescans")
+            self.index.watched = False
+
+    async def _watch(self):
+        async for changes in watchfiles.awatch(
+            self.index.content_dir,
+            watch_filter=_is_markdown,
+            stop_event=self._stop,
+            debounce=200,
+        ):
+            paths = {Path(path) for _, path in changes}
+            await asyncio.to_thread(self.index.reload, paths)
+
+    async def _poll(self):
+        while not self._stop.is_set():
+            try:
+                await asyncio.wait_for(self._stop.wait(), self.poll_interval)
+            except asyncio.TimeoutError:
+                await asyncio.to_thread(self.index.refresh)
@@ -0,0 +1,32 @@
+"""add message id blocks
+
+Revision ID: 5b1e7c9d2f40
+Revises: a2cfa0d6c02a
+Create Date: 2026-10-18 11:30:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '5b1e7c9d2f40'
+down_revision: Union[str, Sequence[str], None] = 'a2cfa0d6c02a'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('message_id_blocks',
+    sa.Column('id', sa.INTEGER(), nullable=False),
+    sa.Column('next_id', sa.INTEGER(), nullable=False),
+    sa.PrimaryKeyConstraint('id')
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_table('message_id_blocks')
@@ -0,0 +1,27 @@
+"""add messages (room_slug, timestamp, id) index
+
+Revision ID: 8d3f2a6c1e57
+Revises: 5b1e7c9d2f40
+Create Date: 2026-10-18 12:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = '8d3f2a6c1e57'
+down_revision: Union[str, Sequence[str], None] = '5b1e7c9d2f40'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_index('ix_messages_room_slug_timestamp_id', 'messages', ['room_slug', 'timestamp', 'id'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_messages_room_slug_timestamp_id', table_name='messages')
@@ -0,0 +1,106 @@
+"""Run the app as room-sharded chat processes behind front workers.
+
+    python -m blog_chat.supervisor --shards 4 --port 9091
+
+Starts one uvicorn process per shard, each listening on a unix socket and
+owning the rooms that hash to it, plus the front workers on the public
+address. Front workers serve the blog and proxy `/ws/chat` to the owning
+shard. Shards that exit are restarted; SIGINT/SIGTERM stop everything.
+"""
+import argparse
+import asyncio
+import os
+import signal
+import sys
+from dataclasses import dataclass
+from pathlib import Path
+
+from blog_chat.core.database import dispose_engines, init_db
+from blog_chat.features.accounts import models as _accounts_models  # noqa: F401  (registers tables)
+from blog_chat.features.chat import models as _chat_models  # noqa: F401
+from blog_chat.features.chat.sharding import shard_socket, socket_dir
+
+APP = "blog_chat.app:app"
+RESTART_DELAY = 1.0
+
+
+@dataclass(slots=True, frozen=True)
+class Child:
+    name: str
+    argv: list[str]
+    env: dict[str, str]
+
+
+def build_children(shards: int, host: str, port: int, workers: int, directory: Path) -> list[Child]:
+    uvicorn = [sys.executable, "-m", "uvicorn", APP]
+    base_env = {
+        "CHAT_SHARDS": str(shards),
+        "CHAT_SHARD_SOCKET_DIR": str(directory),
+        # A room lives in exactly one process, so no cross-worker backplane.
+        "CHAT_BACKPLANE": "memory",
+    }
+    children = [
+        Child(
+            f"shard-{index}",
+            uvicorn + ["--uds", str(shard_socket(index, directory)),
+                       "--proxy-headers", "--forwarded-allow-ips", "*"],
+            {**base_env, "CHAT_SHARD_INDEX": str(index)},
+        )
+        for index in range(shards)
+    ]
+    children.append(Child(
+        "front",
+        uvicorn + ["--host", host, "--port", str(port), "--workers", str(workers)],
+        base_env,
+    ))
+    return children
+
+
+async def supervise(child: Child, stopping: asyncio.Event):
+    while not stopping.is_set():
+        process = await asyncio.create_subprocess_exec(*child.argv, env={**os.environ, **child.env})
+        print(f"Started {child.name} (pid {process.pid})")
+        waiter = asyncio.create_task(process.wait())
+        stopper = asyncio.create_task(stopping.wait())
+        await asyncio.wait([waiter, stopper], return_when=asyncio.FIRST_COMPLETED)
+        if stopping.is_set():
+            if process.returncode is None:
+                process.terminate()
+                await waiter
+            stopper.cancel()
+            return
+        stopper.cancel()
+        print(f"{child.name} exited with {process.returncode}; restarting")
+        await asyncio.sleep(RESTART_DELAY)
+
+
+async def run(children: list[Child]):
+    # Create the schema once; children starting together would race on it.
+    await init_db()
+    await dispose_engines()
+    stopping = asyncio.Event()
+    loop = asyncio.get_running_loop()
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        loop.add_signal_handler(sig, stopping.set)
+    await asyncio.gather(*(supervise(child, stopping) for child in children))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Run room-sharded chat processes behind front workers.")
+    parser.add_argument("--shards", "-n", type=int, default=os.cpu_count() or 1,
+                        help="number of chat shard processes (default: CPU count)")
+    parser.add_argument("--host", default="0.0.0.0")
+    parser.add_argument("--port", "-p", type=int, default=9091)
+    parser.add_argument("--workers", "-w", type=int, default=1,
+                        help="front worker processes serving pages and proxying chat")
+    parser.add_argument("--socket-dir", type=Path, default=None,
+                        help="directory for the shards' unix sockets")
+    args = parser.parse_args(argv)
+    directory = args.socket_dir or socket_dir()
+    directory.mkdir(parents=True, exist_ok=True)
+    print(f"Running {args.shards} chat shards on {directory}, front on {args.host}:{args.port}")
+    asyncio.run(run(build_children(args.shards, args.host, args.port, args.workers, directory)))
+
+
+if __name__ == "__main__":
+    main()
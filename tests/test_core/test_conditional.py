@@ -0,0 +1,50 @@
+import pytest
+from datetime import date, datetime, timezone
+from starlette.requests import Request
+from blog_chat.core.conditional import http_date, is_not_modified, make_etag, to_datetime
+
+
+def make_request(**headers) -> Request:
+    raw = [(k.replace("_", "-").lower().encode(), v.encode()) for k, v in headers.items()]
+    return Request({"type": "http", "method": "GET", "path": "/", "headers": raw})
+
+
+class TestMakeEtag:
+    def test_is_quoted_and_stable(self):
+        etag = make_etag("a", 1)
+        assert etag.startswith('"') and etag.endswith('"')
+        assert etag == make_etag("a", 1)
+        assert etag != make_etag("a", 2)
+
+
+class TestToDatetime:
+    def test_date_object(self):
+        assert to_datetime(date(2024, 1, 2)) == datetime(2024, 1, 2, tzinfo=timezone.utc)
+
+    def test_day_first_string(self):
+        assert to_datetime("07-03-2026") == datetime(2026, 3, 7, tzinfo=timezone.utc)
+
+    def test_unparseable_is_none(self):
+        assert to_datetime("soon") is None
+        assert to_datetime("") is None
+
+
+class TestIsNotModified:
+    def test_matching_etag(self):
+        etag = make_etag("x")
+        assert is_not_modified(make_request(if_none_match=etag), etag)
+        assert is_not_modified(make_request(if_none_match=f'"other", W/{etag}'), etag)
+
+    def test_different_etag(self):
+        assert not is_not_modified(make_request(if_none_match='"other"'), make_etag("x"))
+
+    def test_if_modified_since(self):
+        modified = datetime(2024, 1, 2, 3, 4, 5, 600, tzinfo=timezone.utc)
+        assert is_not_modified(make_request(if_modified_since=http_date(modified)), '"x"', modified)
+        earlier = http_date(datetime(2024, 1, 1, tzinfo=timezone.utc))
+        assert not is_not_modified(make_request(if_modified_since=earlier), '"x"', modified)
+
+    def test_etag_takes_precedence_over_date(self):
+        modified = datetime(2024, 1, 2, tzinfo=timezone.utc)
+        request = make_request(if_none_match='"other"', if_modified_since=http_date(modified))
+        assert not is_not_modified(request, '"x"', modified)
@@ -1,5 +1,5 @@
 import pytest
-from blog_chat.core.html import minify_html_func
+from blog_chat.core.html import MinifyCache, minify_html_func
 
 
 class TestMinifyHtml:
@@ -24,3 +24,18 @@ class TestMinifyHtml:
     def test_minify_empty_string(self):
         result = minify_html_func("")
         assert result == ""
+
+
+class TestMinifyCache:
+    def test_reuses_minified_output(self):
+        cache = MinifyCache()
+        html = "<p>  Hello  </p>"
+        first = cache.minify(html)
+        assert cache.minify(html) is first
+        assert len(cache) == 1
+
+    def test_evicts_least_recently_used(self):
+        cache = MinifyCache(max_entries=2)
+        for i in range(3):
+            cache.minify(f"<p>{i}</p>")
+        assert len(cache) == 2
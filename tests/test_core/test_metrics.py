@@ -0,0 +1,22 @@
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from blog_chat.core import metrics
+
+
+def client():
+    app = FastAPI()
+    app.include_router(metrics.router)
+    return TestClient(app)
+
+
+class TestDbMetrics:
+    def test_hidden_by_default(self, monkeypatch):
+        monkeypatch.setattr(metrics, "DB_METRICS", False)
+        assert client().get("/api/metrics/db").status_code == 404
+
+    def test_enabled_reports_pools(self, monkeypatch):
+        monkeypatch.setattr(metrics, "DB_METRICS", True)
+        response = client().get("/api/metrics/db")
+        assert response.status_code == 200
+        assert "primary" in response.json()
@@ -0,0 +1,50 @@
+import pytest
+from blog_chat.core import filters
+from blog_chat.core.filters import create_markdown_cache
+from blog_chat.core.render_cache import RenderCache
+
+
+class CountingRenderer:
+    def __init__(self):
+        self.calls = 0
+
+    def __call__(self, source):
+        self.calls += 1
+        return f"<p>{source}</p>"
+
+
+class TestRenderCache:
+    def test_renders_once_per_source(self):
+        cache = RenderCache()
+        render = CountingRenderer()
+        assert cache.get_or_render("hello", render) == "<p>hello</p>"
+        assert cache.get_or_render("hello", render) == "<p>hello</p>"
+        assert render.calls == 1
+
+    def test_evicts_least_recently_used(self):
+        cache = RenderCache(max_entries=2)
+        render = CountingRenderer()
+        cache.get_or_render("a", render)
+        cache.get_or_render("b", render)
+        cache.get_or_render("a", render)
+        cache.get_or_render("c", render)
+        cache.get_or_render("a", render)
+        assert render.calls == 3
+        cache.get_or_render("b", render)
+        assert render.calls == 4
+
+    def test_disk_cache_survives_new_instance(self, tmp_path):
+        render = CountingRenderer()
+        RenderCache(directory=tmp_path).get_or_render("hello", render)
+        assert RenderCache(directory=tmp_path).get_or_render("hello", render) == "<p>hello</p>"
+        assert render.calls == 1
+
+    def test_namespace_changes_key(self):
+        assert RenderCache(namespace="a").key("x") != RenderCache(namespace="b").key("x")
+
+
+class TestMarkdownCache:
+    def test_key_depends_on_extension_config(self, monkeypatch):
+        before = create_markdown_cache().key("text")
+        monkeypatch.setattr(filters, "MARKDOWN_EXTENSIONS", ["tables"])
+        assert create_markdown_cache().key("text") != before
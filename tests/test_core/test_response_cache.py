@@ -0,0 +1,53 @@
+import gzip
+import pytest
+from starlette.requests import Request
+from blog_chat.core.response_cache import ResponseCache
+
+
+def make_request(accept_encoding: str = "") -> Request:
+    return Request({"type": "http", "method": "GET", "path": "/",
+                    "headers": [(b"accept-encoding", accept_encoding.encode())]})
+
+
+BODY = b"<p>" + b"hello world " * 100 + b"</p>"
+
+
+class TestResponseCache:
+    def test_put_and_get(self):
+        cache = ResponseCache()
+        cached = cache.put("key", BODY, headers={"ETag": '"abc"'})
+        assert cache.get("key") is cached
+        assert gzip.decompress(cached.encoded["gzip"]) == BODY
+        assert cache.get("missing") is None
+
+    def test_small_bodies_are_not_compressed(self):
+        assert ResponseCache().put("key", b"<p>hi</p>").encoded == {}
+
+    def test_evicts_to_byte_budget(self):
+        cache = ResponseCache(max_bytes=len(BODY) + 200)
+        cache.put("a", BODY)
+        cache.put("b", BODY)
+        assert cache.get("a") is None
+        assert cache.get("b") is not None
+        assert cache.size <= cache.max_bytes
+
+    def test_invalidate_with_predicate(self):
+        cache = ResponseCache()
+        cache.put(("post", "a", None), BODY)
+        cache.put(("index", None, None), BODY)
+        cache.invalidate(lambda key: key[0] == "index")
+        assert len(cache) == 1
+        cache.invalidate()
+        assert len(cache) == 0 and cache.size == 0
+
+    def test_respond_negotiates_encoding(self):
+        cache = ResponseCache()
+        cached = cache.put("key", BODY, headers={"ETag": '"abc"'})
+        gzipped = cache.respond(make_request("gzip, deflate"), cached)
+        assert gzipped.headers["content-encoding"] == "gzip"
+        assert gzipped.headers["etag"] == '"abc-gz"'
+        assert "Accept-Encoding" in gzipped.headers["vary"]
+        identity = cache.respond(make_request("gzip;q=0"), cached)
+        assert "content-encoding" not in identity.headers
+        assert identity.body == BODY
+        assert identity.headers["etag"] == '"abc"'
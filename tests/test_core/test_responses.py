@@ -1,7 +1,8 @@
 import pytest
 import tempfile
 import os
-from blog_chat.core.responses import MinifiedTemplate, create_templates
+import jinja2
+from blog_chat.core.responses import MinifiedTemplate, create_templates, precompile_templates
 
 
 class TestMinifiedTemplate:
@@ -23,3 +24,35 @@ class TestCreateTemplates:
         with tempfile.TemporaryDirectory() as tmpdir:
             templates = create_templates(tmpdir)
             assert "minify" in templates.env.filters
+
+
+class TestMinifyingLoader:
+    def test_sources_are_minified_on_load(self):
+        with tempfile.TemporaryDirectory() as tmpdir:
+            with open(os.path.join(tmpdir, "item.html"), "w") as f:
+                f.write('<ul>\n    <li class="{{ cls }}">  {{ name }}  </li>\n</ul>\n')
+            templates = create_templates(tmpdir)
+            source, _, _ = templates.env.loader.get_source(templates.env, "item.html")
+            assert "\n" not in source
+            assert "{{ name }}" in source
+            assert templates.get_template("item.html").render(cls="a b", name="x") == '<ul><li class="a b">x</ul>'
+
+    def test_output_minification_is_opt_in(self):
+        with tempfile.TemporaryDirectory() as tmpdir:
+            with open(os.path.join(tmpdir, "raw.html"), "w") as f:
+                f.write("<div>{{ html | safe }}</div>")
+            html = "<b>  spaced  </b>"
+            assert create_templates(tmpdir).get_template("raw.html").render(html=html) == f"<div>{html}</div>"
+            minified = create_templates(tmpdir, minify_output=True).get_template("raw.html").render(html=html)
+            assert "  " not in minified
+
+
+class TestPrecompileTemplates:
+    def test_compiles_every_template_into_the_bytecode_cache(self):
+        with tempfile.TemporaryDirectory() as tmpdir, tempfile.TemporaryDirectory() as cachedir:
+            for name in ("a.html", "b.html"):
+                with open(os.path.join(tmpdir, name), "w") as f:
+                    f.write("<p>{{ value }}</p>")
+            templates = create_templates(tmpdir, bytecode_cache=jinja2.FileSystemBytecodeCache(cachedir))
+            assert precompile_templates(templates) == 2
+            assert len(os.listdir(cachedir)) == 2
@@ -0,0 +1,77 @@
+import time
+
+import jwt
+import pytest
+
+from blog_chat.features.accounts import services
+from blog_chat.features.accounts.tokens import VerifiedTokenCache
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+class TestVerifiedTokenCache:
+    def test_hit_until_exp(self):
+        clock = FakeClock()
+        cache = VerifiedTokenCache(clock=clock)
+        cache.put("t", "secret", {"username": "alice", "exp": 1010})
+        assert cache.get("t", "secret") == {"username": "alice", "exp": 1010}
+        clock.now = 1010
+        assert cache.get("t", "secret") is None
+        assert len(cache) == 0
+
+    def test_secret_change_clears(self):
+        cache = VerifiedTokenCache(clock=FakeClock())
+        cache.put("t", "old", {"exp": 2000})
+        assert cache.get("t", "new") is None
+        assert len(cache) == 0
+
+    def test_tokens_without_exp_are_not_cached(self):
+        cache = VerifiedTokenCache()
+        cache.put("t", "secret", {"username": "alice"})
+        assert len(cache) == 0
+
+    def test_evicts_least_recently_used(self):
+        cache = VerifiedTokenCache(max_entries=2, clock=FakeClock())
+        for token in ("a", "b"):
+            cache.put(token, "secret", {"exp": 2000})
+        cache.get("a", "secret")
+        cache.put("c", "secret", {"exp": 2000})
+        assert cache.get("b", "secret") is None
+        assert cache.get("a", "secret") is not None
+
+
+class TestDecodeToken:
+    @pytest.fixture(autouse=True)
+    def fresh_cache(self, monkeypatch):
+        monkeypatch.setattr(services, "token_cache", VerifiedTokenCache())
+
+    def test_verifies_once(self, monkeypatch):
+        token = services.create_token("alice")
+        calls = []
+        decode = jwt.decode
+        monkeypatch.setattr(jwt, "decode", lambda *args, **kwargs: calls.append(1) or decode(*args, **kwargs))
+        assert services.get_username_from_token(token) == "alice"
+        assert services.get_username_from_token(token) == "alice"
+        assert len(calls) == 1
+
+    def test_rotated_secret_rejects_cached_token(self, monkeypatch):
+        token = services.create_token("alice")
+        assert services.decode_token(token)["username"] == "alice"
+        monkeypatch.setattr(services, "JWT_SECRET", "rotated-secret")
+        assert services.decode_token(token) is None
+
+    def test_expired_token_is_rejected(self):
+        token = jwt.encode({"username": "alice", "exp": int(time.time()) - 1},
+                           services.JWT_SECRET, algorithm=services.JWT_ALGORITHM)
+        assert services.decode_token(token) is None
+        assert len(services.token_cache) == 0
+
+    def test_invalid_token_is_not_cached(self):
+        assert services.get_username_from_token("not-a-token") == "Guest"
+        assert len(services.token_cache) == 0
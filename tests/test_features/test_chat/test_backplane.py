@@ -0,0 +1,104 @@
+import asyncio
+import tempfile
+from pathlib import Path
+
+import pytest
+
+from blog_chat.features.chat import backplane
+from blog_chat.features.chat.backplane import (
+    Backplane,
+    InProcessBackplane,
+    UnixSocketBackplane,
+    UnixSocketBroker,
+    create_backplane,
+)
+
+
+class Recorder:
+    def __init__(self):
+        self.events: list[dict] = []
+        self.received = asyncio.Event()
+
+    async def __call__(self, event: dict):
+        self.events.append(event)
+        self.received.set()
+
+
+@pytest.fixture
+def socket_path():
+    # Unix socket paths are limited to ~100 bytes; keep it short.
+    with tempfile.TemporaryDirectory(dir="/tmp") as directory:
+        yield Path(directory) / "chat.sock"
+
+
+@pytest.mark.asyncio
+class TestBackplanes:
+    async def test_in_process_delivers_locally(self):
+        recorder = Recorder()
+        await InProcessBackplane(recorder).publish({"type": "message", "id": 1})
+        assert recorder.events == [{"type": "message", "id": 1}]
+
+    async def test_unix_broker_fans_out_to_every_worker(self, socket_path):
+        broker = UnixSocketBroker(socket_path)
+        await broker.start()
+        recorders = [Recorder(), Recorder()]
+        workers = [UnixSocketBackplane(recorder, socket_path) for recorder in recorders]
+        try:
+            for worker in workers:
+                await worker.start()
+            await workers[0].publish({"type": "message", "room": "offtopic"})
+            for recorder in recorders:
+                await asyncio.wait_for(recorder.received.wait(), timeout=2)
+                assert recorder.events == [{"type": "message", "room": "offtopic"}]
+        finally:
+            for worker in workers:
+                await worker.stop()
+            await broker.stop()
+        assert not socket_path.exists()
+
+    async def test_publish_requires_start(self, socket_path):
+        with pytest.raises(ConnectionError):
+            await UnixSocketBackplane(Recorder(), socket_path).publish({})
+
+    async def test_reconnects_after_broker_restart(self, socket_path, monkeypatch):
+        monkeypatch.setattr(backplane, "RECONNECT_MIN_DELAY", 0.01)
+        broker = UnixSocketBroker(socket_path)
+        await broker.start()
+        recorder = Recorder()
+        worker = UnixSocketBackplane(recorder, socket_path)
+        await worker.start()
+        try:
+            await asyncio.sleep(0.01)  # let the broker accept the worker
+            await broker.stop()
+            await asyncio.sleep(0.1)
+            with pytest.raises(ConnectionError):
+                await worker.publish({"n": 1})
+            broker = UnixSocketBroker(socket_path)
+            await broker.start()
+            for _ in range(100):
+                if worker._writer is not None:
+                    break
+                await asyncio.sleep(0.01)
+            await worker.publish({"n": 2})
+            await asyncio.wait_for(recorder.received.wait(), timeout=2)
+            assert recorder.events == [{"n": 2}]
+        finally:
+            await worker.stop()
+            await broker.stop()
+
+    async def test_publish_is_abstract(self):
+        with pytest.raises(TypeError):
+            Backplane(Recorder())
+
+
+class TestCreateBackplane:
+    def test_memory(self):
+        assert isinstance(create_backplane("memory", Recorder()), InProcessBackplane)
+
+    def test_postgres_needs_postgres_url(self):
+        with pytest.raises(ValueError):
+            create_backplane("postgres", Recorder(), dsn="sqlite+aiosqlite:///chat.db")
+
+    def test_unix_needs_socket(self):
+        with pytest.raises(ValueError):
+            create_backplane("unix", Recorder())
@@ -0,0 +1,126 @@
+import asyncio
+import json
+
+import pytest
+
+from blog_chat.features.chat.coalesce import RoomCoalescer
+from blog_chat.features.chat.protocol import PROTOCOL_V2, encode_batch
+from blog_chat.features.chat.websocket import ConnectionManager
+
+
+class FakeWebSocket:
+    def __init__(self):
+        self.sent: list[str] = []
+
+    async def accept(self, subprotocol=None):
+        pass
+
+    async def send_text(self, data: str):
+        self.sent.append(data)
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+async def settle():
+    for _ in range(5):
+        await asyncio.sleep(0)
+
+
+@pytest.mark.asyncio
+class TestRoomCoalescer:
+    async def test_quiet_room_delivers_immediately(self):
+        manager = ConnectionManager()
+        socket = FakeWebSocket()
+        await manager.connect(socket, "room")
+        coalescer = RoomCoalescer(manager, window=0.01, threshold=3)
+        await coalescer.publish({"id": 1}, "room")
+        await coalescer.publish({"id": 2}, "room")
+        await settle()
+        assert socket.sent == ['{"id":1}', '{"id":2}']
+        assert not coalescer.is_hot("room")
+
+    async def test_hot_room_sends_batches(self):
+        manager = ConnectionManager()
+        socket = FakeWebSocket()
+        await manager.connect(socket, "room")
+        coalescer = RoomCoalescer(manager, window=0.01, threshold=2)
+        for i in range(1, 6):
+            await coalescer.publish({"id": i}, "room")
+        await settle()
+        assert socket.sent == ['{"id":1}']
+        await asyncio.sleep(0.02)
+        await settle()
+        assert json.loads(socket.sent[1]) == {"type": "batch", "messages": [{"id": i} for i in range(2, 6)]}
+
+    async def test_cools_down_after_a_quiet_second(self):
+        clock = FakeClock()
+        coalescer = RoomCoalescer(ConnectionManager(), threshold=2, clock=clock)
+        coalescer._tick("room")
+        coalescer._tick("room")
+        assert coalescer.is_hot("room")
+        clock.now = 5.0
+        coalescer._tick("room")
+        assert not coalescer.is_hot("room")
+
+    async def test_batches_respect_exclude_and_variants(self):
+        manager = ConnectionManager()
+        sender, v1, v2 = FakeWebSocket(), FakeWebSocket(), FakeWebSocket()
+        connection = await manager.connect(sender, "room")
+        await manager.connect(v1, "room")
+        await manager.connect(v2, "room", PROTOCOL_V2)
+        await manager.broadcast_batch([
+            ({"html": "a"}, connection.id, {PROTOCOL_V2: {"c": "a"}}, None),
+            ({"html": "b"}, None, {PROTOCOL_V2: {"c": "b"}}, None),
+        ], "room")
+        await settle()
+        assert sender.sent == ['{"html":"b"}']
+        assert json.loads(v1.sent[0])["messages"] == [{"html": "a"}, {"html": "b"}]
+        assert json.loads(v2.sent[0])["messages"] == [{"c": "a"}, {"c": "b"}]
+
+    async def test_sender_echo_keeps_its_place_in_the_batch(self):
+        manager = ConnectionManager()
+        sender, other = FakeWebSocket(), FakeWebSocket()
+        connection = await manager.connect(sender, "room")
+        await manager.connect(other, "room")
+        coalescer = RoomCoalescer(manager, window=10, threshold=1)
+        await coalescer.publish({"id": 1}, "room")
+        await coalescer.send(connection, {"id": 2, "own": True})
+        await coalescer.publish({"id": 2}, "room", exclude=connection.id)
+        await coalescer.publish({"id": 3}, "room")
+        await coalescer.stop()
+        await settle()
+        assert [m["id"] for m in json.loads(sender.sent[0])["messages"]] == [1, 2, 3]
+        assert json.loads(sender.sent[0])["messages"][1]["own"]
+        assert [m["id"] for m in json.loads(other.sent[0])["messages"]] == [1, 2, 3]
+
+    async def test_on_send_runs_when_the_batch_goes_out(self):
+        manager = ConnectionManager()
+        await manager.connect(FakeWebSocket(), "room")
+        coalescer = RoomCoalescer(manager, window=10, threshold=1)
+        recorded = []
+        await coalescer.publish({"id": 1}, "room", on_send=lambda: recorded.append(1))
+        assert recorded == []
+        await coalescer.stop()
+        assert recorded == [1]
+
+    async def test_stop_flushes_pending(self):
+        manager = ConnectionManager()
+        socket = FakeWebSocket()
+        await manager.connect(socket, "room")
+        coalescer = RoomCoalescer(manager, window=10, threshold=1)
+        await coalescer.publish({"id": 1}, "room")
+        await coalescer.publish({"id": 2}, "room")
+        await coalescer.stop()
+        await settle()
+        assert json.loads(socket.sent[0])["messages"] == [{"id": 1}, {"id": 2}]
+
+
+class TestEncodeBatch:
+    def test_joins_preencoded_frames(self):
+        assert encode_batch(['{"id":1}', {"id": 2}]) == '{"type":"batch","messages":[{"id":1},{"id":2}]}'
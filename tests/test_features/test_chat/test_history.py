@@ -0,0 +1,126 @@
+import asyncio
+import json
+from datetime import datetime
+
+import pytest
+
+from blog_chat.features.accounts.models import User  # noqa: F401  (registers the Message.user target)
+from blog_chat.features.chat.history import ChatRecord, HistorySnapshots
+from blog_chat.features.chat.models import Message
+from blog_chat.features.chat.protocol import PROTOCOL_V2
+
+
+def make_message(id: int, username: str = "alice", room: str = "offtopic") -> Message:
+    return Message(id=id, room_slug=room, username=username, content=f"message {id}",
+                   timestamp=datetime(2024, 1, 1, 12, 0, id))
+
+
+def render(message: ChatRecord, is_own: bool) -> str:
+    return f"{'own' if is_own else 'other'}:{message.id}"
+
+
+def describe(message: ChatRecord) -> dict:
+    return {"id": message.id, "u": message.username}
+
+
+@pytest.mark.asyncio
+class TestHistorySnapshots:
+    async def test_loads_once_per_room(self):
+        snapshots = HistorySnapshots(render, describe)
+        loads = []
+
+        async def load():
+            loads.append(1)
+            await asyncio.sleep(0.01)
+            return [make_message(1), make_message(2, "bob")]
+
+        frames = await asyncio.gather(*(snapshots.frame("offtopic", "alice", load) for _ in range(5)))
+        assert len(loads) == 1
+        data = json.loads(frames[0])
+        assert data["type"] == "history"
+        assert [m["html"] for m in data["messages"]] == ["own:1", "other:2"]
+
+    async def test_frames_are_personalized(self):
+        snapshots = HistorySnapshots(render, describe)
+
+        async def load():
+            return [make_message(1), make_message(2, "bob")]
+
+        frame = await snapshots.frame("offtopic", "bob", load)
+        assert [m["html"] for m in json.loads(frame)["messages"]] == ["other:1", "own:2"]
+
+    async def test_append_keeps_the_last_messages(self):
+        snapshots = HistorySnapshots(render, describe, limit=2)
+
+        async def load():
+            return [make_message(1)]
+
+        await snapshots.frame("offtopic", None, load)
+        snapshots.append("offtopic", make_message(2))
+        snapshots.append("offtopic", make_message(3))
+        snapshots.append("elsewhere", make_message(4, room="elsewhere"))
+        frame = await snapshots.frame("offtopic", None, load)
+        assert [m["id"] for m in json.loads(frame)["messages"]] == [2, 3]
+        assert len(snapshots) == 1
+
+    async def test_tracks_buffered_bytes(self):
+        snapshots = HistorySnapshots(render, describe, limit=2)
+
+        async def load():
+            return [make_message(1), make_message(2)]
+
+        await snapshots.frame("offtopic", None, load)
+        size = snapshots.size
+        assert size > 0
+        snapshots.append("offtopic", make_message(3))
+        assert snapshots.size == size
+        snapshots.invalidate("offtopic")
+        assert snapshots.size == 0
+
+    async def test_evicts_idle_rooms_over_the_byte_cap(self):
+        active = {"busy"}
+        snapshots = HistorySnapshots(render, describe, max_bytes=1, is_active=lambda room: room in active)
+
+        async def load():
+            return [make_message(1)]
+
+        await snapshots.frame("busy", None, load)
+        await snapshots.frame("idle", None, load)
+        await snapshots.frame("new", None, load)
+        assert "busy" in snapshots
+        assert "idle" not in snapshots
+        assert "new" in snapshots
+
+    async def test_records_are_orm_free(self):
+        record = ChatRecord.from_message(make_message(1))
+        assert not hasattr(record, "__dict__")
+        assert (record.id, record.username) == (1, "alice")
+
+    async def test_v2_frames_carry_records(self):
+        snapshots = HistorySnapshots(render, describe)
+
+        async def load():
+            return [make_message(1), make_message(2, "bob")]
+
+        frame = await snapshots.frame("offtopic", "bob", load, protocol=PROTOCOL_V2)
+        assert json.loads(frame)["messages"] == [{"id": 1, "u": "alice"}, {"id": 2, "u": "bob"}]
+        assert await snapshots.frame("offtopic", "alice", load, protocol=PROTOCOL_V2) is frame
+
+    async def test_appends_during_load_are_merged(self):
+        snapshots = HistorySnapshots(render, describe)
+        loading = asyncio.Event()
+        release = asyncio.Event()
+
+        async def load():
+            loading.set()
+            await release.wait()
+            # The first broadcast was already inserted; the second was not.
+            return [make_message(1), make_message(2)]
+
+        joining = asyncio.create_task(snapshots.frame("offtopic", None, load))
+        await loading.wait()
+        snapshots.append("offtopic", make_message(2))
+        snapshots.append("offtopic", make_message(3))
+        release.set()
+        frame = await joining
+        assert [m["id"] for m in json.loads(frame)["messages"]] == [1, 2, 3]
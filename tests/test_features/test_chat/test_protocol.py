@@ -0,0 +1,40 @@
+import json
+
+import pytest
+
+from blog_chat.features.chat import protocol
+from blog_chat.features.chat.protocol import PROTOCOL_V2, PROTOCOL_V2_MSGPACK, choose_protocol, encode, is_v2
+
+
+class TestChooseProtocol:
+    def test_no_offer_is_v1(self):
+        assert choose_protocol([]) is None
+        assert choose_protocol(["something-else"]) is None
+
+    def test_picks_v2(self):
+        assert choose_protocol([PROTOCOL_V2]) == PROTOCOL_V2
+        assert is_v2(PROTOCOL_V2)
+        assert not is_v2(None)
+
+    def test_prefers_msgpack_when_available(self, monkeypatch):
+        offered = [PROTOCOL_V2, PROTOCOL_V2_MSGPACK]
+        monkeypatch.setattr(protocol, "msgpack", None)
+        assert choose_protocol(offered) == PROTOCOL_V2
+        monkeypatch.setattr(protocol, "msgpack", object())
+        assert choose_protocol(offered) == PROTOCOL_V2_MSGPACK
+
+
+class TestEncode:
+    def test_json_is_compact(self):
+        assert encode({"a": 1, "b": [2]}, PROTOCOL_V2) == '{"a":1,"b":[2]}'
+        assert encode({"a": 1}) == '{"a":1}'
+
+    def test_preencoded_frames_pass_through(self):
+        assert encode('{"a":1}', PROTOCOL_V2_MSGPACK) == '{"a":1}'
+
+    def test_msgpack_is_binary(self):
+        msgpack = pytest.importorskip("msgpack")
+        data = encode({"type": "message", "message": {"id": 1}}, PROTOCOL_V2_MSGPACK)
+        assert isinstance(data, bytes)
+        assert msgpack.unpackb(data) == {"type": "message", "message": {"id": 1}}
+        assert len(data) < len(json.dumps({"type": "message", "message": {"id": 1}}))
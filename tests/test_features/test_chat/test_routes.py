@@ -0,0 +1,189 @@
+import asyncio
+import json
+from datetime import datetime, timedelta, timezone
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+
+from blog_chat.core.base import Base
+from blog_chat.features.accounts.models import User  # noqa: F401  (registers the Message.user target)
+from blog_chat.features.chat import routes, services
+from blog_chat.features.chat.models import Message
+from blog_chat.features.chat.protocol import PROTOCOL_V2, PROTOCOL_V2_MSGPACK
+
+ROOM = "history-room"
+START = datetime(2024, 1, 1)
+
+
+@pytest.fixture
+def client(tmp_path, monkeypatch):
+    engine = create_async_engine(f"sqlite+aiosqlite:///{tmp_path / 'chat.db'}")
+    session_maker = async_sessionmaker(engine, expire_on_commit=False)
+
+    async def setup():
+        async with engine.begin() as conn:
+            await conn.run_sync(Base.metadata.create_all)
+        async with session_maker() as session, session.begin():
+            session.add_all(
+                Message(id=i, room_slug=ROOM, username="alice", content=f"message {i}",
+                        timestamp=START + timedelta(minutes=i))
+                for i in range(1, 121)
+            )
+
+    asyncio.run(setup())
+
+    monkeypatch.setattr(services, "read_session_maker", session_maker)
+    app = FastAPI()
+    app.include_router(routes.router)
+    services.history_snapshots.invalidate()
+    yield TestClient(app)
+    services.history_snapshots.invalidate()
+    asyncio.run(engine.dispose())
+
+
+def ids(frame: dict) -> list[int]:
+    return [message["id"] for message in frame["messages"]]
+
+
+def join(websocket) -> dict:
+    hello = json.loads(websocket.receive_text())
+    assert hello["type"] == "hello"
+    return json.loads(websocket.receive_text())
+
+
+class TestHistoryApi:
+    def test_returns_newest_messages(self, client):
+        data = client.get("/api/chat/history", params={"room": ROOM}).json()
+        assert data["type"] == "history"
+        assert ids(data) == list(range(71, 121))
+        assert data["before"] == 71
+
+    def test_pages_with_before_cursor(self, client):
+        data = client.get("/api/chat/history", params={"room": ROOM, "before": 71, "limit": 30}).json()
+        assert data["type"] == "older"
+        assert ids(data) == list(range(41, 71))
+        assert data["before"] == 41
+        data = client.get("/api/chat/history", params={"room": ROOM, "before": 41, "limit": 50}).json()
+        assert ids(data) == list(range(1, 41))
+        assert data["before"] is None
+
+    def test_unknown_cursor_returns_empty_page(self, client):
+        data = client.get("/api/chat/history", params={"room": ROOM, "before": 9999}).json()
+        assert data == {"type": "older", "messages": [], "before": None}
+
+    def test_limit_is_bounded(self, client):
+        response = client.get("/api/chat/history", params={"room": ROOM, "limit": 1000})
+        assert response.status_code == 422
+
+
+class TestWebSocketHistory:
+    def test_control_frame_loads_older_messages(self, client):
+        with client.websocket_connect(f"/ws/chat?room={ROOM}") as websocket:
+            history = join(websocket)
+            assert ids(history) == list(range(71, 121))
+            websocket.send_text(json.dumps({"type": "history", "before": history["before"]}))
+            older = json.loads(websocket.receive_text())
+            assert older["type"] == "older"
+            assert ids(older) == list(range(21, 71))
+
+    @pytest.mark.parametrize("frame", [
+        {"type": "history", "before": True},
+        {"type": "hello"},
+    ])
+    def test_unrecognised_control_frame_gets_error(self, client, frame):
+        with client.websocket_connect(f"/ws/chat?room={ROOM}") as websocket:
+            join(websocket)
+            websocket.send_text(json.dumps(frame))
+            assert json.loads(websocket.receive_text())["type"] == "error"
+
+    def test_joins_after_the_first_are_served_from_memory(self, client, monkeypatch):
+        with client.websocket_connect(f"/ws/chat?room={ROOM}") as first:
+            join(first)
+
+            async def fail(*args, **kwargs):
+                pytest.fail("queried the database")
+
+            monkeypatch.setattr(services, "load_recent_messages", fail)
+            with client.websocket_connect(f"/ws/chat?room={ROOM}") as second:
+                assert ids(join(second)) == list(range(71, 121))
+
+
+class TestReconnect:
+    def test_hello_carries_reconnect_guidance(self, client):
+        with client.websocket_connect(f"/ws/chat?room={ROOM}") as websocket:
+            hello = json.loads(websocket.receive_text())
+            assert hello["reconnect"]["jitter"] == "full"
+            assert hello["reconnect"]["base_ms"] <= hello["reconnect"]["max_ms"]
+
+    def test_last_id_receives_only_missed_messages(self, client):
+        with client.websocket_connect(f"/ws/chat?room={ROOM}&last_id=117") as websocket:
+            delta = join(websocket)
+            assert delta["type"] == "delta"
+            assert ids(delta) == [118, 119, 120]
+
+    def test_up_to_date_client_gets_empty_delta(self, client):
+        with client.websocket_connect(f"/ws/chat?room={ROOM}&last_id=120") as websocket:
+            assert join(websocket) == {"type": "delta", "messages": [], "before": None}
+
+    def test_gap_too_large_resets(self, client):
+        with client.websocket_connect(f"/ws/chat?room={ROOM}&last_id=3") as websocket:
+            reset = join(websocket)
+            assert reset["type"] == "reset"
+            assert ids(reset) == list(range(71, 121))
+
+
+class TestProtocolV2:
+    def test_negotiates_subprotocol_and_sends_records(self, client):
+        with client.websocket_connect(f"/ws/chat?room={ROOM}", subprotocols=[PROTOCOL_V2]) as websocket:
+            assert websocket.accepted_subprotocol == PROTOCOL_V2
+            hello = json.loads(websocket.receive_text())
+            assert hello["protocol"] == 2
+            assert "username" in hello
+            history = json.loads(websocket.receive_text())
+            assert ids(history) == list(range(71, 121))
+            record = history["messages"][-1]
+            assert set(record) == {"id", "u", "h", "t", "c"}
+            assert record["u"] == "alice"
+            assert record["t"] == int((START + timedelta(minutes=120)).replace(tzinfo=timezone.utc).timestamp() * 1000)
+            assert "message 120" in record["c"]
+
+    def test_older_pages_use_records(self, client):
+        with client.websocket_connect(f"/ws/chat?room={ROOM}", subprotocols=[PROTOCOL_V2]) as websocket:
+            join(websocket)
+            websocket.send_text(json.dumps({"type": "history", "before": 71}))
+            older = json.loads(websocket.receive_text())
+            assert "html" not in older["messages"][0]
+            assert ids(older) == list(range(21, 71))
+
+    def test_msgpack_frames_are_binary(self, client):
+        msgpack = pytest.importorskip("msgpack")
+        with client.websocket_connect(f"/ws/chat?room={ROOM}", subprotocols=[PROTOCOL_V2_MSGPACK]) as websocket:
+            assert websocket.accepted_subprotocol == PROTOCOL_V2_MSGPACK
+            assert msgpack.unpackb(websocket.receive_bytes())["type"] == "hello"
+            assert ids(msgpack.unpackb(websocket.receive_bytes())) == list(range(71, 121))
+
+    def test_v1_is_unchanged(self, client):
+        with client.websocket_connect(f"/ws/chat?room={ROOM}") as websocket:
+            assert websocket.accepted_subprotocol is None
+            assert json.loads(websocket.receive_text())["protocol"] == 1
+            assert "html" in json.loads(websocket.receive_text())["messages"][0]
+
+
+class TestSessions:
+    def test_open_socket_holds_no_connection(self, client):
+        engine = services.read_session_maker.kw["bind"]
+        with client.websocket_connect(f"/ws/chat?room={ROOM}") as websocket:
+            join(websocket)
+            websocket.send_text(json.dumps({"type": "history", "before": 71}))
+            json.loads(websocket.receive_text())
+            assert engine.pool.checkedout() == 0
+
+
+class TestShardedHistory:
+    def test_front_worker_reads_unowned_rooms_from_the_database(self, client, monkeypatch):
+        monkeypatch.setattr(services, "owns_room", lambda room: False)
+        data = client.get("/api/chat/history", params={"room": ROOM}).json()
+        assert ids(data) == list(range(71, 121))
+        assert ROOM not in services.history_snapshots
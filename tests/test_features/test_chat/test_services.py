@@ -0,0 +1,86 @@
+import pytest
+from datetime import datetime, timezone
+
+from blog_chat.features.accounts.models import User  # noqa: F401  (registers the Message.user target)
+from blog_chat.features.chat import services
+from blog_chat.features.chat.fragments import MessageFragmentCache
+from blog_chat.features.chat.models import Message
+
+
+def make_message(id: int = 1, content: str = "hello **world**") -> Message:
+    return Message(
+        id=id,
+        room_slug="offtopic",
+        username="alice",
+        content=content,
+        timestamp=datetime.now(timezone.utc).replace(tzinfo=None),
+    )
+
+
+class TestMessageFragmentCache:
+    def test_get_or_render_renders_once(self):
+        cache = MessageFragmentCache()
+        calls = []
+        render = lambda: calls.append(1) or "<p>x</p>"
+        assert cache.get_or_render("key", render) == "<p>x</p>"
+        assert cache.get_or_render("key", render) == "<p>x</p>"
+        assert len(calls) == 1
+
+    def test_evicts_least_recently_used(self):
+        cache = MessageFragmentCache(max_entries=2)
+        cache.put("a", "1")
+        cache.put("b", "2")
+        cache.get("a")
+        cache.put("c", "3")
+        assert cache.get("b") is None
+        assert cache.get("a") == "1"
+
+
+class TestRenderMessage:
+    def setup_method(self):
+        services.message_fragments.clear()
+
+    def test_variants_are_rendered_once(self, monkeypatch):
+        message = make_message()
+        services.prime_message(message)
+        assert len(services.message_fragments) == 2
+        monkeypatch.setattr(services, "render_fragment", lambda *args, **kwargs: pytest.fail("rendered"))
+        own = services.render_message(message, True)
+        other = services.render_message(message, False)
+        assert "chat-bubble-primary" in own
+        assert "chat-bubble-secondary" in other
+        assert "<strong>world</strong>" in own
+
+    def test_time_label_is_part_of_the_key(self):
+        message = make_message()
+        services.render_message(message, True)
+        message.timestamp = datetime(2020, 1, 1)
+        assert "years ago" in services.render_message(message, True)
+        assert len(services.message_fragments) == 2
+
+    def test_username_color_is_stable(self):
+        assert services.get_username_color("alice") == services.get_username_color("alice")
+
+
+class FailingBackplane:
+    async def publish(self, event: dict):
+        raise ConnectionError("broker down")
+
+
+@pytest.mark.asyncio
+class TestPublishFallback:
+    async def test_delivers_locally_when_backplane_fails(self, monkeypatch):
+        delivered = []
+
+        async def deliver(event):
+            delivered.append(event)
+
+        async def send(*args, **kwargs):
+            pass
+
+        monkeypatch.setattr(services, "backplane", FailingBackplane())
+        monkeypatch.setattr(services, "deliver_event", deliver)
+        monkeypatch.setattr(services.manager, "send", send)
+        sender = type("Sender", (), {"id": "abc", "websocket": None, "room": "offtopic"})()
+        await services.publish_message(make_message(), sender)
+        assert delivered[0]["sender"] == "abc"
@@ -0,0 +1,101 @@
+import asyncio
+import threading
+from collections import Counter
+
+import pytest
+from fastapi import FastAPI, WebSocket
+from fastapi.testclient import TestClient
+from websockets.asyncio.server import unix_serve
+
+from blog_chat.features.chat import sharding
+from blog_chat.features.chat.sharding import owns_room, proxy_websocket, shard_for, shard_socket
+from blog_chat.supervisor import build_children
+
+
+class TestShardFor:
+    def test_is_stable_and_in_range(self):
+        assert shard_for("offtopic", 4) == shard_for("offtopic", 4)
+        assert all(0 <= shard_for(f"room-{i}", 4) < 4 for i in range(100))
+
+    def test_spreads_rooms(self):
+        counts = Counter(shard_for(f"room-{i}", 4) for i in range(4000))
+        assert len(counts) == 4
+        assert min(counts.values()) > 800
+
+    def test_unsharded_process_owns_every_room(self, monkeypatch):
+        monkeypatch.setattr(sharding, "CHAT_SHARDS", 0)
+        assert owns_room("anything")
+
+    def test_front_owns_no_room(self, monkeypatch):
+        monkeypatch.setattr(sharding, "CHAT_SHARDS", 4)
+        monkeypatch.setattr(sharding, "CHAT_SHARD_INDEX", None)
+        assert not owns_room("offtopic")
+        monkeypatch.setattr(sharding, "CHAT_SHARD_INDEX", shard_for("offtopic", 4))
+        assert owns_room("offtopic")
+
+
+@pytest.fixture
+def shard(tmp_path):
+    """An upstream that echoes frames back with the request path and cookie."""
+    path = tmp_path / "chat-0.sock"
+    ready = threading.Event()
+    loop = asyncio.new_event_loop()
+    stop = loop.create_future()
+
+    async def echo(connection):
+        request = connection.request
+        await connection.send(f"{request.path} {request.headers.get('cookie')} {connection.subprotocol}")
+        async for message in connection:
+            await connection.send(message)
+
+    async def serve():
+        async with unix_serve(echo, str(path), subprotocols=["blog-chat.v2"]):
+            ready.set()
+            await stop
+
+    thread = threading.Thread(target=loop.run_until_complete, args=(serve(),))
+    thread.start()
+    ready.wait()
+    yield path
+    loop.call_soon_threadsafe(stop.set_result, None)
+    thread.join()
+    loop.close()
+
+
+def proxy_app(socket_path) -> FastAPI:
+    app = FastAPI()
+
+    @app.websocket("/ws/chat")
+    async def endpoint(websocket: WebSocket):
+        await proxy_websocket(websocket, socket_path)
+
+    return app
+
+
+class TestProxy:
+    def test_relays_frames_both_ways(self, shard):
+        client = TestClient(proxy_app(shard))
+        client.cookies.set("chat_token", "abc")
+        with client.websocket_connect("/ws/chat?room=r", subprotocols=["blog-chat.v2"]) as websocket:
+            assert websocket.accepted_subprotocol == "blog-chat.v2"
+            assert websocket.receive_text() == "/ws/chat?room=r chat_token=abc blog-chat.v2"
+            websocket.send_text("hello")
+            assert websocket.receive_text() == "hello"
+            websocket.send_bytes(b"\x01\x02")
+            assert websocket.receive_bytes() == b"\x01\x02"
+
+    def test_unavailable_shard_closes(self, tmp_path):
+        client = TestClient(proxy_app(tmp_path / "missing.sock"))
+        with pytest.raises(Exception):
+            with client.websocket_connect("/ws/chat?room=r") as websocket:
+                websocket.receive_text()
+
+
+class TestSupervisor:
+    def test_one_process_per_shard_plus_front(self, tmp_path):
+        children = build_children(3, "127.0.0.1", 9091, 2, tmp_path)
+        assert [child.name for child in children] == ["shard-0", "shard-1", "shard-2", "front"]
+        assert children[1].env["CHAT_SHARD_INDEX"] == "1"
+        assert str(shard_socket(1, tmp_path)) in children[1].argv
+        assert "CHAT_SHARD_INDEX" not in children[-1].env
+        assert children[-1].argv[-2:] == ["--workers", "2"]
@@ -0,0 +1,113 @@
+import asyncio
+
+import pytest
+
+from blog_chat.features.chat.protocol import PROTOCOL_V2
+from blog_chat.features.chat.websocket import SLOW_CONSUMER_CLOSE_CODE, ConnectionManager
+
+
+class FakeWebSocket:
+    def __init__(self, block: bool = False, fail: bool = False):
+        self.sent: list[str] = []
+        self.block = asyncio.Event() if block else None
+        self.fail = fail
+        self.closed_with = None
+
+    async def accept(self, subprotocol=None):
+        pass
+
+    async def send_text(self, data: str):
+        if self.fail:
+            raise RuntimeError("socket closed")
+        if self.block:
+            await self.block.wait()
+        self.sent.append(data)
+
+    async def close(self, code: int = 1000):
+        self.closed_with = code
+
+
+async def settle():
+    for _ in range(5):
+        await asyncio.sleep(0)
+
+
+@pytest.mark.asyncio
+class TestConnectionManager:
+    async def test_broadcast_encodes_once(self):
+        manager = ConnectionManager()
+        sockets = [FakeWebSocket() for _ in range(3)]
+        connections = [await manager.connect(socket, "room") for socket in sockets]
+        await manager.broadcast({"type": "message", "id": 1}, "room", exclude=connections[0].id)
+        await settle()
+        assert sockets[0].sent == []
+        assert sockets[1].sent == ['{"type":"message","id":1}']
+        assert sockets[1].sent[0] is sockets[2].sent[0]
+
+    async def test_broadcast_sends_each_protocol_its_variant(self):
+        manager = ConnectionManager()
+        v1, v2 = FakeWebSocket(), FakeWebSocket()
+        await manager.connect(v1, "room")
+        await manager.connect(v2, "room", PROTOCOL_V2)
+        await manager.broadcast({"html": "<p>hi</p>"}, "room", variants={PROTOCOL_V2: {"c": "hi"}})
+        await settle()
+        assert v1.sent == ['{"html":"<p>hi</p>"}']
+        assert v2.sent == ['{"c":"hi"}']
+
+    async def test_slow_consumer_drops_oldest(self):
+        manager = ConnectionManager(queue_size=2)
+        slow, fast = FakeWebSocket(block=True), FakeWebSocket()
+        await manager.connect(slow, "room")
+        await manager.connect(fast, "room")
+        await manager.broadcast("0", "room")
+        await settle()
+        for i in range(1, 5):
+            await manager.broadcast(str(i), "room")
+            await settle()
+        assert fast.sent == ["0", "1", "2", "3", "4"]
+        slow.block.set()
+        await settle()
+        assert slow.sent == ["0", "3", "4"]
+
+    async def test_slow_consumer_disconnect_policy(self):
+        manager = ConnectionManager(queue_size=1, slow_consumer_policy="disconnect")
+        slow = FakeWebSocket(block=True)
+        await manager.connect(slow, "room")
+        for i in range(3):
+            await manager.broadcast(str(i), "room")
+        await settle()
+        assert slow.closed_with == SLOW_CONSUMER_CLOSE_CODE
+        assert "room" not in manager.active_connections
+
+    async def test_slow_consumer_closed_once(self):
+        manager = ConnectionManager(queue_size=1, slow_consumer_policy="disconnect")
+        slow = FakeWebSocket(block=True)
+        connection = await manager.connect(slow, "room")
+        closes = []
+        original = manager._close_slow
+
+        async def counting(connection):
+            closes.append(connection)
+            await original(connection)
+
+        manager._close_slow = counting
+        for i in range(10):
+            manager._offer(connection, str(i))
+        assert connection.closing
+        await settle()
+        assert len(closes) == 1
+        assert not manager._closing
+
+    async def test_failed_socket_is_removed(self):
+        manager = ConnectionManager()
+        broken, healthy = FakeWebSocket(fail=True), FakeWebSocket()
+        await manager.connect(broken, "room")
+        await manager.connect(healthy, "room")
+        await manager.broadcast("hello", "room")
+        await settle()
+        assert list(manager.active_connections["room"]) == [healthy]
+        assert healthy.sent == ["hello"]
+
+    async def test_rejects_unknown_policy(self):
+        with pytest.raises(ValueError):
+            ConnectionManager(slow_consumer_policy="block")
@@ -0,0 +1,116 @@
+import asyncio
+
+import pytest
+import pytest_asyncio
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+
+from blog_chat.core.base import Base
+from blog_chat.features.accounts.models import User  # noqa: F401  (registers the Message.user target)
+from blog_chat.features.chat.models import Message
+from blog_chat.features.chat import writer as writer_module
+from blog_chat.features.chat.writer import MessageWriter, reserve_id_block
+
+
+@pytest_asyncio.fixture
+async def session_maker(tmp_path):
+    engine = create_async_engine(f"sqlite+aiosqlite:///{tmp_path / 'chat.db'}")
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+    yield async_sessionmaker(engine, expire_on_commit=False)
+    await engine.dispose()
+
+
+async def count_messages(session_maker) -> int:
+    async with session_maker() as session:
+        return await session.scalar(select(func.count(Message.id)))
+
+
+@pytest.mark.asyncio
+class TestMessageWriter:
+    async def test_batches_and_drains_on_stop(self, session_maker):
+        writer = MessageWriter(session_maker, max_batch=10, max_delay=60)
+        flushes = []
+        flush = writer._flush
+
+        async def counting_flush(batch):
+            flushes.append(len(batch))
+            return await flush(batch)
+
+        writer._flush = counting_flush
+        await writer.start()
+        messages = [await writer.create("room", "alice", f"message {i}") for i in range(25)]
+        await asyncio.sleep(0.05)
+        assert flushes == [10, 10]
+        await writer.stop()
+        assert flushes == [10, 10, 5]
+        assert await count_messages(session_maker) == 25
+        assert [m.id for m in messages] == list(range(1, 26))
+        assert all(m.timestamp is not None for m in messages)
+
+    async def test_flushes_after_max_delay(self, session_maker):
+        writer = MessageWriter(session_maker, max_delay=0.01)
+        await writer.start()
+        await writer.create("room", "alice", "hello")
+        await asyncio.sleep(0.2)
+        assert await count_messages(session_maker) == 1
+        await writer.stop()
+
+    async def test_writes_directly_when_not_started(self, session_maker):
+        await MessageWriter(session_maker).create("room", "alice", "hello")
+        assert await count_messages(session_maker) == 1
+
+    async def test_id_blocks_do_not_overlap(self, session_maker):
+        async with session_maker() as session, session.begin():
+            session.add(Message(id=41, room_slug="room", username="alice", content="legacy"))
+        blocks = await asyncio.gather(*(reserve_id_block(session_maker, 100) for _ in range(3)))
+        ids = sorted(i for block in blocks for i in block)
+        assert ids[0] == 42
+        assert len(set(ids)) == 300
+
+    async def test_failed_rows_are_retried_with_later_ones(self, session_maker, monkeypatch):
+        monkeypatch.setattr(writer_module, "FLUSH_RETRY_DELAY", 0.01)
+        writer = MessageWriter(session_maker, max_delay=0.01)
+        flush = writer._flush
+        failures = [OSError("database is down")] * 2
+
+        async def flaky_flush(batch):
+            if failures:
+                raise failures.pop()
+            return await flush(batch)
+
+        writer._flush = flaky_flush
+        await writer.start()
+        await writer.create("room", "alice", "first")
+        await asyncio.sleep(0.05)
+        await writer.create("room", "alice", "second")
+        for _ in range(50):
+            if not writer.pending:
+                break
+            await asyncio.sleep(0.02)
+        assert await count_messages(session_maker) == 2
+        await writer.stop()
+
+    async def test_retained_rows_are_bounded(self, session_maker):
+        writer = MessageWriter(session_maker, max_retained=2)
+        writer._retain([{"id": i} for i in range(5)])
+        assert [row["id"] for row in writer._failed] == [3, 4]
+
+    async def test_rows_already_written_are_skipped(self, session_maker):
+        writer = MessageWriter(session_maker)
+        first = await writer.create("room", "alice", "hello")
+        row = {"id": first.id, "room_slug": "room", "username": "alice", "content": "hello",
+               "timestamp": first.timestamp, "ip_address": None}
+        await writer._flush([row, {**row, "id": first.id + 1}])
+        assert await count_messages(session_maker) == 2
+
+    async def test_rejected_rows_are_kept_not_dropped(self, session_maker, caplog):
+        writer = MessageWriter(session_maker)
+        first = await writer.create("room", "alice", "hello")
+        row = {"id": first.id + 1, "room_slug": "room", "username": "alice", "content": "hi",
+               "timestamp": first.timestamp, "ip_address": None}
+        bad = {**row, "id": first.id + 2, "content": None}
+        await writer._write([row, bad])
+        assert await count_messages(session_maker) == 2
+        assert writer._failed == [bad]
+        assert any(str(bad["id"]) in record.getMessage() for record in caplog.records)
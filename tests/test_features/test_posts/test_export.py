@@ -0,0 +1,59 @@
+import gzip
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from blog_chat.export import export_site
+from blog_chat.features.posts import routes
+from blog_chat.features.posts.prerender import INDEX_ARTIFACT, PrerenderedSite, post_artifact
+from blog_chat.features.posts.services import get_posts
+
+
+@pytest.fixture
+def exported(tmp_path):
+    output = tmp_path / "site"
+    export_site(output)
+    return output
+
+
+class TestExportSite:
+    def test_writes_pages_and_gzip_variants(self, exported):
+        for name in ["index.html", "sitemap.xml", "robots.txt"]:
+            assert (exported / name).is_file()
+            assert gzip.decompress((exported / f"{name}.gz").read_bytes()) == (exported / name).read_bytes()
+        for post in get_posts():
+            assert (exported / post_artifact(post.slug)).is_file()
+
+    def test_post_slug_cannot_overwrite_site_artifacts(self):
+        assert post_artifact("index") != INDEX_ARTIFACT
+
+    def test_replaces_previous_export(self, exported):
+        (exported / "stale.html").write_text("old")
+        export_site(exported)
+        assert not (exported / "stale.html").exists()
+
+
+class TestPrerenderedRoutes:
+    @pytest.fixture
+    def client(self, exported, monkeypatch):
+        monkeypatch.setattr(routes, "prerendered", PrerenderedSite(exported))
+        app = FastAPI()
+        app.include_router(routes.router)
+        return TestClient(app)
+
+    def test_serves_gzip_artifact_to_anonymous_visitors(self, client, exported):
+        (exported / "index.html.gz").write_bytes(gzip.compress(b"prerendered"))
+        response = client.get("/", headers={"Accept-Encoding": "gzip"})
+        assert response.headers["content-encoding"] == "gzip"
+        assert response.text == "prerendered"
+
+    def test_falls_back_to_rendering_for_unknown_slug(self, client):
+        response = client.get("/does-not-exist")
+        assert response.status_code == 404
+
+    def test_index_slug_does_not_serve_the_listing(self, client):
+        response = client.get("/index")
+        assert response.status_code == 404
+
+    def test_rejects_paths_outside_directory(self, exported):
+        site = PrerenderedSite(exported)
+        assert site.response(None, "../outside.html", "text/html") is None
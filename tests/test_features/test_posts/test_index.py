@@ -0,0 +1,117 @@
+import os
+import pytest
+from pathlib import Path
+from blog_chat.features.posts.index import PostIndex
+
+
+def write_post(directory: Path, name: str, slug: str, created: str, body: str = "Body") -> Path:
+    path = directory / f"{name}.md"
+    path.write_text(
+        f"---\ntitle: {name}\nslug: {slug}\ncreated: {created}\n---\n\n{body}",
+        encoding="utf-8",
+    )
+    return path
+
+
+class TestPostIndex:
+    def test_listing_is_sorted_newest_first(self, tmp_path):
+        write_post(tmp_path, "old", "old", "2024-01-01")
+        write_post(tmp_path, "new", "new", "2025-01-01")
+        index = PostIndex(tmp_path)
+        assert [p.slug for p in index.get_posts()] == ["new", "old"]
+
+    def test_get_post_by_slug(self, tmp_path):
+        write_post(tmp_path, "first", "first-post", "2024-01-01")
+        index = PostIndex(tmp_path)
+        assert index.get_post("first-post")["title"] == "first"
+        assert index.get_post("missing") is None
+
+    def test_unchanged_files_are_not_reparsed(self, tmp_path):
+        write_post(tmp_path, "first", "first", "2024-01-01")
+        index = PostIndex(tmp_path, rescan_interval=0)
+        post = index.get_post("first")
+        version = index.version
+        assert index.get_post("first") is post
+        assert index.version == version
+
+    def test_modified_file_is_revalidated(self, tmp_path):
+        path = write_post(tmp_path, "first", "first", "2024-01-01")
+        index = PostIndex(tmp_path, rescan_interval=3600)
+        assert index.get_post("first")["content"] == "Body"
+        write_post(tmp_path, "first", "first", "2024-01-01", body="Changed body")
+        os.utime(path, ns=(0, 10**18))
+        assert index.get_post("first")["content"] == "Changed body"
+
+    def test_new_and_deleted_files_after_rescan(self, tmp_path):
+        path = write_post(tmp_path, "first", "first", "2024-01-01")
+        index = PostIndex(tmp_path, rescan_interval=0)
+        assert len(index.get_posts()) == 1
+        write_post(tmp_path, "second", "second", "2024-02-01")
+        assert index.get_post("second") is not None
+        path.unlink()
+        assert index.get_post("first") is None
+        assert [p.slug for p in index.get_posts()] == ["second"]
+
+    def test_reload_only_touches_given_paths(self, tmp_path):
+        write_post(tmp_path, "first", "first", "2024-01-01")
+        index = PostIndex(tmp_path, rescan_interval=3600)
+        index.get_posts()
+        second = write_post(tmp_path, "second", "second", "2024-02-01")
+        assert index.reload([second])
+        assert index.get_post("second") is not None
+
+    def test_listing_holds_metadata_only(self, tmp_path):
+        write_post(tmp_path, "first", "first", "2024-01-01", body="x" * 10_000)
+        index = PostIndex(tmp_path)
+        (meta,) = index.get_posts()
+        assert not hasattr(meta, "content")
+        assert index.get_post("first")["content"] == "x" * 10_000
+
+    def test_loaded_posts_are_bounded(self, tmp_path):
+        for i in range(3):
+            write_post(tmp_path, f"p{i}", f"p{i}", "2024-01-01")
+        index = PostIndex(tmp_path, rescan_interval=3600, max_loaded_posts=2)
+        for i in range(3):
+            index.get_post(f"p{i}")
+        assert len(index._loaded) == 2
+
+    def test_cursor_pagination(self, tmp_path):
+        for day in range(1, 6):
+            write_post(tmp_path, f"p{day}", f"p{day}", f"2024-01-0{day}")
+        index = PostIndex(tmp_path)
+        page, cursor = index.get_page(limit=2)
+        assert [p.slug for p in page] == ["p5", "p4"]
+        page, cursor = index.get_page(cursor, limit=2)
+        assert [p.slug for p in page] == ["p3", "p2"]
+        page, cursor = index.get_page(cursor, limit=2)
+        assert [p.slug for p in page] == ["p1"]
+        assert cursor is None
+        assert index.get_page("unknown") == ([], None)
+
+    def test_malformed_frontmatter_is_skipped(self, tmp_path):
+        write_post(tmp_path, "good", "good", "2024-01-01")
+        (tmp_path / "bad-yaml.md").write_text("---\ntitle: [unclosed\n---\n\nBody", encoding="utf-8")
+        (tmp_path / "not-mapping.md").write_text("---\n- a\n- b\n---\n\nBody", encoding="utf-8")
+        index = PostIndex(tmp_path)
+        assert [p.slug for p in index.get_posts()] == ["good"]
+
+    def test_unreadable_file_does_not_churn_snapshot(self, tmp_path):
+        write_post(tmp_path, "good", "good", "2024-01-01")
+        (tmp_path / "bad.md").write_text("---\ntitle: [unclosed\n---\n", encoding="utf-8")
+        index = PostIndex(tmp_path, rescan_interval=3600)
+        digest = index.digest
+        assert not index.refresh()
+        assert index.digest == digest
+
+    def test_failed_file_is_retried_only_when_changed(self, tmp_path, caplog):
+        bad = tmp_path / "bad.md"
+        bad.write_text("---\ntitle: [unclosed\n---\n", encoding="utf-8")
+        index = PostIndex(tmp_path, rescan_interval=3600)
+        index.get_posts()
+        index.refresh()
+        index.refresh()
+        assert len([r for r in caplog.records if "bad.md" in r.getMessage()]) == 1
+        write_post(tmp_path, "bad", "fixed", "2024-01-01")
+        os.utime(bad, ns=(0, 10**18))
+        index.refresh()
+        assert index.get_post("fixed") is not None
@@ -1,7 +1,7 @@
 import pytest
 import tempfile
 from pathlib import Path
-from blog_chat.features.posts.parser import parse_markdown_file
+from blog_chat.features.posts.parser import PostMeta, parse_markdown_file, parse_markdown_meta
 
 
 class TestParseMarkdownFile:
@@ -52,3 +52,43 @@ class TestParseMarkdownFile:
                 assert result["content"] == "Content"
             finally:
                 Path(f.name).unlink()
+
+
+class TestParseMarkdownMeta:
+    def test_reads_frontmatter_only(self, tmp_path):
+        path = tmp_path / "post.md"
+        path.write_text("---\ntitle: Test Post\nslug: test-post\ntags: [python, test]\ncreated: 2024-01-01\n---\n\nThis is the content.")
+        meta = parse_markdown_meta(path)
+        assert isinstance(meta, PostMeta)
+        assert meta.title == "Test Post"
+        assert meta.slug == "test-post"
+        assert meta.tags == ("python", "test")
+        assert str(meta.created) == "2024-01-01"
+        assert not hasattr(meta, "content")
+
+    def test_without_frontmatter_uses_filename(self, tmp_path):
+        path = tmp_path / "plain.md"
+        path.write_text("Just some content.\n---\ntitle: not frontmatter\n---\n")
+        meta = parse_markdown_meta(path)
+        assert meta.title == "plain"
+        assert meta.slug == "plain"
+        assert meta.tags == ()
+
+    def test_matches_full_parser(self, tmp_path):
+        path = tmp_path / "post.md"
+        path.write_text("---\ntitle: Same\ndescription: Desc\ntags: solo\nupdated: 2024-02-02\n---\nBody")
+        meta = parse_markdown_meta(path)
+        full = parse_markdown_file(path)
+        assert (meta.title, meta.slug, meta.description, meta.updated) == (
+            full["title"], full["slug"], full["description"], full["updated"])
+        assert meta.tags == ("solo",)
+
+    def test_crlf_line_endings(self, tmp_path):
+        path = tmp_path / "file-name.md"
+        path.write_bytes(b"---\r\ntitle: Windows\r\nslug: real-slug\r\n---\r\n\r\nBody\r\n")
+        meta = parse_markdown_meta(path)
+        assert (meta.title, meta.slug) == ("Windows", "real-slug")
+        assert meta.slug == parse_markdown_file(path)["slug"]
+
+    def test_is_slotted(self):
+        assert not hasattr(PostMeta("t", "s", ()), "__dict__")
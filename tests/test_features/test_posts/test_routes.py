@@ -0,0 +1,148 @@
+from email.utils import parsedate_to_datetime
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from blog_chat.features.posts import routes
+from blog_chat.features.posts.index import PostIndex
+from blog_chat.features.posts.services import get_posts
+
+
+@pytest.fixture
+def client():
+    app = FastAPI()
+    app.include_router(routes.router)
+    return TestClient(app)
+
+
+class TestConditionalRequests:
+    @pytest.mark.parametrize("path", ["/", "/sitemap.xml", "/robots.txt"])
+    def test_matching_etag_returns_304(self, client, path):
+        response = client.get(path)
+        assert response.status_code == 200
+        etag = response.headers["etag"]
+        cached = client.get(path, headers={"If-None-Match": etag})
+        assert cached.status_code == 304
+        assert cached.content == b""
+        assert cached.headers["etag"] == etag
+
+    def test_post_page_has_validators(self, client):
+        slug = get_posts()[0].slug
+        response = client.get(f"/{slug}")
+        assert "last-modified" in response.headers
+        cached = client.get(f"/{slug}", headers={"If-Modified-Since": response.headers["last-modified"]})
+        assert cached.status_code == 304
+
+    @pytest.mark.parametrize("path", ["/", "/sitemap.xml"])
+    def test_listing_ignores_if_modified_since(self, client, path):
+        response = client.get(path)
+        assert "last-modified" not in response.headers
+        far_future = "Fri, 01 Jan 2100 00:00:00 GMT"
+        assert client.get(path, headers={"If-Modified-Since": far_future}).status_code == 200
+
+    def test_post_last_modified_follows_file_and_restart(self, client):
+        entry = routes.post_index.get_entry(get_posts()[0].slug)
+        response = client.get(f"/{entry.slug}")
+        modified = parsedate_to_datetime(response.headers["last-modified"])
+        assert modified >= max(entry.file_modified, routes.rendered_since).replace(microsecond=0)
+
+    def test_etag_varies_by_user(self, client, monkeypatch):
+        anonymous = client.get("/").headers["etag"]
+        monkeypatch.setattr(routes, "get_username_from_cookie", lambda request: "alice")
+        assert client.get("/").headers["etag"] != anonymous
+
+
+class TestSearch:
+    def test_htmx_request_gets_fragment(self, client):
+        response = client.get("/search", params={"q": "blog"}, headers={"HX-Request": "true"})
+        assert response.status_code == 200
+        assert "search-results" in response.text
+        assert "<html" not in response.text
+
+    def test_full_page_without_htmx(self, client):
+        response = client.get("/search", params={"q": "blog"})
+        assert "<html" in response.text
+        assert get_posts()[0].title in response.text
+
+
+class TestPagination:
+    @pytest.fixture
+    def paged(self, tmp_path, monkeypatch):
+        for day in range(1, 6):
+            (tmp_path / f"p{day}.md").write_text(
+                f"---\ntitle: Post {day}\nslug: p{day}\ncreated: 2024-01-0{day}\n---\nBody")
+        index = PostIndex(tmp_path)
+        monkeypatch.setattr(routes, "post_index", index)
+        monkeypatch.setattr(routes, "get_posts_page", index.get_page)
+        monkeypatch.setattr(routes, "POSTS_PAGE_SIZE", 2)
+
+    def test_first_page_links_to_next(self, client, paged):
+        response = client.get("/")
+        assert "Post 5" in response.text and "Post 4" in response.text
+        assert "Post 3" not in response.text
+        assert "/posts/more?after=p4" in response.text
+
+    def test_after_cursor_page(self, client, paged):
+        response = client.get("/", params={"after": "p4"})
+        assert "Post 3" in response.text and "Post 5" not in response.text
+
+    def test_load_more_fragment(self, client, paged):
+        response = client.get("/posts/more", params={"after": "p2"})
+        assert "Post 1" in response.text
+        assert "<html" not in response.text
+        assert "load-more" not in response.text
+
+    def test_unknown_cursor_is_not_found(self, client, paged):
+        assert client.get("/posts/more", params={"after": "gone"}).status_code == 404
+        response = client.get("/", params={"after": "gone"})
+        assert response.status_code == 404
+        assert "Post 5" in response.text
+
+    def test_streamed_index(self, client, paged, monkeypatch):
+        monkeypatch.setattr(routes, "STREAM_PAGES", True)
+        response = client.get("/")
+        assert response.status_code == 200
+        assert "Post 5" in response.text
+        assert "etag" in response.headers
+
+
+class TestCanonicalUrl:
+    def test_uses_site_url_not_request_host(self, client):
+        slug = get_posts()[0].slug
+        response = client.get(f"/{slug}", headers={"Host": "evil.example"})
+        assert f"{routes.SITE_URL}/{slug}" in response.text
+        assert "evil.example" not in response.text
+
+
+class TestSitemap:
+    def test_precompressed_response(self, client):
+        response = client.get("/sitemap.xml", headers={"Accept-Encoding": "gzip"})
+        assert response.headers["content-encoding"] == "gzip"
+        assert response.text.startswith("<?xml")
+
+    def test_identity_has_different_etag(self, client):
+        gzipped = client.get("/sitemap.xml", headers={"Accept-Encoding": "gzip"})
+        identity = client.get("/sitemap.xml", headers={"Accept-Encoding": "identity"})
+        assert "content-encoding" not in identity.headers
+        assert gzipped.headers["etag"] != identity.headers["etag"]
+
+    def test_missing_part_is_404(self, client):
+        assert client.get("/sitemap-9.xml").status_code == 404
+
+
+class TestResponseCache:
+    def test_second_request_skips_rendering(self, client, monkeypatch):
+        routes.response_cache.invalidate()
+        client.get("/")
+        monkeypatch.setattr(routes.templates, "get_template", lambda name: pytest.fail("rendered"))
+        response = client.get("/")
+        assert response.status_code == 200
+        assert "Blog Posts" in response.text
+
+    def test_content_change_invalidates_listing_pages(self, client):
+        client.get("/")
+        slug = get_posts()[0].slug
+        client.get(f"/{slug}")
+        routes.invalidate_pages([], [])
+        assert ("post", slug, None) in routes.response_cache._entries
+        assert ("index", None, None) not in routes.response_cache._entries
@@ -0,0 +1,74 @@
+import pytest
+from pathlib import Path
+from blog_chat.features.posts.index import PostIndex
+from blog_chat.features.posts.search import SearchIndex, tokenize
+
+
+def post(slug, title="", content="", tags=None, description=None):
+    return {"slug": slug, "title": title or slug, "content": content,
+            "tags": tags or [], "description": description}
+
+
+class TestTokenize:
+    def test_lowercases_and_splits_on_punctuation(self):
+        assert tokenize("Hello, World! blog-chat") == ["hello", "world", "blog", "chat"]
+
+
+class TestSearchIndex:
+    def test_title_match_outranks_body_match(self):
+        index = SearchIndex()
+        index.add("body", post("body", "Other", "python is mentioned here once"))
+        index.add("title", post("title", "Python tips", "nothing else"))
+        assert [hit.slug for hit in index.search("python")] == ["title", "body"]
+
+    def test_no_match_and_empty_query(self):
+        index = SearchIndex()
+        index.add("a", post("a", content="hello"))
+        assert index.search("missing") == []
+        assert index.search("  ") == []
+
+    def test_remove_and_replace(self):
+        index = SearchIndex()
+        index.add("a", post("a", content="alpha"))
+        index.add("a", post("a", content="beta"))
+        assert index.search("alpha") == []
+        assert index.search("beta")[0].slug == "a"
+        index.remove("a")
+        assert index.search("beta") == []
+        assert len(index) == 0
+
+    def test_roundtrip_preserves_results(self, tmp_path):
+        index = SearchIndex()
+        index.add("a", post("a", "Alpha", "shared words"), digest="d1")
+        index.add("b", post("b", "Beta", "shared things"), digest="d2")
+        index.save(tmp_path / "search.idx")
+
+        loaded = SearchIndex()
+        assert loaded.load(tmp_path / "search.idx")
+        assert [h.slug for h in loaded.search("shared")] == [h.slug for h in index.search("shared")]
+        assert loaded.digest("a") == "d1"
+        loaded.remove("a")
+        assert [h.slug for h in loaded.search("shared")] == ["b"]
+
+    def test_load_missing_file(self, tmp_path):
+        assert not SearchIndex().load(tmp_path / "missing")
+
+
+class TestPostIndexIntegration:
+    def test_follows_content_changes(self, tmp_path):
+        path = tmp_path / "first.md"
+        path.write_text("---\ntitle: First\n---\n\nkangaroo", encoding="utf-8")
+        posts = PostIndex(tmp_path, rescan_interval=0)
+        search = SearchIndex()
+        posts.subscribe(search.apply)
+        posts.get_posts()
+        assert search.search("kangaroo")[0].slug == "first"
+
+        path.write_text("---\ntitle: First\n---\n\nwombat", encoding="utf-8")
+        posts.reload([path])
+        assert search.search("kangaroo") == []
+        assert search.search("wombat")[0].slug == "first"
+
+        path.unlink()
+        posts.get_posts()
+        assert search.search("wombat") == []
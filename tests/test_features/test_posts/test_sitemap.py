@@ -0,0 +1,51 @@
+import gzip
+import pytest
+from blog_chat.features.posts.index import PostIndex
+from blog_chat.features.posts.sitemap import SITEMAP_NAME, SitemapCache
+
+
+@pytest.fixture
+def index(tmp_path):
+    for day in range(1, 6):
+        (tmp_path / f"p{day}.md").write_text(
+            f"---\ntitle: Post {day}\nslug: p{day}\ncreated: 2024-01-0{day}\n---\nBody")
+    return PostIndex(tmp_path, rescan_interval=0)
+
+
+class TestSitemapCache:
+    def test_single_urlset(self, index):
+        sitemap = SitemapCache(index, "https://example.com/").get(SITEMAP_NAME)
+        body = sitemap.body.decode()
+        assert body.startswith('<?xml version="1.0" encoding="UTF-8"?>\n<urlset')
+        assert body.count("<url>") == 6
+        assert "<loc>https://example.com/p3</loc>" in body
+        assert "<lastmod>2024-01-03</lastmod>" in body
+        assert gzip.decompress(sitemap.gzipped) == sitemap.body
+        assert sitemap.etag != sitemap.gzipped_etag
+
+    def test_built_once_per_content_change(self, index, tmp_path):
+        cache = SitemapCache(index, "https://example.com")
+        first = cache.get(SITEMAP_NAME)
+        assert cache.get(SITEMAP_NAME) is first
+        (tmp_path / "p6.md").write_text("---\nslug: p6\n---\nBody")
+        assert cache.get(SITEMAP_NAME) is not first
+        assert b"/p6</loc>" in cache.get(SITEMAP_NAME).body
+
+    def test_splits_into_sitemap_index(self, index):
+        cache = SitemapCache(index, "https://example.com", max_urls=4)
+        files = cache.files()
+        assert set(files) == {"sitemap.xml", "sitemap-1.xml", "sitemap-2.xml"}
+        root = files["sitemap.xml"].body.decode()
+        assert "<sitemapindex" in root
+        assert "<loc>https://example.com/sitemap-2.xml</loc>" in root
+        assert files["sitemap-1.xml"].body.count(b"<url>") == 4
+        assert files["sitemap-2.xml"].body.count(b"<url>") == 2
+
+    def test_splits_on_byte_budget(self, index):
+        cache = SitemapCache(index, "https://example.com", max_bytes=600)
+        assert len(cache.files()) > 2
+
+    def test_escapes_locations(self, tmp_path):
+        (tmp_path / "amp.md").write_text("---\nslug: a&b\n---\nBody")
+        body = SitemapCache(PostIndex(tmp_path), "https://example.com").get(SITEMAP_NAME).body
+        assert b"/a&amp;b</loc>" in body
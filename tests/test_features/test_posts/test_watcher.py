@@ -0,0 +1,62 @@
+import asyncio
+import time
+import pytest
+from pathlib import Path
+from blog_chat.features.posts.index import PostIndex
+from blog_chat.features.posts.watcher import ContentWatcher
+
+
+def write_post(directory: Path, slug: str) -> Path:
+    path = directory / f"{slug}.md"
+    path.write_text(f"---\ntitle: {slug}\nslug: {slug}\n---\n\nBody", encoding="utf-8")
+    return path
+
+
+async def wait_for(predicate, timeout: float = 5.0):
+    deadline = asyncio.get_running_loop().time() + timeout
+    while not predicate():
+        if asyncio.get_running_loop().time() > deadline:
+            raise AssertionError("condition not met in time")
+        await asyncio.sleep(0.02)
+
+
+class TestContentWatcher:
+    @pytest.mark.asyncio
+    @pytest.mark.parametrize("force_polling", [True, False])
+    async def test_picks_up_added_and_deleted_files(self, tmp_path, force_polling):
+        first = write_post(tmp_path, "first")
+        index = PostIndex(tmp_path, rescan_interval=3600)
+        watcher = ContentWatcher(index, poll_interval=0.05, force_polling=force_polling)
+        await watcher.start()
+        try:
+            assert index.watched
+            assert index.get_post("first") is not None
+            await asyncio.sleep(0.3)
+            write_post(tmp_path, "second")
+            await wait_for(lambda: index.get_post("second") is not None)
+            first.unlink()
+            await wait_for(lambda: index.get_post("first") is None)
+        finally:
+            await watcher.stop()
+        assert not index.watched
+
+    @pytest.mark.asyncio
+    async def test_failed_watcher_leaves_rescans_on(self, tmp_path):
+        write_post(tmp_path, "first")
+        index = PostIndex(tmp_path, rescan_interval=3600)
+        watcher = ContentWatcher(index, force_polling=True)
+
+        async def broken():
+            raise RuntimeError("watch failed")
+
+        watcher._poll = broken
+        refresh = index.refresh
+
+        def slow_refresh():
+            time.sleep(0.05)
+            refresh()
+
+        index.refresh = slow_refresh
+        await watcher.start()
+        assert not index.watched
+        await watcher.stop()